@@ -1,9 +1,14 @@
 # adaptive_controller.py - GELİŞMİŞ ADAPTİF BİTRATE CONTROLLER
 
 import time
-import numpy as np
 from collections import deque
-from resilience import FecHandler
+from statistics import fmean
+from typing import TYPE_CHECKING, List
+
+from loss_model import GilbertElliottModel, select_fec_shape, residual_loss
+
+if TYPE_CHECKING:
+    from resilience import FecHandler
 
 
 class AdaptiveController:
@@ -12,15 +17,26 @@ class AdaptiveController:
     Ağ koşullarına göre dinamik ayarlama yapar
     """
 
-    def __init__(self, fec_handler: FecHandler,
+    def __init__(self, fec_handler: 'FecHandler',
                  initial_bitrate: int = 2500000,  # 2.5 Mbps
                  min_bitrate: int = 500000,  # 500 Kbps
-                 max_bitrate: int = 8000000):  # 8 Mbps
+                 max_bitrate: int = 8000000,  # 8 Mbps
+                 adaptive_fec_shape: bool = True,
+                 recovery_latency_ms: float = 100.0,
+                 target_residual_loss: float = 0.001):
+        """
+        adaptive_fec_shape: FEC grup boyutu/parity/interleave derinliğini kayıp modelinden seç
+        recovery_latency_ms: FEC kurtarma gecikmesi bütçesi (grup süresi)
+        target_residual_loss: FEC sonrası hedeflenen kalan kayıp oranı
+        """
 
         self.fec_handler = fec_handler
 
         # Bitrate parametreleri
+        # current_bitrate = min(kayıp tabanlı, gecikme tabanlı) (GCC birleşimi)
         self.current_bitrate = initial_bitrate
+        self.loss_based_bitrate = initial_bitrate
+        self.delay_based_bitrate = None
         self.min_bitrate = min_bitrate
         self.max_bitrate = max_bitrate
 
@@ -40,6 +56,13 @@ class AdaptiveController:
         self.min_fec_ratio = 0.1  # %10 minimum FEC
         self.max_fec_ratio = 0.5  # %50 maksimum FEC
 
+        # Patlamalı kayıp modeli (Gilbert-Elliott) ile FEC şekli seçimi
+        self.loss_model = GilbertElliottModel()
+        self.adaptive_fec_shape = adaptive_fec_shape
+        self.recovery_latency_ms = recovery_latency_ms
+        self.target_residual_loss = target_residual_loss
+        self.shape_switch_min_saving = 0.05  # Şekil değişimi için minimum ek yük kazancı
+
         # Zaman takibi
         self._last_check_time = time.time()
         self._last_adapt_time = time.time()
@@ -93,6 +116,10 @@ class AdaptiveController:
                 self._last_bytes_sent = stats['bytesSent']
                 self._last_bytes_time = current_time
 
+    def process_loss_pattern(self, received: List[bool]):
+        """Transport SN sırasında paket başına alındı/kayıp bilgisini kayıp modeline ekler"""
+        self.loss_model.update(received)
+
     def adapt(self):
         """
         Periyodik olarak çağrılarak adaptasyon mantığını çalıştırır
@@ -106,24 +133,30 @@ class AdaptiveController:
 
         self._last_adapt_time = current_time
 
+        # FEC şekli paket bazlı kayıp modelinden gelir (RR kayıp örneklerinden bağımsız)
+        shape_adapted = self._adapt_fec_shape()
+
         # Yeterli sample yoksa bekle
         if len(self.loss_samples) < 3:
             return
 
         # Metrikleri hesapla
-        avg_loss = np.mean(self.loss_samples)
-        avg_rtt = np.mean(self.rtt_samples) if self.rtt_samples else 50
-        avg_jitter = np.mean(self.jitter_samples) if self.jitter_samples else 10
+        avg_loss = fmean(self.loss_samples)
+        avg_rtt = fmean(self.rtt_samples) if self.rtt_samples else 50
+        avg_jitter = fmean(self.jitter_samples) if self.jitter_samples else 10
 
         print(f"[ADAPT] Metrics - Loss: {avg_loss:.2%}, RTT: {avg_rtt:.0f}ms, Jitter: {avg_jitter:.0f}ms")
 
         # Bitrate adaptasyonu
         new_bitrate = self._calculate_target_bitrate(avg_loss, avg_rtt, avg_jitter)
 
-        # FEC adaptasyonu
-        new_fec_ratio = self._calculate_target_fec(avg_loss, avg_rtt)
+        # FEC adaptasyonu (kayıp modeli henüz yoksa tek oran ayarı)
+        new_fec_ratio = self.fec_handler.protection_level if shape_adapted else self._calculate_target_fec(avg_loss, avg_rtt)
 
         # Değişiklikleri uygula
+        self.loss_based_bitrate = new_bitrate
+        if self.delay_based_bitrate is not None:
+            new_bitrate = min(new_bitrate, self.delay_based_bitrate)
         if new_bitrate != self.current_bitrate:
             print(f"[ADAPT] Bitrate: {self.current_bitrate} -> {new_bitrate}")
             self.current_bitrate = new_bitrate
@@ -134,23 +167,23 @@ class AdaptiveController:
 
     def _calculate_target_bitrate(self, loss_rate: float, rtt: float, jitter: float) -> int:
         """
-        Ağ koşullarına göre hedef bitrate hesaplar
+        Ağ koşullarına göre kayıp tabanlı hedef bitrate hesaplar
         """
-        target = self.current_bitrate
+        target = self.loss_based_bitrate
 
         # Ağır kayıp durumu - agresif azaltma
         if loss_rate > 0.10:  # %10+ kayıp
-            target = int(self.current_bitrate * 0.7)  # %30 azalt
+            target = int(self.loss_based_bitrate * 0.7)  # %30 azalt
             self.stable_count = 0
 
         # Orta kayıp durumu - moderate azaltma
         elif loss_rate > 0.05:  # %5-10 kayıp
-            target = int(self.current_bitrate * self.decrease_factor)
+            target = int(self.loss_based_bitrate * self.decrease_factor)
             self.stable_count = 0
 
         # Hafif kayıp durumu - küçük azaltma
         elif loss_rate > 0.02:  # %2-5 kayıp
-            target = int(self.current_bitrate * 0.95)
+            target = int(self.loss_based_bitrate * 0.95)
             self.stable_count = 0
 
         # İyi koşullar - artırmayı dene
@@ -159,15 +192,15 @@ class AdaptiveController:
             if self.stable_count >= self.stable_threshold:
                 # Bandwidth'e göre artır
                 if self.bandwidth_samples:
-                    current_usage = np.mean(self.bandwidth_samples)
-                    if current_usage < self.current_bitrate * 0.8 / 1000000:
+                    current_usage = fmean(self.bandwidth_samples)
+                    if current_usage < self.loss_based_bitrate * 0.8 / 1000000:
                         # Bandwidth kullanımı düşük, dikkatli artır
-                        target = int(self.current_bitrate * 1.02)
+                        target = int(self.loss_based_bitrate * 1.02)
                     else:
                         # Normal artış
-                        target = int(self.current_bitrate * self.increase_factor)
+                        target = int(self.loss_based_bitrate * self.increase_factor)
                 else:
-                    target = int(self.current_bitrate * self.increase_factor)
+                    target = int(self.loss_based_bitrate * self.increase_factor)
                 self.stable_count = 0
 
         # RTT ve jitter bazlı ek ayarlamalar
@@ -181,6 +214,37 @@ class AdaptiveController:
 
         return target
 
+    def _adapt_fec_shape(self) -> bool:
+        """
+        Kayıp modeli güvenilirse grup boyutu, parity sayısı ve interleave derinliğini
+        kurtarma gecikmesi bütçesi içinde birlikte seçer. Model yoksa False döner.
+        """
+        model = self.loss_model
+        if not (self.adaptive_fec_shape and model.reliable and model.packet_rate):
+            return False
+
+        fec = self.fec_handler
+        # Transport SN'leri FEC/RED paketlerini de sayar: grup süresi medya paket hızıyla hesaplanır
+        media_rate = model.packet_rate / (1.0 + fec.protection_level)
+        group_size, parity, depth, residual = select_fec_shape(
+            model, media_rate, self.recovery_latency_ms, self.target_residual_loss, self.max_fec_ratio,
+            fec.max_protected_span, fec.max_group_size, fec.shape_span)
+
+        current = fec.fec_shape
+        if current == (group_size, parity, depth):
+            return True
+        current_residual = residual_loss(model, current[0], current[1], current[2])
+        saving = current[1] / current[0] - parity / group_size
+        # Mevcut şekil hedefi tutturuyorsa küçük kazançlar için grup düzeni bozulmaz
+        if current_residual <= self.target_residual_loss and saving < self.shape_switch_min_saving:
+            return True
+
+        print(f"[ADAPT] FEC şekli: {current[0]}+{current[1]}x{current[2]} -> {group_size}+{parity}x{depth} "
+              f"(kayıp {model.loss_rate:.2%}, ort. patlama {model.mean_burst_length:.1f}, "
+              f"kalan kayıp {residual:.2e})")
+        fec.set_fec_shape(group_size, parity, depth)
+        return True
+
     def _calculate_target_fec(self, loss_rate: float, rtt: float) -> float:
         """
         Paket kaybı oranına göre optimal FEC seviyesi hesaplar
@@ -214,11 +278,25 @@ class AdaptiveController:
 
         return target_fec
 
+    def update_delay_based_estimate(self, bitrate: int) -> int:
+        """
+        Gecikme tabanlı tahmini (transport feedback başına) uygular.
+        Kayıp tabanlı döngünün 2 s'lik periyodu beklenmez: kuyruk birikimi
+        algılandığında bitrate kayıp oluşmadan hemen düşer.
+        """
+        self.delay_based_bitrate = bitrate
+        self.current_bitrate = max(self.min_bitrate, min(self.loss_based_bitrate, bitrate))
+        return self.current_bitrate
+
     def get_current_settings(self) -> dict:
         """Mevcut adaptif ayarları döndürür"""
         return {
             'bitrate': self.current_bitrate,
+            'loss_based_bitrate': self.loss_based_bitrate,
+            'delay_based_bitrate': self.delay_based_bitrate,
             'fec_ratio': self.fec_handler.protection_level,
+            'fec_shape': self.fec_handler.fec_shape,
+            'loss_model': self.loss_model.get_stats(),
             'stats': self._stats
         }
 
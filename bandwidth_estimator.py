@@ -0,0 +1,348 @@
+# bandwidth_estimator.py - GECİKME TABANLI BANT GENİŞLİĞİ TAHMİNİ (GCC)
+"""
+Google Congestion Control tarzı gecikme tabanlı tahmin.
+- Gönderici her pakete transport-wide sequence number (RFC 8285 extension) ekler,
+  gönderim zamanını ve boyutunu saklar.
+- Alıcı varış zamanlarını periyodik transport feedback (RTPFB FMT=15) ile bildirir.
+- Gönderici paketleri 5 ms'lik gönderim gruplarına ayırır; gruplar arası gecikme
+  değişiminin birikimi üzerinden trendline (doğrusal regresyon eğimi) hesaplar.
+  Eğim adaptif eşiği aşarsa kuyruk dolmaktadır (over-use): kayıp oluşmadan
+  bitrate, onaylanan (alıcıya ulaşan) bitrate'in %85'ine indirilir (AIMD).
+"""
+import time
+from collections import deque
+from typing import List, Optional, Dict
+
+from rtcp import build_transport_feedback
+
+BANDWIDTH_NORMAL = 'normal'
+BANDWIDTH_OVERUSING = 'overusing'
+BANDWIDTH_UNDERUSING = 'underusing'
+
+
+class TransportFeedbackGenerator:
+    """
+    Alıcı tarafı: transport-wide SN başına varış zamanlarını toplar ve
+    son feedback'ten bu yana gelen paketler için feedback paketi üretir.
+    """
+
+    MAX_PACKETS_PER_FEEDBACK = 1000
+
+    def __init__(self):
+        self._arrivals: Dict[int, int] = {}      # Genişletilmiş SN -> varış zamanı (µs)
+        self._next_seq: Optional[int] = None     # Bir sonraki feedback'in base SN'i (genişletilmiş)
+        self._highest: Optional[int] = None
+        self._base_time = time.monotonic()
+        self._feedback_count = 0
+        self.stats = {'packets_recorded': 0, 'packets_late': 0, 'feedbacks_sent': 0}
+
+    def on_packet(self, transport_seq: int, now: Optional[float] = None):
+        """Transport-wide SN taşıyan her paket geldiğinde çağrılır"""
+        now = time.monotonic() if now is None else now
+        if self._highest is None:
+            seq = self._next_seq = self._highest = transport_seq
+        else:
+            # 16 bit SN, en yüksek SN'e göre genişletilir
+            seq = self._highest + ((transport_seq - self._highest + 0x8000) & 0xFFFF) - 0x8000
+            if seq < self._next_seq:
+                # Bu SN feedback'te zaten "alınmadı" olarak bildirildi
+                self.stats['packets_late'] += 1
+                return
+            self._highest = max(self._highest, seq)
+
+        self._arrivals.setdefault(seq, int((now - self._base_time) * 1000000))
+        self.stats['packets_recorded'] += 1
+
+    def build(self, sender_ssrc: int, media_ssrc: int) -> Optional[bytes]:
+        """Bekleyen varışlar için feedback paketi; yeni paket yoksa None"""
+        if not self._arrivals:
+            return None
+
+        base = max(self._next_seq, self._highest - self.MAX_PACKETS_PER_FEEDBACK + 1)
+        arrivals = [self._arrivals.get(seq) for seq in range(base, self._highest + 1)]
+        self._next_seq = self._highest + 1
+        self._arrivals.clear()
+
+        packet = build_transport_feedback(sender_ssrc, media_ssrc, base, self._feedback_count, arrivals)
+        self._feedback_count = (self._feedback_count + 1) & 0xFF
+        self.stats['feedbacks_sent'] += 1
+        return packet
+
+    def get_stats(self) -> Dict:
+        return self.stats
+
+
+class TrendlineEstimator:
+    """
+    Gruplar arası gecikme değişimi (varış farkı - gönderim farkı) birikimini
+    yumuşatır ve son WINDOW_SIZE örneğin eğimini hesaplar. Eğim adaptif bir
+    eşikle karşılaştırılır; eşik ağdaki doğal dalgalanmaya uyum sağlar.
+    """
+
+    WINDOW_SIZE = 20
+    SMOOTHING = 0.9
+    THRESHOLD_GAIN = 4.0
+    MAX_DELTAS = 60
+    K_UP = 0.0087
+    K_DOWN = 0.039
+    INITIAL_THRESHOLD_MS = 12.5
+    MIN_THRESHOLD_MS = 6.0
+    MAX_THRESHOLD_MS = 600.0
+    OVERUSE_TIME_MS = 10.0
+
+    def __init__(self):
+        self._history = deque(maxlen=self.WINDOW_SIZE)
+        self._first_arrival_ms: Optional[float] = None
+        self._accumulated_delay = 0.0
+        self._smoothed_delay = 0.0
+        self._num_deltas = 0
+        self._trend = 0.0
+        self._previous_trend = 0.0
+        self._threshold = self.INITIAL_THRESHOLD_MS
+        self._last_threshold_update_ms: Optional[float] = None
+        self._time_over_using = -1.0
+        self._overuse_counter = 0
+        self.state = BANDWIDTH_NORMAL
+        self.modified_trend = 0.0
+
+    def update(self, recv_delta_ms: float, send_delta_ms: float, arrival_ms: float) -> str:
+        """Bir grup çifti için gecikme değişimini ekler, bant kullanım durumunu döndürür"""
+        self._num_deltas = min(self._num_deltas + 1, 1000)
+        if self._first_arrival_ms is None:
+            self._first_arrival_ms = arrival_ms
+
+        self._accumulated_delay += recv_delta_ms - send_delta_ms
+        self._smoothed_delay = self.SMOOTHING * self._smoothed_delay + (1 - self.SMOOTHING) * self._accumulated_delay
+        self._history.append((arrival_ms - self._first_arrival_ms, self._smoothed_delay))
+        if len(self._history) == self.WINDOW_SIZE:
+            slope = self._linear_fit_slope()
+            if slope is not None:
+                self._trend = slope
+
+        self._detect(send_delta_ms, arrival_ms)
+        return self.state
+
+    def _linear_fit_slope(self) -> Optional[float]:
+        count = len(self._history)
+        mean_x = sum(x for x, _ in self._history) / count
+        mean_y = sum(y for _, y in self._history) / count
+        numerator = sum((x - mean_x) * (y - mean_y) for x, y in self._history)
+        denominator = sum((x - mean_x) ** 2 for x, _ in self._history)
+        return numerator / denominator if denominator else None
+
+    def _detect(self, send_delta_ms: float, arrival_ms: float):
+        if self._num_deltas < 2:
+            return
+        modified_trend = min(self._num_deltas, self.MAX_DELTAS) * self._trend * self.THRESHOLD_GAIN
+        self.modified_trend = modified_trend
+
+        if modified_trend > self._threshold:
+            if self._time_over_using == -1:
+                # Tek örnekle karar verme: eşik üstünde geçen süre ölçülür
+                self._time_over_using = send_delta_ms / 2
+            else:
+                self._time_over_using += send_delta_ms
+            self._overuse_counter += 1
+            if (self._time_over_using > self.OVERUSE_TIME_MS and self._overuse_counter > 1
+                    and self._trend >= self._previous_trend):
+                self._time_over_using = 0.0
+                self._overuse_counter = 0
+                self.state = BANDWIDTH_OVERUSING
+        elif modified_trend < -self._threshold:
+            self._time_over_using = -1.0
+            self._overuse_counter = 0
+            self.state = BANDWIDTH_UNDERUSING
+        else:
+            self._time_over_using = -1.0
+            self._overuse_counter = 0
+            self.state = BANDWIDTH_NORMAL
+
+        self._previous_trend = self._trend
+        self._update_threshold(modified_trend, arrival_ms)
+
+    def _update_threshold(self, modified_trend: float, arrival_ms: float):
+        if self._last_threshold_update_ms is None:
+            self._last_threshold_update_ms = arrival_ms
+        # Ani sıçramalar (ör. yol değişimi) eşiği yukarı çekmesin
+        if abs(modified_trend) > self._threshold + 15.0:
+            self._last_threshold_update_ms = arrival_ms
+            return
+        k = self.K_DOWN if abs(modified_trend) < self._threshold else self.K_UP
+        elapsed_ms = min(arrival_ms - self._last_threshold_update_ms, 100.0)
+        self._threshold += k * (abs(modified_trend) - self._threshold) * elapsed_ms
+        self._threshold = max(self.MIN_THRESHOLD_MS, min(self.MAX_THRESHOLD_MS, self._threshold))
+        self._last_threshold_update_ms = arrival_ms
+
+    @property
+    def threshold(self) -> float:
+        return self._threshold
+
+
+class AimdRateControl:
+    """
+    Gecikme sinyaline göre AIMD hız kontrolü.
+    Over-use: onaylanan bitrate'in BETA katına düş; under-use: bekle (kuyruk boşalıyor);
+    normal: kapasiteden uzakta çarpımsal (%8/s), son over-use seviyesine yakınken
+    toplamsal (RTT başına bir paket) artış.
+    """
+
+    BETA = 0.85
+    MULTIPLICATIVE_INCREASE = 1.08
+    PACKET_SIZE_BITS = 1200 * 8
+
+    def __init__(self, initial_bitrate: int, min_bitrate: int, max_bitrate: int):
+        self.bitrate = initial_bitrate
+        self.min_bitrate = min_bitrate
+        self.max_bitrate = max_bitrate
+        self._link_capacity: Optional[float] = None    # Son over-use anındaki onaylı bitrate (EMA)
+        self._last_update: Optional[float] = None
+        self._last_decrease: Optional[float] = None
+
+    def update(self, state: str, acked_bitrate: Optional[float], rtt_ms: float, now: float) -> int:
+        elapsed = 0.0 if self._last_update is None else min(now - self._last_update, 1.0)
+        self._last_update = now
+
+        if state == BANDWIDTH_OVERUSING:
+            # Bir düşüşün etkisi en erken bir RTT sonra görülür: art arda feedback'lerle kademeli düşüş olmaz
+            if self._last_decrease is not None and now - self._last_decrease < min(max(rtt_ms, 10.0), 200.0) / 1000.0:
+                return int(self.bitrate)
+            self._last_decrease = now
+            reference = acked_bitrate if acked_bitrate else self.bitrate
+            decreased = self.BETA * reference
+            if decreased < self.bitrate:
+                self.bitrate = decreased
+            if acked_bitrate:
+                self._link_capacity = (acked_bitrate if self._link_capacity is None
+                                       else 0.95 * self._link_capacity + 0.05 * acked_bitrate)
+        elif state == BANDWIDTH_NORMAL:
+            if self._link_capacity is not None and self.bitrate >= 0.9 * self._link_capacity:
+                response_time = (rtt_ms + 100.0) / 1000.0
+                self.bitrate += self.PACKET_SIZE_BITS * elapsed / response_time
+            else:
+                self.bitrate *= self.MULTIPLICATIVE_INCREASE ** elapsed
+            if acked_bitrate:
+                # Alıcıya ulaşmayan hıza doğru büyüme olmaz
+                self.bitrate = min(self.bitrate, 1.5 * acked_bitrate + 10000)
+
+        self.bitrate = max(self.min_bitrate, min(self.max_bitrate, self.bitrate))
+        return int(self.bitrate)
+
+
+class DelayBasedBwe:
+    """
+    Gönderici tarafı gecikme tabanlı tahminci: gönderim geçmişi, transport
+    feedback işleme, varış gruplama, trendline dedektörü ve AIMD kontrol.
+    """
+
+    BURST_INTERVAL_MS = 5.0
+    ACKED_WINDOW_MS = 500.0
+
+    def __init__(self, initial_bitrate: int = 2500000, min_bitrate: int = 500000,
+                 max_bitrate: int = 8000000, history_size: int = 4096):
+        """history_size: Gönderim geçmişi (2'nin kuvveti, transport SN indeksli)"""
+        if history_size & (history_size - 1):
+            raise ValueError(f"Kapasite 2'nin kuvveti olmalı: {history_size}")
+        self._mask = history_size - 1
+        self._seqs: List[Optional[int]] = [None] * history_size
+        self._send_times = [0.0] * history_size
+        self._sizes = [0] * history_size
+
+        self.trendline = TrendlineEstimator()
+        self.rate_control = AimdRateControl(initial_bitrate, min_bitrate, max_bitrate)
+
+        # Gönderim grubu: (ilk gönderim ms, son gönderim ms, son varış ms)
+        self._group: Optional[List[float]] = None
+        self._previous_group: Optional[List[float]] = None
+        self._acked = deque()     # (varış ms, byte)
+        self._acked_bytes = 0
+
+        self.stats = {
+            'feedbacks_received': 0,
+            'packets_acked': 0,
+            'packets_lost': 0,
+            'overuse_events': 0,
+            'state': BANDWIDTH_NORMAL,
+            'estimate_bps': initial_bitrate,
+            'acked_bps': 0
+        }
+
+    def on_packet_sent(self, transport_seq: int, size: int, now: Optional[float] = None):
+        index = transport_seq & self._mask
+        self._seqs[index] = transport_seq
+        self._send_times[index] = (time.monotonic() if now is None else now) * 1000.0
+        self._sizes[index] = size
+
+    def on_feedback(self, base_seq: int, arrivals: List[Optional[int]],
+                    rtt_ms: Optional[float] = None, now: Optional[float] = None) -> Optional[int]:
+        """
+        Transport feedback'i işler; güncel gecikme tabanlı bitrate tahminini döndürür.
+        Feedback'teki hiçbir paket geçmişte yoksa None.
+        """
+        now = time.monotonic() if now is None else now
+        self.stats['feedbacks_received'] += 1
+        previous_state = self.trendline.state
+        matched = False
+
+        for offset, arrival_us in enumerate(arrivals):
+            seq = (base_seq + offset) & 0xFFFF
+            index = seq & self._mask
+            if self._seqs[index] != seq:
+                continue
+            if arrival_us is None:
+                self.stats['packets_lost'] += 1
+                continue
+            # Her paket bir kez işlenir
+            self._seqs[index] = None
+            matched = True
+            self.stats['packets_acked'] += 1
+            self._on_packet_acked(self._send_times[index], arrival_us / 1000.0, self._sizes[index])
+
+        if not matched:
+            return None
+
+        state = self.trendline.state
+        if state == BANDWIDTH_OVERUSING and previous_state != BANDWIDTH_OVERUSING:
+            self.stats['overuse_events'] += 1
+            print(f"[BWE] Over-use algılandı (trend={self.trendline.modified_trend:.1f}, "
+                  f"eşik={self.trendline.threshold:.1f})")
+        acked_bitrate = self.acked_bitrate()
+        estimate = self.rate_control.update(state, acked_bitrate, rtt_ms or 100.0, now)
+        self.stats.update(state=state, estimate_bps=estimate, acked_bps=int(acked_bitrate or 0))
+        return estimate
+
+    def _on_packet_acked(self, send_ms: float, arrival_ms: float, size: int):
+        self._acked.append((arrival_ms, size))
+        self._acked_bytes += size
+        while self._acked and arrival_ms - self._acked[0][0] > self.ACKED_WINDOW_MS:
+            self._acked_bytes -= self._acked.popleft()[1]
+
+        group = self._group
+        if group is None:
+            self._group = [send_ms, send_ms, arrival_ms]
+            return
+        if send_ms < group[0]:
+            # Yeniden sıralanmış eski paket: gruplamayı bozmasın
+            return
+        if send_ms - group[0] <= self.BURST_INTERVAL_MS:
+            group[1] = max(group[1], send_ms)
+            group[2] = max(group[2], arrival_ms)
+            return
+
+        # Grup kapandı: bir önceki kapanmış grupla karşılaştır
+        previous = self._previous_group
+        if previous is not None:
+            self.trendline.update(group[2] - previous[2], group[1] - previous[1], group[2])
+        self._previous_group = group
+        self._group = [send_ms, send_ms, arrival_ms]
+
+    def acked_bitrate(self) -> Optional[float]:
+        """Son ACKED_WINDOW_MS içinde alıcıya ulaşan bitrate (bps); yeterli veri yoksa None"""
+        if len(self._acked) < 2:
+            return None
+        span_ms = self._acked[-1][0] - self._acked[0][0]
+        if span_ms < 100.0:
+            return None
+        return self._acked_bytes * 8 * 1000.0 / span_ms
+
+    def get_stats(self) -> Dict:
+        return dict(self.stats, threshold_ms=round(self.trendline.threshold, 1))
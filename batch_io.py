@@ -0,0 +1,248 @@
+# batch_io.py - TOPLU DATAGRAM G/Ç (recvmmsg / sendmmsg)
+"""
+Linux'ta recvmmsg/sendmmsg sistem çağrılarına ctypes üzerinden erişim.
+Tek sistem çağrısıyla bir FEC grubunun tamamı gönderilir veya alım kuyruğu
+boşaltılır. Bu çağrılar yoksa (Linux dışı, libc bulunamadı) aynı arayüz
+paket başına recvfrom/sendto döngüsüyle çalışır.
+"""
+import ctypes
+import ctypes.util
+import errno
+import socket
+import sys
+from typing import List, Tuple, Optional, Union
+
+MSG_DONTWAIT = 0x40
+
+
+class _IoVec(ctypes.Structure):
+    _fields_ = [('iov_base', ctypes.c_void_p),
+                ('iov_len', ctypes.c_size_t)]
+
+
+class _SockAddrIn(ctypes.Structure):
+    _fields_ = [('sin_family', ctypes.c_ushort),
+                ('sin_port', ctypes.c_uint8 * 2),   # network byte order
+                ('sin_addr', ctypes.c_uint8 * 4),
+                ('sin_zero', ctypes.c_uint8 * 8)]
+
+
+class _MsgHdr(ctypes.Structure):
+    _fields_ = [('msg_name', ctypes.c_void_p),
+                ('msg_namelen', ctypes.c_uint32),
+                ('msg_iov', ctypes.POINTER(_IoVec)),
+                ('msg_iovlen', ctypes.c_size_t),
+                ('msg_control', ctypes.c_void_p),
+                ('msg_controllen', ctypes.c_size_t),
+                ('msg_flags', ctypes.c_int)]
+
+
+class _MMsgHdr(ctypes.Structure):
+    _fields_ = [('msg_hdr', _MsgHdr),
+                ('msg_len', ctypes.c_uint)]
+
+
+def _load_mmsg():
+    """libc'den recvmmsg/sendmmsg fonksiyonlarını yükler; yoksa (None, None)"""
+    if not sys.platform.startswith('linux'):
+        return None, None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        recvmmsg, sendmmsg = libc.recvmmsg, libc.sendmmsg
+    except (OSError, AttributeError):
+        return None, None
+    recvmmsg.argtypes = [ctypes.c_int, ctypes.POINTER(_MMsgHdr), ctypes.c_uint, ctypes.c_int, ctypes.c_void_p]
+    recvmmsg.restype = ctypes.c_int
+    sendmmsg.argtypes = [ctypes.c_int, ctypes.POINTER(_MMsgHdr), ctypes.c_uint, ctypes.c_int]
+    sendmmsg.restype = ctypes.c_int
+    return recvmmsg, sendmmsg
+
+
+_recvmmsg, _sendmmsg = _load_mmsg()
+MMSG_AVAILABLE = _recvmmsg is not None
+
+
+class ReceiveBufferPool:
+    """
+    Önceden ayrılmış alım buffer'ları halkası.
+    Datagram doğrudan havuz buffer'ına okunur (recv_into / recvmmsg iovec) ve memoryview
+    olarak döner; buffer'lar sırayla yeniden kullanılır. Görünümler yalnızca bir sonraki
+    alım çağrısına kadar geçerlidir: daha uzun tutulan paketleri (jitter buffer, FEC
+    penceresi, frame birleştirici) çağıran kopyalar (RtpHeaderView.detach). Geçici
+    işlenen datagramlar (RTCP, geçersiz/duplicate paketler) kopyalanmaz.
+    """
+
+    def __init__(self, count: int = 128, buffer_size: int = 2048):
+        self.buffer_size = buffer_size
+        self._buffers = [bytearray(buffer_size) for _ in range(count)]
+        # ctypes dizisi buffer'ı export eder: adres sabit kalır
+        self._ctypes = [(ctypes.c_char * buffer_size).from_buffer(buf) for buf in self._buffers]
+        self._addresses = [ctypes.addressof(arr) for arr in self._ctypes]
+        self._cursor = 0
+        self.stats = {'acquired': 0}
+
+    def __len__(self) -> int:
+        return len(self._buffers)
+
+    def acquire(self) -> Tuple[bytearray, int]:
+        """Halkadaki sıradaki buffer ve adresi (en uzun süredir verilmemiş buffer'ın üzerine yazılır)"""
+        index = self._cursor
+        self._cursor = (index + 1) % len(self._buffers)
+        self.stats['acquired'] += 1
+        return self._buffers[index], self._addresses[index]
+
+
+class BatchSocket:
+    """
+    Non-blocking IPv4 UDP soketi için toplu alma/gönderme.
+    Alım buffer'ları ve mesaj dizileri bir kez ayrılır, her çağrıda yeniden kullanılır.
+    """
+
+    def __init__(self, sock: socket.socket, batch_size: int = 64, buffer_size: int = 2048,
+                 use_mmsg: bool = True, pool: Optional[ReceiveBufferPool] = None):
+        """
+        sock: Bağlı (bind edilmiş) non-blocking UDP soketi
+        batch_size: Tek sistem çağrısındaki maksimum datagram sayısı
+        buffer_size: Datagram başına alım buffer boyutu
+        use_mmsg: False ise her zaman yedek döngü kullanılır
+        pool: Verilirse datagramlar havuz buffer'larına kopyasız okunur, memoryview döner
+              (bir sonraki recv_many çağrısına kadar geçerli)
+        """
+        self.sock = sock
+        self.batch_size = batch_size
+        self.pool = pool
+        self.buffer_size = pool.buffer_size if pool else buffer_size
+        if pool and len(pool) <= batch_size:
+            raise ValueError("Buffer havuzu batch boyutundan büyük olmalı")
+        self.batched = use_mmsg and MMSG_AVAILABLE and sock.family == socket.AF_INET
+        self._addr_cache = {}
+
+        if self.batched:
+            self._recv_buffer = ctypes.create_string_buffer(0 if pool else batch_size * self.buffer_size)
+            base = ctypes.addressof(self._recv_buffer)
+            self._recv_iov = (_IoVec * batch_size)()
+            self._recv_names = (_SockAddrIn * batch_size)()
+            self._recv_msgs = (_MMsgHdr * batch_size)()
+            for i in range(batch_size):
+                self._recv_iov[i].iov_base = base + i * self.buffer_size
+                self._recv_iov[i].iov_len = self.buffer_size
+                hdr = self._recv_msgs[i].msg_hdr
+                hdr.msg_name = ctypes.addressof(self._recv_names[i])
+                hdr.msg_iov = ctypes.pointer(self._recv_iov[i])
+                hdr.msg_iovlen = 1
+
+            self._send_iov = (_IoVec * batch_size)()
+            self._send_msgs = (_MMsgHdr * batch_size)()
+            for i in range(batch_size):
+                hdr = self._send_msgs[i].msg_hdr
+                hdr.msg_iov = ctypes.pointer(self._send_iov[i])
+                hdr.msg_iovlen = 1
+                hdr.msg_namelen = ctypes.sizeof(_SockAddrIn)
+
+        self.stats = {'syscalls': 0, 'datagrams_received': 0, 'datagrams_sent': 0, 'send_dropped': 0}
+
+    def recv_many(self) -> List[Tuple[Union[bytes, memoryview], Tuple[str, int]]]:
+        """
+        Alım kuyruğundaki datagramları (en fazla batch_size) döndürür; kuyruk boşsa [].
+        Havuz varsa datagramlar havuz buffer'ları üzerinde memoryview olarak döner;
+        saklanacak olanlar bir sonraki çağrıdan önce kopyalanmalıdır.
+        """
+        if not self.batched:
+            return self._recv_fallback()
+
+        buffers = []
+        for i in range(self.batch_size):
+            self._recv_msgs[i].msg_hdr.msg_namelen = ctypes.sizeof(_SockAddrIn)
+            if self.pool:
+                buf, address = self.pool.acquire()
+                buffers.append(buf)
+                self._recv_iov[i].iov_base = address
+        count = _recvmmsg(self.sock.fileno(), self._recv_msgs, self.batch_size, MSG_DONTWAIT, None)
+        self.stats['syscalls'] += 1
+        if count < 0:
+            err = ctypes.get_errno()
+            if err in (errno.EAGAIN, errno.EWOULDBLOCK, errno.ECONNREFUSED):
+                return []
+            raise OSError(err, f"recvmmsg: {errno.errorcode.get(err, err)}")
+
+        base = ctypes.addressof(self._recv_buffer)
+        datagrams = []
+        for i in range(count):
+            name = self._recv_names[i]
+            addr = (socket.inet_ntoa(bytes(name.sin_addr)), (name.sin_port[0] << 8) | name.sin_port[1])
+            length = self._recv_msgs[i].msg_len
+            if self.pool:
+                datagrams.append((memoryview(buffers[i])[:length], addr))
+            else:
+                datagrams.append((ctypes.string_at(base + i * self.buffer_size, length), addr))
+        self.stats['datagrams_received'] += count
+        return datagrams
+
+    def send_many(self, packets: List[bytes], addr: Tuple[str, int]) -> int:
+        """Paketleri aynı adrese gönderir; gönderilen paket sayısını döndürür"""
+        if not self.batched:
+            return self._send_fallback(packets, addr)
+
+        name = self._sockaddr(addr)
+        sent = 0
+        for start in range(0, len(packets), self.batch_size):
+            chunk = packets[start:start + self.batch_size]
+            for i, data in enumerate(chunk):
+                # bytes nesnesinin iç buffer'ı doğrudan kullanılır (kopya yok); chunk çağrı boyunca canlı
+                self._send_iov[i].iov_base = ctypes.cast(ctypes.c_char_p(data), ctypes.c_void_p).value
+                self._send_iov[i].iov_len = len(data)
+                self._send_msgs[i].msg_hdr.msg_name = ctypes.addressof(name)
+            count = _sendmmsg(self.sock.fileno(), self._send_msgs, len(chunk), MSG_DONTWAIT)
+            self.stats['syscalls'] += 1
+            if count < 0:
+                count = 0
+            sent += count
+            if count < len(chunk):
+                # Kısmi gönderim (soket buffer'ı dolu): kalanlar tek tek denenir
+                sent += self._send_fallback(chunk[count:], addr)
+
+        self.stats['datagrams_sent'] += sent
+        return sent
+
+    def _sockaddr(self, addr: Tuple[str, int]) -> _SockAddrIn:
+        name = self._addr_cache.get(addr)
+        if name is None:
+            host, port = addr
+            name = _SockAddrIn()
+            name.sin_family = socket.AF_INET
+            name.sin_port[0], name.sin_port[1] = port >> 8, port & 0xFF
+            name.sin_addr[:] = socket.inet_aton(socket.gethostbyname(host))
+            self._addr_cache[addr] = name
+        return name
+
+    def _recv_fallback(self) -> List[Tuple[bytes, Tuple[str, int]]]:
+        datagrams = []
+        for _ in range(self.batch_size):
+            try:
+                if self.pool:
+                    buf, _ = self.pool.acquire()
+                    length, addr = self.sock.recvfrom_into(buf)
+                    datagrams.append((memoryview(buf)[:length], addr))
+                else:
+                    datagrams.append(self.sock.recvfrom(self.buffer_size))
+            except (BlockingIOError, InterruptedError, ConnectionRefusedError):
+                break
+            self.stats['syscalls'] += 1
+        self.stats['datagrams_received'] += len(datagrams)
+        return datagrams
+
+    def _send_fallback(self, packets: List[bytes], addr: Tuple[str, int]) -> int:
+        sent = 0
+        for data in packets:
+            try:
+                self.sock.sendto(data, addr)
+                sent += 1
+            except (BlockingIOError, InterruptedError):
+                self.stats['send_dropped'] += 1
+            except OSError as e:
+                self.stats['send_dropped'] += 1
+                print(f"[BatchIO] Send Error: {e}")
+            self.stats['syscalls'] += 1
+        if not self.batched:
+            self.stats['datagrams_sent'] += sent
+        return sent
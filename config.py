@@ -9,20 +9,90 @@ SIGNALING_PORT = 8080
 RTP_PAYLOAD_TYPE = 96      # H264 video
 FEC_PAYLOAD_TYPE = 127     # ULPFEC
 RED_PAYLOAD_TYPE = 100     # Redundancy Encoding
+RTX_PAYLOAD_TYPE = 97      # Retransmission (RFC 4588)
 
 # FEC Parametreleri
 FEC_GROUP_SIZE = 10        # Bir FEC grubundaki paket sayısı
 FEC_PROTECTION_LEVEL = 0.3 # %30 FEC (10 paket için 3 FEC paketi)
 FEC_ENABLE_RED = True      # RED encoding aktif
+FEC_RED_DISTANCE = 1       # RED redundant blokları arası paket mesafesi (RFC 2198)
+FEC_RED_DEPTH = 2          # RED paketindeki redundant blok sayısı
+RTP_MTU = 1400             # Payloader MTU'su; RED paketleri de bu boyutu aşmaz
+FEC_SCHEME = 'rs'          # 'rs': Reed-Solomon (özel header), 'ulpfec': RFC 5109 XOR (GStreamer uyumlu)
+FEC_NATIVE_DECODER = False # ULPFEC kurtarmayı alıcıda rtpulpfecdec elementine bırak
+FEC_HEADER_VERSION = 2     # RS FEC header: 1 (16 paket, MD5) veya 2 (128 pakete kadar, CRC32)
+FEC_NAL_AWARE = True       # H.264 NAL sınıfına göre koruma (SPS/PPS/IDR güçlü, atılabilir frame korumasız)
+FEC_CRITICAL_PROTECTION_LEVEL = 0.5  # SPS/PPS/IDR gruplarının FEC oranı
+FEC_STREAMING = True       # Parity her pakette biriktirilir (grup sonu CPU patlaması yok)
+FEC_FLUSH_ON_MARKER = True # Frame sonunda yarım grup için parity hemen gönderilir
+
+# 2-D Interleaved FEC (SMPTE 2022-1 tarzı) - burst kayıplar için
+FEC_INTERLEAVE = False             # True: ardışık grup FEC yerine L x D matris FEC
+FEC_INTERLEAVE_COLUMNS = 4         # L: sütun sayısı (kurtarılabilir burst uzunluğu)
+FEC_INTERLEAVE_ROWS = 4            # D: satır sayısı (sütun parity'si D paketi korur)
+FEC_INTERLEAVE_ROW_PARITY = False  # Sütunlara ek olarak satır parity'si
+
+# Kayıp modeli güdümlü FEC şekli (Gilbert-Elliott)
+FEC_ADAPTIVE_SHAPE = True          # Grup boyutu/parity/interleave derinliğini patlamalı kayıp modelinden seç
+FEC_RECOVERY_LATENCY_MS = 100      # FEC kurtarma gecikmesi bütçesi (grup + interleave süresi)
+FEC_TARGET_RESIDUAL_LOSS = 0.001   # FEC sonrası hedeflenen kalan kayıp oranı
 
 # Adaptive Bitrate Parametreleri
 INITIAL_BITRATE = 2500000  # 2.5 Mbps başlangıç
-MIN_BITRATE = 500000       # 500 Kbps minimum
+MIN_BITRATE = 200000       # 200 Kbps minimum (merdivenin en alt basamağı + koruma)
 MAX_BITRATE = 8000000      # 8 Mbps maksimum
 
+# Encoder Hız Kontrolü - çözünürlük/kare hızı merdiveni
+# (genişlik, yükseklik, fps, basamağın gerektirdiği minimum video bitrate'i bps), yüksekten düşüğe
+VIDEO_LADDER = [
+    (640, 480, 30, 800000),
+    (640, 480, 15, 500000),
+    (480, 360, 15, 300000),
+    (320, 240, 15, 150000),
+]
+LADDER_DOWN_HOLD_TIME = 1.0   # Bütçe basamağın altında bu kadar kalırsa alt basamağa in (s)
+LADDER_UP_HOLD_TIME = 5.0     # Bütçe üst basamağı bu kadar aşarsa yukarı çık (s)
+LADDER_UP_HYSTERESIS = 1.3    # Üst basamağa çıkış için bitrate çarpanı
+
 # Buffer Parametreleri
-JITTER_BUFFER_MS = 100     # 100ms jitter buffer
+JITTER_BUFFER_MS = 100     # 100ms jitter buffer (adaptif modda başlangıç hedefi)
+MIN_BUFFER_MS = 30         # Adaptif hedef gecikmenin alt sınırı
 MAX_BUFFER_MS = 500        # 500ms maksimum buffer
+ADAPTIVE_JITTER_BUFFER = True  # Hedef gecikmeyi gecikme histogramından ayarla
+RECEIVER_JITTER_LATENCY_MS = 100  # GStreamer alıcı pipeline'ındaki rtpjitterbuffer gecikmesi
+
+# UDP Taşıma
+UDP_BATCH_IO = True        # recvmmsg/sendmmsg ile toplu G/Ç (desteklenmiyorsa paket başına döngü)
+UDP_BATCH_SIZE = 64        # Tek sistem çağrısındaki maksimum datagram sayısı
+UDP_RECV_POOL_SIZE = 128   # Alım buffer halkası (batch boyutundan büyük; saklanan paketler kopyalanır)
+
+# RTCP
+RTCP_INTERVAL = 1.0        # SR/RR gönderim aralığı (saniye)
+
+# NACK / RTX Parametreleri (RFC 4585 / RFC 4588)
+NACK_ENABLED = True        # Alıcı kayıpları NACK ile ister, gönderici RTX ile yeniden gönderir
+RTX_HISTORY_SIZE = 1024    # Göndericide tutulan paket geçmişi (2'nin kuvveti)
+RTX_MAX_BITRATE = 1000000  # Yeniden iletime ayrılan maksimum bitrate (bps)
+
+# Keyframe İstekleri (RFC 4585 PLI / RFC 5104 FIR)
+KEYFRAME_REQUEST_METHOD = 'pli'    # 'pli' veya 'fir'
+KEYFRAME_REQUEST_INTERVAL = 0.2    # Alıcıda ardışık istekler arası minimum süre (s)
+KEYFRAME_MIN_INTERVAL = 0.3        # Göndericide zorlanan keyframe'ler arası minimum süre (s)
+
+# GOP Yapısı: sabit aralıklı IDR'ların oluşturduğu keyframe patlamalarını önleme
+# 'fixed': key-int-max=KEYFRAME_INTERVAL
+# 'intra-refresh': IDR yerine intra kodlama KEYFRAME_INTERVAL frame'e yayılır (x264enc intra-refresh);
+#                  PLI/FIR yeni bir refresh dalgası başlatır, alıcı recovery point SEI'den devam eder
+# 'adaptive': keyframe aralığı kayıp x RTT ile ADAPTIVE_GOP_MIN/MAX_INTERVAL arasında ayarlanır
+VIDEO_GOP_MODE = 'fixed'
+KEYFRAME_INTERVAL = 30               # Frame cinsinden GOP / refresh periyodu
+ADAPTIVE_GOP_MIN_INTERVAL = 1.0      # Yüksek kayıp/RTT altında keyframe aralığı (s)
+ADAPTIVE_GOP_MAX_INTERVAL = 10.0     # Kayıpsız ağda keyframe aralığı (s)
+
+# Gecikme Tabanlı Bant Genişliği Tahmini (GCC tarzı, transport-wide CC)
+DELAY_BWE_ENABLED = True           # Kayıp öncesi kuyruk birikimini gecikme eğiliminden algıla
+TRANSPORT_CC_EXTENSION_ID = 5      # Transport-wide sequence number one-byte extension id'si
+TRANSPORT_FEEDBACK_INTERVAL = 0.05 # Alıcının varış zamanı geri bildirim aralığı (saniye)
 
 # GStreamer Pipeline'ları - UDP TRANSPORT İÇİN
 GST_SENDER_PIPELINE_UDP = """
@@ -50,7 +120,7 @@ GST_SENDER_PIPELINE = (
     "v4l2src device=/dev/video0 ! "
     "videoconvert ! "
     "video/x-raw,format=I420,width=640,height=480,framerate=30/1 ! "
-    "x264enc tune=zerolatency speed-preset=ultrafast bitrate=2500 key-int-max=30 ! "
+    "x264enc name=x264enc tune=zerolatency speed-preset=ultrafast bitrate=2500 key-int-max=30 ! "
     "rtph264pay pt=96 config-interval=1 ! "
     "tee name=t ! queue ! rtpbin.send_rtp_sink_0 "
     "t. ! queue ! "
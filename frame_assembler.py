@@ -0,0 +1,175 @@
+# frame_assembler.py - RTP PAKETLERİNDEN FRAME OLUŞTURMA
+"""
+Jitter buffer'dan sıralı çıkan paketleri RTP timestamp ve marker bit'e göre
+frame'lere gruplar. Tam frame GStreamer'a tek bir Gst.BufferList olarak verilir;
+çözülemeyecek frame'ler decoder'a hiç gönderilmez, referans zinciri
+koptuğunda bir sonraki IDR'a (intra refresh'te recovery point'e) kadar atlanır.
+"""
+from typing import List, Optional, Dict
+
+from rtp import RtpPacket
+
+from nal_inspector import (classify_h264_payload, NAL_CLASS_NON_REFERENCE, NAL_CLASS_IDR)
+
+
+class _Frame:
+    """Oluşturulmakta olan tek bir frame"""
+
+    __slots__ = ('timestamp', 'packets', 'complete', 'marker', 'nal_class')
+
+    def __init__(self, timestamp: int):
+        self.timestamp = timestamp
+        self.packets: List[RtpPacket] = []
+        self.complete = True
+        self.marker = False
+        self.nal_class = NAL_CLASS_NON_REFERENCE
+
+
+class FrameAssembler:
+    """
+    Paket -> frame gruplayıcı.
+    Frame, marker bit'li paket geldiğinde ya da timestamp değiştiğinde kapanır;
+    frame içindeki (veya sınırdaki) sequence boşluğu frame'i eksik işaretler.
+    """
+
+    def __init__(self,
+                 fec_payload_type: Optional[int] = None,
+                 forward_fec: bool = False,
+                 skip_undecodable: bool = True):
+        """
+        fec_payload_type: SN uzayında yer kaplayan FEC paketlerinin PT'si (boşluk sayılmaz)
+        forward_fec: FEC paketleri de frame ile birlikte iletilir (GStreamer içi FEC çözücü için)
+        skip_undecodable: Eksik/referansı kopuk frame'leri decoder'a gönderme
+        """
+        self.fec_payload_type = fec_payload_type
+        self.forward_fec = forward_fec
+        self.skip_undecodable = skip_undecodable
+
+        self._current: Optional[_Frame] = None
+        self._pending_fec: List[RtpPacket] = []
+        self._last_seq = None
+
+        # İlk frame'ler SPS/PPS + IDR gelene kadar çözülemez
+        self.waiting_for_keyframe = skip_undecodable
+
+        self.stats = {
+            'frames_assembled': 0,
+            'frames_delivered': 0,
+            'frames_incomplete': 0,
+            'frames_skipped': 0,
+            'keyframes': 0
+        }
+
+    def push(self, packets: List[RtpPacket]) -> List[List[RtpPacket]]:
+        """
+        Sıralı paketleri ekler, kapanan ve çözülebilir frame'leri döndürür
+        """
+        frames = []
+        for packet in packets:
+            seq = packet.sequence_number
+            gap = self._last_seq is not None and seq != ((self._last_seq + 1) & 0xFFFF)
+            self._last_seq = seq
+
+            if packet.payload_type == self.fec_payload_type:
+                # FEC paketi frame sınırını belirlemez, sadece boşluk takibine girer
+                if gap and self._current is not None:
+                    self._current.complete = False
+                if self.forward_fec:
+                    # Frame dışında gelen FEC paketi bir sonraki frame ile gider
+                    target = self._current.packets if self._current is not None else self._pending_fec
+                    target.append(packet)
+                continue
+
+            if self._current is not None and self._current.timestamp != packet.timestamp:
+                # Marker'sız timestamp değişimi: SN ardışıksa yalnızca marker eksik (ör. RED ile
+                # kurtarılan son paket), frame tamdır; boşluk varsa önceki frame'in sonu kayıp olabilir
+                if gap:
+                    self._current.complete = False
+                self._close(frames)
+
+            if self._current is None:
+                self._current = _Frame(packet.timestamp)
+                if self._pending_fec:
+                    self._current.packets, self._pending_fec = self._pending_fec, []
+
+            frame = self._current
+            if gap:
+                frame.complete = False
+            frame.packets.append(packet)
+            frame.nal_class = max(frame.nal_class, classify_h264_payload(packet.payload))
+
+            if packet.marker:
+                frame.marker = True
+                self._close(frames)
+
+        return frames
+
+    def flush(self) -> List[List[RtpPacket]]:
+        """Yarım kalan frame'i kapatır (akış sonu)"""
+        frames = []
+        if self._current is not None:
+            self._current.complete = self._current.complete and self._current.marker
+            self._close(frames)
+        return frames
+
+    def mark_reference_loss(self):
+        """
+        Akış aşağısında (ör. GStreamer içi FEC çözücü) tespit edilen kurtarılamaz kayıp:
+        skip_undecodable kapalı olsa da bir sonraki keyframe'e kadar keyframe beklenir.
+        """
+        if not self.waiting_for_keyframe:
+            print("[Frame] Kurtarılamayan kayıp bildirildi, IDR bekleniyor")
+        self.waiting_for_keyframe = True
+
+    def reset(self):
+        self._current = None
+        self._pending_fec = []
+        self._last_seq = None
+        self.waiting_for_keyframe = self.skip_undecodable
+
+    def _close(self, frames: List[List[RtpPacket]]):
+        """Mevcut frame'i kapatır; çözülebilirse çıktı listesine ekler"""
+        frame, self._current = self._current, None
+        self.stats['frames_assembled'] += 1
+        if not frame.complete:
+            self.stats['frames_incomplete'] += 1
+
+        if self._is_decodable(frame):
+            self.stats['frames_delivered'] += 1
+            frames.append(frame.packets)
+        else:
+            self.stats['frames_skipped'] += 1
+
+    def _is_decodable(self, frame: _Frame) -> bool:
+        """
+        Referans zinciri takibi: eksik referans frame zinciri koparır,
+        zincir yalnızca tam bir IDR (veya parametre seti + IDR) ya da recovery point SEI'li
+        frame ile yeniden kurulur.
+        """
+        keyframe = frame.nal_class >= NAL_CLASS_IDR
+        if not self.skip_undecodable:
+            # Frame'ler atlanmaz; yalnızca mark_reference_loss sonrası keyframe beklemesi izlenir
+            if frame.complete and keyframe:
+                self.stats['keyframes'] += 1
+                self.waiting_for_keyframe = False
+            return True
+
+        if frame.complete:
+            if keyframe:
+                self.stats['keyframes'] += 1
+                if self.waiting_for_keyframe:
+                    print("[Frame] IDR/kurtarma noktası alındı, kod çözme devam ediyor")
+                self.waiting_for_keyframe = False
+            return not self.waiting_for_keyframe
+
+        # Referans olmayan frame'in kaybı yayılmaz: sadece bu frame atlanır
+        if frame.nal_class == NAL_CLASS_NON_REFERENCE and not self.waiting_for_keyframe:
+            return False
+
+        if not self.waiting_for_keyframe:
+            print(f"[Frame] Eksik referans frame (ts={frame.timestamp}), IDR bekleniyor")
+        self.waiting_for_keyframe = True
+        return False
+
+    def get_stats(self) -> Dict:
+        return dict(self.stats, waiting_for_keyframe=self.waiting_for_keyframe)
@@ -0,0 +1,119 @@
+# gf256.py - GF(2^8) ARİTMETİĞİ (Reed-Solomon FEC için)
+"""
+Log/antilog tablolarıyla GF(2^8) aritmetiği.
+Sistematik Reed-Solomon için Cauchy katsayı matrisi ve
+tüm parity satırlarını tek geçişte hesaplayan vektörel çarpım.
+"""
+from functools import lru_cache
+
+import numpy as np
+
+# x^8 + x^4 + x^3 + x^2 + 1 (Reed-Solomon için standart primitive polinom)
+PRIMITIVE_POLY = 0x11D
+
+# Cauchy matrisi x_i = i (parity satırı), y_j = 128 + j (medya sütunu)
+# Böylece herhangi bir kare alt matris terslenebilir olur
+MAX_PARITY_ROWS = 128
+MAX_GROUP_SIZE = 128
+
+
+def _build_tables():
+    exp = np.zeros(512, dtype=np.uint8)
+    log = np.zeros(256, dtype=np.int32)
+    x = 1
+    for i in range(255):
+        exp[i] = x
+        log[x] = i
+        x <<= 1
+        if x & 0x100:
+            x ^= PRIMITIVE_POLY
+    # Modulo almadan toplama yapabilmek için tabloyu iki kere yaz
+    exp[255:510] = exp[:255]
+    return exp, log
+
+
+GF_EXP, GF_LOG = _build_tables()
+
+
+def _build_mul_table() -> np.ndarray:
+    """256x256 çarpım tablosu: GF_MUL[a, b] = a * b"""
+    log_sum = GF_LOG[:, None] + GF_LOG[None, :]
+    table = GF_EXP[log_sum]
+    table[0, :] = 0
+    table[:, 0] = 0
+    return table
+
+
+GF_MUL = _build_mul_table()
+
+GF_INV = np.zeros(256, dtype=np.uint8)
+GF_INV[1:] = GF_EXP[255 - GF_LOG[1:]]
+
+
+def gf_mul(a: int, b: int) -> int:
+    """GF(256) çarpımı"""
+    if a == 0 or b == 0:
+        return 0
+    return int(GF_EXP[GF_LOG[a] + GF_LOG[b]])
+
+
+def gf_inv(a: int) -> int:
+    """GF(256) çarpımsal tersi"""
+    if a == 0:
+        raise ZeroDivisionError("GF(256) içinde 0'ın tersi yok")
+    return int(GF_INV[a])
+
+
+@lru_cache(maxsize=64)
+def cauchy_matrix(rows: int, cols: int) -> np.ndarray:
+    """
+    rows x cols Cauchy katsayı matrisi: C[i, j] = 1 / (x_i + y_j)
+    Katsayılar grup boyutundan bağımsızdır; C[i, j] her grupta aynıdır.
+    """
+    if rows > MAX_PARITY_ROWS or cols > MAX_GROUP_SIZE:
+        raise ValueError(f"Cauchy matrisi sınırı aşıldı: {rows}x{cols}")
+    x = np.arange(rows, dtype=np.uint8)[:, None]
+    y = (np.arange(cols, dtype=np.int32) + MAX_PARITY_ROWS).astype(np.uint8)[None, :]
+    matrix = GF_INV[x ^ y]
+    matrix.setflags(write=False)
+    return matrix
+
+
+@lru_cache(maxsize=1024)
+def cauchy_row(row: int, cols: int) -> tuple:
+    """Cauchy matrisinin tek satırı (decoder'da satır indeksinden katsayı üretmek için)"""
+    return tuple(cauchy_matrix(row + 1, cols)[row].tolist())
+
+
+def gf_matmul(coeffs: np.ndarray, data: np.ndarray, out: np.ndarray = None) -> np.ndarray:
+    """
+    (R x K) katsayı matrisi ile (K x L) veri matrisini GF(256) üzerinde çarpar.
+    Tüm parity satırları tek bir gather + XOR-reduce ile hesaplanır.
+    """
+    products = GF_MUL[coeffs[:, :, None], data[None, :, :]]
+    return np.bitwise_xor.reduce(products, axis=1, out=out)
+
+
+def gf_invert_matrix(matrix: np.ndarray) -> np.ndarray:
+    """
+    Kare matrisin GF(256) üzerindeki tersini Gauss-Jordan eliminasyonu ile bulur.
+    Tekil matriste ValueError fırlatır.
+    """
+    n = matrix.shape[0]
+    aug = np.concatenate([matrix.astype(np.uint8), np.eye(n, dtype=np.uint8)], axis=1)
+
+    for col in range(n):
+        candidates = np.nonzero(aug[col:, col])[0]
+        if len(candidates) == 0:
+            raise ValueError("GF(256) matrisi tekil, terslenemez")
+        pivot = col + int(candidates[0])
+        if pivot != col:
+            aug[[col, pivot]] = aug[[pivot, col]]
+
+        # Pivot satırını normalize et ve diğer satırlardan sil
+        aug[col] = GF_MUL[GF_INV[aug[col, col]]][aug[col]]
+        factors = aug[:, col].copy()
+        factors[col] = 0
+        aug ^= GF_MUL[factors[:, None], aug[col][None, :]]
+
+    return aug[:, n:].copy()
@@ -0,0 +1,207 @@
+# loss_model.py - GILBERT-ELLIOTT KAYIP MODELİ VE FEC ŞEKLİ SEÇİMİ
+"""
+İki durumlu Gilbert-Elliott kayıp modeli: G (iyi, paket ulaşır) ve B (kötü,
+paket kaybolur) durumları arasında Markov geçişleri.
+    p = P(G -> B)    (kayıp patlaması başlama olasılığı)
+    r = P(B -> G)    (ortalama patlama uzunluğu 1 / r)
+    kayıp oranı = p / (p + r)
+Parametreler paket başına alındı/kayıp dizilerindeki (transport feedback)
+geçiş sayımlarından, unutma faktörüyle kestirilir.
+
+Aynı %5 kayıp rastgele (r ~ 1) ya da patlamalı (r küçük) olabilir; ilkinde geniş
+grup + az parity, ikincisinde patlamayı gruplara dağıtan interleave derinliği
+gerekir. select_fec_shape model altında grup boyutu, parity sayısı ve interleave
+derinliğini kurtarma gecikmesi bütçesi içinde birlikte seçer.
+"""
+import time
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+GROUP_SIZE_CANDIDATES = (4, 6, 8, 10, 12, 16, 20, 24, 32)
+INTERLEAVE_DEPTH_CANDIDATES = (1, 2, 3, 4, 6, 8)
+
+
+class GilbertElliottModel:
+    """Paket alım dizilerinden çevrimiçi Gilbert-Elliott parametre kestirimi"""
+
+    FORGET_FACTOR = 0.999        # Paket başına unutma (~1000 paketlik bellek)
+    MIN_OBSERVATIONS = 500       # Model güvenilir sayılmadan önce gereken paket sayısı
+
+    def __init__(self):
+        # Geçiş sayımları: [önceki durum][sonraki durum], 0 = G, 1 = B
+        self._transitions = np.zeros((2, 2))
+        self._last_state: Optional[int] = None
+        self.observations = 0
+
+        # Paket hızı (paket/s), gözlem aralıklarından EMA
+        self.packet_rate: Optional[float] = None
+        self._last_update: Optional[float] = None
+
+    def update(self, received: List[bool], now: Optional[float] = None):
+        """Ardışık (transport SN sırasında) paketlerin alındı bilgisini ekler"""
+        if not received:
+            return
+        now = time.monotonic() if now is None else now
+        if self._last_update is not None and now > self._last_update:
+            rate = len(received) / (now - self._last_update)
+            self.packet_rate = rate if self.packet_rate is None else 0.8 * self.packet_rate + 0.2 * rate
+        self._last_update = now
+
+        states = np.fromiter((0 if ok else 1 for ok in received), dtype=np.intp, count=len(received))
+        if self._last_state is not None:
+            states = np.concatenate(([self._last_state], states))
+        counts = np.zeros((2, 2))
+        np.add.at(counts, (states[:-1], states[1:]), 1)
+
+        self._transitions = self._transitions * self.FORGET_FACTOR ** len(received) + counts
+        self._last_state = int(states[-1])
+        self.observations += len(received)
+
+    @property
+    def reliable(self) -> bool:
+        return self.observations >= self.MIN_OBSERVATIONS
+
+    @property
+    def p(self) -> float:
+        """P(G -> B)"""
+        good = self._transitions[0].sum()
+        return float(self._transitions[0, 1] / good) if good > 0 else 0.0
+
+    @property
+    def r(self) -> float:
+        """P(B -> G)"""
+        bad = self._transitions[1].sum()
+        return float(self._transitions[1, 0] / bad) if bad > 0 else 1.0
+
+    @property
+    def loss_rate(self) -> float:
+        p, r = self.p, self.r
+        return p / (p + r) if p + r > 0 else 0.0
+
+    @property
+    def mean_burst_length(self) -> float:
+        r = self.r
+        return 1.0 / r if r > 0 else float('inf')
+
+    def transition_matrix(self) -> np.ndarray:
+        p, r = self.p, self.r
+        return np.array([[1.0 - p, p], [r, 1.0 - r]])
+
+    def loss_count_distribution(self, length: int, stride: int = 1) -> List[np.ndarray]:
+        """
+        stride paket aralıklı length paketlik dizide kayıp sayısı dağılımları.
+        Dönüş: n = 1..length için P(n paketten j'si kayıp) vektörleri.
+        """
+        step = np.linalg.matrix_power(self.transition_matrix(), stride)
+        loss = self.loss_rate
+        # dist[s][j]: son paket s durumunda ve j kayıp olasılığı
+        dist_good = np.zeros(length + 1)
+        dist_bad = np.zeros(length + 1)
+        dist_good[0], dist_bad[1] = 1.0 - loss, loss
+        distributions = [dist_good + dist_bad]
+        for _ in range(length - 1):
+            next_good = dist_good * step[0, 0] + dist_bad * step[1, 0]
+            next_bad = np.zeros(length + 1)
+            next_bad[1:] = (dist_good * step[0, 1] + dist_bad * step[1, 1])[:-1]
+            dist_good, dist_bad = next_good, next_bad
+            distributions.append(dist_good + dist_bad)
+        return distributions
+
+    def get_stats(self) -> Dict:
+        return {
+            'p': round(self.p, 4),
+            'r': round(self.r, 4),
+            'loss_rate': round(self.loss_rate, 4),
+            'mean_burst': round(self.mean_burst_length, 2),
+            'observations': self.observations
+        }
+
+
+def _residual(distribution: np.ndarray, parity_count: int, length: int) -> float:
+    """Kayıp sayısı dağılımından, m'den fazla kayıpta kurtarılamayan paket oranı"""
+    return float((distribution[parity_count + 1:] * np.arange(parity_count + 1, len(distribution))).sum() / length)
+
+
+def residual_loss(model: GilbertElliottModel, group_size: int, parity_count: int, stride: int = 1) -> float:
+    """
+    MDS kod (RS) varsayımıyla FEC sonrası kalan kayıp oranı:
+    grup (k + m paket) m'den fazla paket kaybederse kayıplar kurtarılamaz.
+    """
+    length = group_size + parity_count
+    return _residual(model.loss_count_distribution(length, stride)[-1], parity_count, length)
+
+
+def _media_span(group_size: int, parity_count: int, interleave_depth: int) -> int:
+    """FEC paketleri medya SN uzayına girmiyorsa grubun SN aralığı yalnızca medyadır"""
+    return (group_size - 1) * interleave_depth
+
+
+def candidate_shapes(max_overhead: float = 0.5,
+                     max_span: int = 2040,
+                     max_group_size: int = 128,
+                     shape_span: Optional[Callable[[int, int, int], int]] = None) -> Iterator[Tuple[int, int, int]]:
+    """
+    select_fec_shape'in değerlendirdiği (grup boyutu, parity sayısı, interleave derinliği) üçlüleri.
+    shape_span(k, m, d): şeklin FEC maskesinde kapladığı SN aralığı (FecHandler.shape_span);
+    aralığı max_span'e ulaşan şekiller üretilmez.
+    """
+    span_of = shape_span or _media_span
+    for depth in INTERLEAVE_DEPTH_CANDIDATES:
+        for group_size in GROUP_SIZE_CANDIDATES:
+            if group_size > max_group_size:
+                continue
+            for parity in range(1, max(1, int(group_size * max_overhead)) + 1):
+                # Aralık parity sayısıyla büyür (ULPFEC'te matris içi FEC SN'leri)
+                if span_of(group_size, parity, depth) >= max_span:
+                    break
+                yield group_size, parity, depth
+
+
+def select_fec_shape(model: GilbertElliottModel,
+                     packet_rate: float,
+                     latency_budget_ms: float,
+                     target_residual_loss: float = 0.001,
+                     max_overhead: float = 0.5,
+                     max_span: int = 2040,
+                     max_group_size: int = 128,
+                     shape_span: Optional[Callable[[int, int, int], int]] = None) -> Tuple[int, int, int, float]:
+    """
+    Kurtarma gecikmesi bütçesi içinde en az ek yükle hedef kalan kaybı sağlayan
+    (grup boyutu, parity sayısı, interleave derinliği, kalan kayıp) dörtlüsü.
+    Hiçbir şekil hedefi tutturamazsa kalan kaybı en düşük olan seçilir.
+    Adaylar candidate_shapes ile sınırlanır (shape_span: FecHandler.shape_span).
+
+    Gecikme: derinlik d ile k paketlik bir grup k * d paket süresine yayılır;
+    son paketi kaybolan grubun kurtarılması bu kadar bekler.
+    """
+    packet_interval_ms = 1000.0 / max(packet_rate, 1.0)
+    max_length = max(GROUP_SIZE_CANDIDATES) + max(1, int(max(GROUP_SIZE_CANDIDATES) * max_overhead))
+    best_target, best_fallback = None, None
+    distributions: Dict[int, List[np.ndarray]] = {}
+    satisfied = set()
+
+    for group_size, parity, depth in candidate_shapes(max_overhead, max_span, max_group_size, shape_span):
+        if (group_size, depth) in satisfied:
+            continue    # Daha fazla parity yalnızca ek yükü artırır
+        latency = group_size * depth * packet_interval_ms
+        # En küçük ardışık grup bütçe aşılsa da her zaman adaydır
+        if latency > latency_budget_ms and (depth, group_size) != (1, GROUP_SIZE_CANDIDATES[0]):
+            continue
+        if depth not in distributions:
+            distributions[depth] = model.loss_count_distribution(max_length, depth)
+
+        length = group_size + parity
+        residual = _residual(distributions[depth][length - 1], parity, length)
+        shape = (group_size, parity, depth, residual)
+        if residual <= target_residual_loss:
+            key = (parity / group_size, latency)
+            if best_target is None or key < best_target[0]:
+                best_target = (key, shape)
+            satisfied.add((group_size, depth))
+            continue
+        key = (residual, parity / group_size, latency)
+        if best_fallback is None or key < best_fallback[0]:
+            best_fallback = (key, shape)
+
+    return (best_target or best_fallback)[1]
@@ -5,35 +5,98 @@ WebRTC yerine saf UDP kullanımı
 """
 import asyncio
 import socket
-import struct
 import time
 import argparse
 from typing import Optional, List
-import gi
-
-gi.require_version('Gst', '1.0')
-from gi.repository import Gst, GLib
 import threading
 from collections import deque
 
-from aiortc.rtp import RtpPacket
-from resilience import FecHandler as EnhancedFecHandler
+from rtp import RtpPacket
+from resilience import FecHandler as EnhancedFecHandler, FEC_PAYLOAD_TYPE, RED_PAYLOAD_TYPE
 from adaptive_controller import AdaptiveController as AdaptiveBitrateController
 from packet_buffer import PacketBuffer
-
-Gst.init(None)
+from frame_assembler import FrameAssembler
+from retransmission import RtxSender, unwrap_rtx
+from batch_io import BatchSocket, ReceiveBufferPool
+from bandwidth_estimator import DelayBasedBwe, TransportFeedbackGenerator
+from rate_controller import EncoderRateController, GopController
+from rtp import RtpHeaderView
+from rtcp import (iter_rtcp_packets, parse_feedback, build_generic_nack, parse_generic_nack,
+                  build_sender_report, build_receiver_report, build_sdes_cname, parse_sender_report,
+                  parse_receiver_report, parse_transport_feedback, parse_fir, round_trip_time,
+                  ReceptionStatistics, KeyframeRequester, RTCP_SR, RTCP_RR, RTCP_RTPFB, RTCP_PSFB,
+                  RTPFB_GENERIC_NACK, RTPFB_TRANSPORT_FEEDBACK, PSFB_PLI, PSFB_FIR)
+from config import (FEC_GROUP_SIZE, FEC_PROTECTION_LEVEL, FEC_ENABLE_RED, FEC_SCHEME, FEC_NATIVE_DECODER,
+                    FEC_HEADER_VERSION, FEC_RED_DISTANCE, FEC_RED_DEPTH, RTP_MTU,
+                    FEC_STREAMING, FEC_FLUSH_ON_MARKER, FEC_INTERLEAVE, FEC_INTERLEAVE_COLUMNS,
+                    FEC_INTERLEAVE_ROWS, FEC_INTERLEAVE_ROW_PARITY, FEC_NAL_AWARE, FEC_CRITICAL_PROTECTION_LEVEL,
+                    JITTER_BUFFER_MS, MIN_BUFFER_MS, MAX_BUFFER_MS, ADAPTIVE_JITTER_BUFFER, RECEIVER_JITTER_LATENCY_MS,
+                    RTP_PAYLOAD_TYPE, RTX_PAYLOAD_TYPE, NACK_ENABLED, RTX_HISTORY_SIZE, RTX_MAX_BITRATE,
+                    UDP_BATCH_IO, UDP_BATCH_SIZE, UDP_RECV_POOL_SIZE, RTCP_INTERVAL,
+                    DELAY_BWE_ENABLED, TRANSPORT_CC_EXTENSION_ID, TRANSPORT_FEEDBACK_INTERVAL,
+                    INITIAL_BITRATE, MIN_BITRATE, MAX_BITRATE, VIDEO_LADDER, LADDER_DOWN_HOLD_TIME,
+                    LADDER_UP_HOLD_TIME, LADDER_UP_HYSTERESIS, FEC_ADAPTIVE_SHAPE, FEC_RECOVERY_LATENCY_MS,
+                    FEC_TARGET_RESIDUAL_LOSS, KEYFRAME_REQUEST_METHOD, KEYFRAME_REQUEST_INTERVAL,
+                    KEYFRAME_MIN_INTERVAL, VIDEO_GOP_MODE, KEYFRAME_INTERVAL, ADAPTIVE_GOP_MIN_INTERVAL,
+                    ADAPTIVE_GOP_MAX_INTERVAL)
+
+# GStreamer yalnızca bir medya pipeline'ı oluşturulduğunda yüklenir (hızlı CLI başlangıcı)
+Gst = GLib = None
+
+
+def _load_gstreamer():
+    """gi/Gst modüllerini ilk kullanımda yükler ve Gst.init'i bir kez çağırır"""
+    global Gst, GLib
+    if Gst is None:
+        import gi
+        gi.require_version('Gst', '1.0')
+        from gi.repository import Gst as _Gst, GLib as _GLib
+        _Gst.init(None)
+        Gst, GLib = _Gst, _GLib
+    return Gst, GLib
+
+
+class _DatagramHandler(asyncio.DatagramProtocol):
+    """Datagram olaylarını UdpRtpTransport'a ileten protokol"""
+
+    def __init__(self, on_datagram, name: str):
+        self.on_datagram = on_datagram
+        self.name = name
+
+    def datagram_received(self, data: bytes, addr):
+        self.on_datagram(data, addr)
+
+    def error_received(self, exc: Exception):
+        # ICMP port unreachable vb. - karşı taraf henüz dinlemiyor olabilir
+        if not isinstance(exc, ConnectionRefusedError):
+            print(f"[Transport] {self.name} Error: {exc}")
 
 
 class UdpRtpTransport:
-    def __init__(self, local_port: int = 5000):
+    """
+    asyncio datagram endpoint'leri üzerinde RTP/RTCP taşıma.
+    Gelen paketler polling olmadan doğrudan callback'lere iletilir.
+    batch_io modunda RTP soketi recvmmsg/sendmmsg ile toplu okunur/yazılır;
+    datagramlar önceden ayrılmış buffer halkasına kopyasız okunur; görünümler yalnızca
+    callback süresince geçerlidir.
+    """
+
+    def __init__(self, local_port: int = 5000, batch_io: bool = False, batch_size: int = 64,
+                 pool_size: int = 128):
         self.local_port = local_port
         self.remote_addr = None
-        self.loop = asyncio.get_event_loop()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.rtp_transport: Optional[asyncio.DatagramTransport] = None
+        self.rtcp_transport: Optional[asyncio.DatagramTransport] = None
+        self._on_rtp = None
+        self._on_rtcp = None
 
         self.rtp_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
         self.rtp_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
         self.rtp_socket.bind(('0.0.0.0', local_port))
         self.rtp_socket.setblocking(False)
+        self.rtp_batch = BatchSocket(self.rtp_socket, batch_size=batch_size,
+                                     pool=ReceiveBufferPool(pool_size)) if batch_io else None
 
         self.rtcp_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
         self.rtcp_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
@@ -43,80 +106,126 @@ class UdpRtpTransport:
         self.stats = {'packets_sent': 0, 'packets_received': 0, 'bytes_sent': 0, 'bytes_received': 0, 'last_rtt': 0,
                       'last_loss_rate': 0}
 
+    async def start(self, on_rtp=None, on_rtcp=None):
+        """
+        Datagram endpoint'lerini açar.
+        on_rtp(data): her RTP paketi için, on_rtcp(data): her RTCP paketi için çağrılır
+        """
+        loop = self._loop = asyncio.get_running_loop()
+        self._on_rtp, self._on_rtcp = on_rtp, on_rtcp
+        if self.rtp_batch:
+            # Soket okunabilir olduğunda alım kuyruğu tek çağrıyla boşaltılır
+            loop.add_reader(self.rtp_socket.fileno(), self._drain_rtp)
+        else:
+            self.rtp_transport, _ = await loop.create_datagram_endpoint(
+                lambda: _DatagramHandler(self._rtp_received, 'RTP'), sock=self.rtp_socket)
+        self.rtcp_transport, _ = await loop.create_datagram_endpoint(
+            lambda: _DatagramHandler(self._rtcp_received, 'RTCP'), sock=self.rtcp_socket)
+
     def set_remote(self, host: str, port: int):
         self.remote_addr = (host, port)
         print(f"[Transport] Uzak sunucu ayarlandı: {host}:{port}")
 
-    async def send_rtp(self, data: bytes):
-        if self.remote_addr:
-            try:
-                await self.loop.sock_sendto(self.rtp_socket, data, self.remote_addr)
-                self.stats['packets_sent'] += 1
-                self.stats['bytes_sent'] += len(data)
-            except Exception as e:
-                print(f"[Transport] Send RTP Error: {e}")
+    def send_rtp(self, data: bytes):
+        self.send_rtp_batch([data])
+
+    def send_rtp_batch(self, packets: List[bytes]):
+        """Paketleri (örn. medya + parity grubu) mümkünse tek sistem çağrısıyla gönderir"""
+        if not self.remote_addr or not packets:
+            return
+        if self.rtp_batch:
+            sent = self.rtp_batch.send_many(packets, self.remote_addr)
+        elif self.rtp_transport:
+            for data in packets:
+                self.rtp_transport.sendto(data, self.remote_addr)
+            sent = len(packets)
+        else:
+            return
+        self.stats['packets_sent'] += sent
+        self.stats['bytes_sent'] += sum(len(data) for data in packets[:sent])
 
-    async def receive_rtp(self) -> Optional[bytes]:
+    def _drain_rtp(self):
         try:
-            data, addr = await self.loop.sock_recvfrom(self.rtp_socket, 2048)
-            if not self.remote_addr:
-                self.remote_addr = addr
-                print(f"[Transport] Uzak adres öğrenildi: {addr}")
-            self.stats['packets_received'] += 1
-            self.stats['bytes_received'] += len(data)
-            return data
-        except (BlockingIOError, ConnectionRefusedError):
-            return None
-        except Exception as e:
+            datagrams = self.rtp_batch.recv_many()
+        except OSError as e:
             print(f"[Transport] Receive RTP Error: {e}")
-            return None
+            return
+        for data, addr in datagrams:
+            self._rtp_received(data, addr)
+
+    def _rtp_received(self, data: bytes, addr):
+        if not self.remote_addr:
+            self.remote_addr = addr
+            print(f"[Transport] Uzak adres öğrenildi: {addr}")
+        self.stats['packets_received'] += 1
+        self.stats['bytes_received'] += len(data)
+        if self._on_rtp:
+            try:
+                self._on_rtp(data)
+            except Exception as e:
+                print(f"[Transport] Receive RTP Error: {e}")
 
-    async def send_rtcp(self, data: bytes):
-        if self.remote_addr:
+    def send_rtcp(self, data: bytes):
+        if self.remote_addr and self.rtcp_transport:
             rtcp_addr = (self.remote_addr[0], self.remote_addr[1] + 1)
+            self.rtcp_transport.sendto(data, rtcp_addr)
+
+    def _rtcp_received(self, data: bytes, addr):
+        if self._on_rtcp:
             try:
-                await self.loop.sock_sendto(self.rtcp_socket, data, rtcp_addr)
+                self._on_rtcp(data)
             except Exception as e:
-                print(f"[Transport] Send RTCP Error: {e}")
-
-    async def receive_rtcp(self) -> Optional[bytes]:
-        try:
-            data, _ = await self.loop.sock_recvfrom(self.rtcp_socket, 2048)
-            self._parse_rtcp(data)
-            return data
-        except (BlockingIOError, ConnectionRefusedError):
-            return None
-        except Exception as e:
-            print(f"[Transport] Receive RTCP Error: {e}")
-            return None
-
-    def _parse_rtcp(self, data: bytes):
-        if len(data) < 8: return
-        pt = data[1]
-        if pt == 201 and len(data) >= 24:
-            self.stats['last_loss_rate'] = data[12] / 256.0
+                print(f"[Transport] Receive RTCP Error: {e}")
 
     def close(self):
+        if self.rtp_batch and self._loop:
+            self._loop.remove_reader(self.rtp_socket.fileno())
+        for transport in (self.rtp_transport, self.rtcp_transport):
+            if transport: transport.close()
         self.rtp_socket.close()
         self.rtcp_socket.close()
 
 
 class GStreamerMediaPipeline:
-    def __init__(self, mode: str):
+    def __init__(self, mode: str, gop_mode: str = 'fixed', keyframe_interval: int = 30,
+                 fallback_keyframe_s: Optional[float] = None):
+        """
+        gop_mode: 'fixed' (periyodik IDR), 'intra-refresh' (intra kodlama frame'lere yayılır)
+                  veya 'adaptive' (encoder IDR'ı yalnızca yedek; keyframe'ler engine tarafından zorlanır)
+        keyframe_interval: x264enc key-int-max (intra refresh'te refresh periyodu), frame cinsinden
+        fallback_keyframe_s: adaptive modda encoder'ın yedek IDR aralığı (s); key-int-max güncel
+                             kare hızından türetilir ve kare hızı değiştikçe yeniden hesaplanır
+        """
+        if gop_mode not in ('fixed', 'intra-refresh', 'adaptive'):
+            raise ValueError(f"Bilinmeyen GOP modu: {gop_mode}")
+        _load_gstreamer()
         self.mode = mode
+        self.gop_mode = gop_mode
+        self.keyframe_interval = keyframe_interval
+        self.fallback_keyframe_s = fallback_keyframe_s
+        self.framerate = 30
         self.pipeline = None
         self.appsrc = None
         self.loop = GLib.MainLoop()
         self.thread = threading.Thread(target=self.loop.run, daemon=True)
         self.current_bitrate = 2500000
         self.packet_queue = deque(maxlen=1000)
+        # appsink -> asyncio uyandırma: her wakeup'ta kuyruk tamamen boşaltılır
+        self._event_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._packet_callback = None
+        self._wakeup_pending = False
 
     def start_sender(self, video_source: str = "/dev/video0"):
+        gop_options = f"key-int-max={self._key_int_max()}"
+        if self.gop_mode == 'intra-refresh':
+            # Büyük IDR yerine her frame'de bir intra sütun: bitrate düzgün, keyframe patlaması yok
+            gop_options += " intra-refresh=true"
         pipeline_str = f"""
             v4l2src device={video_source} !
-            videoconvert ! video/x-raw,format=I420,width=640,height=480,framerate=30/1 !
-            x264enc name=x264enc tune=zerolatency speed-preset=ultrafast bitrate={self.current_bitrate // 1000} key-int-max=30 !
-            rtph264pay config-interval=1 mtu=1400 pt=96 !
+            videoconvert ! video/x-raw,format=I420,width=640,height=480,framerate={self.framerate}/1 !
+            videoscale ! videorate ! capsfilter name=videocaps caps=video/x-raw,width=640,height=480,framerate={self.framerate}/1 !
+            x264enc name=x264enc tune=zerolatency speed-preset=ultrafast bitrate={self.current_bitrate // 1000} {gop_options} !
+            rtph264pay config-interval=1 mtu={RTP_MTU} pt=96 !
             appsink name=appsink emit-signals=true sync=false max-buffers=1 drop=true
         """
         self.pipeline = Gst.parse_launch(pipeline_str)
@@ -125,30 +234,79 @@ class GStreamerMediaPipeline:
         self.thread.start()
         print(f"[GStreamer] Gönderici pipeline'ı başlatıldı (bitrate: {self.current_bitrate})")
 
-    def start_receiver(self):
-        pipeline_str = """
+    @staticmethod
+    def receiver_rtp_stage(native_fec: bool = False, recovery_window_ms: int = 200) -> str:
+        """
+        Alıcı pipeline'ında depayloader'dan önceki RTP aşaması.
+        rtpulpfecdec yalnızca yukarısındaki rtpjitterbuffer'ın (do-lost=true) kayıp olaylarında
+        kurtarma yapar; gereken medya/FEC paketlerini rtpstorage tutar (size-time=0 hiçbir şey tutmaz).
+        Storage, kayıp olayı jitter buffer gecikmesi kadar sonra geldiği için bu süreyi de kapsar.
+        """
+        if not native_fec:
+            return f"rtpjitterbuffer latency={RECEIVER_JITTER_LATENCY_MS} !"
+        storage_ns = (recovery_window_ms + RECEIVER_JITTER_LATENCY_MS) * 1_000_000
+        return (f"rtpstorage name=storage size-time={storage_ns} ! "
+                f"rtpjitterbuffer do-lost=true latency={RECEIVER_JITTER_LATENCY_MS} ! "
+                f"rtpulpfecdec name=fecdec pt={FEC_PAYLOAD_TYPE} !")
+
+    def start_receiver(self, native_fec: bool = False, recovery_window_ms: int = 200):
+        # native_fec: ULPFEC paketleri de appsrc'ye verilir, kurtarmayı rtpulpfecdec yapar
+        rtp_stage = self.receiver_rtp_stage(native_fec, recovery_window_ms)
+        pipeline_str = f"""
             appsrc name=appsrc format=time is-live=true do-timestamp=true caps=application/x-rtp,media=video,clock-rate=90000,encoding-name=H264,payload=96 !
-            rtpjitterbuffer latency=100 ! rtph264depay ! avdec_h264 ! videoconvert ! autovideosink sync=false
+            {rtp_stage} rtph264depay ! avdec_h264 ! videoconvert ! autovideosink sync=false
         """
         self.pipeline = Gst.parse_launch(pipeline_str)
         self.appsrc = self.pipeline.get_by_name('appsrc')
+        if native_fec:
+            storage = self.pipeline.get_by_name('storage')
+            self.pipeline.get_by_name('fecdec').set_property('storage', storage.get_property('internal-storage'))
         self.pipeline.set_state(Gst.State.PLAYING)
         self.thread.start()
         print("[GStreamer] Alıcı pipeline'ı başlatıldı")
 
+    def get_fec_unrecovered(self) -> int:
+        """native_fec modunda rtpulpfecdec'in kurtaramadığı toplam paket sayısı"""
+        fecdec = self.pipeline.get_by_name('fecdec') if self.pipeline else None
+        return fecdec.get_property('unrecovered') if fecdec else 0
+
     def push_rtp_packet(self, data: bytes):
         if self.appsrc:
             self.appsrc.emit('push-buffer', Gst.Buffer.new_wrapped(data))
 
+    def push_rtp_frame(self, packets: List[bytes]):
+        """Bir frame'in tüm paketlerini tek sinyal çağrısıyla (Gst.BufferList) iletir"""
+        if self.appsrc:
+            buffer_list = Gst.BufferList.new_sized(len(packets))
+            for data in packets:
+                buffer_list.insert(-1, Gst.Buffer.new_wrapped(data))
+            self.appsrc.emit('push-buffer-list', buffer_list)
+
     def _on_new_sample(self, appsink):
         sample = appsink.emit('pull-sample')
         if sample:
             self.packet_queue.append(sample.get_buffer().extract_dup(0, sample.get_buffer().get_size()))
+            # GStreamer thread'inden asyncio döngüsünü uyandır (bekleyen uyandırma varsa tekrar planlama)
+            if self._packet_callback and not self._wakeup_pending:
+                self._wakeup_pending = True
+                self._event_loop.call_soon_threadsafe(self._packet_callback)
         return Gst.FlowReturn.OK
 
+    def set_packet_callback(self, loop: asyncio.AbstractEventLoop, callback):
+        """appsink'e yeni paket geldiğinde callback'i asyncio döngüsünde çağırır"""
+        self._event_loop, self._packet_callback = loop, callback
+
     def get_packet(self) -> Optional[bytes]:
         return self.packet_queue.popleft() if self.packet_queue else None
 
+    def get_packets(self) -> List[bytes]:
+        """Kuyruktaki tüm paketleri döndürür; sonraki paket yeni bir uyandırma planlar"""
+        self._wakeup_pending = False
+        packets = []
+        while self.packet_queue:
+            packets.append(self.packet_queue.popleft())
+        return packets
+
     def update_bitrate(self, bitrate: int):
         if self.mode == 'sender' and self.pipeline:
             encoder = self.pipeline.get_by_name('x264enc')
@@ -157,6 +315,38 @@ class GStreamerMediaPipeline:
                 self.current_bitrate = bitrate
                 print(f"[GStreamer] Bitrate güncellendi: {bitrate / 1000000:.2f} Mbps")
 
+    def force_keyframe(self):
+        """
+        x264enc'e force-key-unit event'i gönderir: bir sonraki frame SPS/PPS'li IDR olur
+        (intra-refresh=true iken x264enc IDR yerine yeni bir refresh dalgası başlatır)
+        """
+        if self.mode == 'sender' and self.pipeline:
+            encoder = self.pipeline.get_by_name('x264enc')
+            if encoder:
+                structure = Gst.Structure.new_from_string("GstForceKeyUnit, all-headers=(boolean)true")
+                event = Gst.Event.new_custom(Gst.EventType.CUSTOM_DOWNSTREAM, structure)
+                GLib.idle_add(encoder.get_static_pad('sink').send_event, event)
+
+    def _key_int_max(self) -> int:
+        """x264enc key-int-max: adaptive modda yedek IDR aralığı güncel kare hızıyla frame'e çevrilir"""
+        if self.gop_mode == 'adaptive' and self.fallback_keyframe_s:
+            return max(1, int(self.fallback_keyframe_s * self.framerate))
+        return self.keyframe_interval
+
+    def update_video_format(self, width: int, height: int, framerate: int):
+        """Encoder girişinin çözünürlük/kare hızını değiştirir (videoscale/videorate yeniden anlaşır)"""
+        if self.mode == 'sender' and self.pipeline:
+            capsfilter = self.pipeline.get_by_name('videocaps')
+            if capsfilter:
+                caps = Gst.Caps.from_string(f"video/x-raw,width={width},height={height},framerate={framerate}/1")
+                GLib.idle_add(capsfilter.set_property, 'caps', caps)
+                print(f"[GStreamer] Video formatı güncellendi: {width}x{height}@{framerate}")
+            previous, self.framerate = self._key_int_max(), framerate
+            encoder = self.pipeline.get_by_name('x264enc')
+            if encoder and self._key_int_max() != previous:
+                # Yedek IDR aralığı saniye cinsinden sabit kalır
+                GLib.idle_add(encoder.set_property, 'key-int-max', self._key_int_max())
+
     def stop(self):
         if self.pipeline: self.pipeline.set_state(Gst.State.NULL)
         if self.loop.is_running(): self.loop.quit()
@@ -166,89 +356,392 @@ class RtpMediaEngine:
     def __init__(self, mode: str, local_port: int = 5000):
         self.mode = mode
         self.running = False
-        self.transport = UdpRtpTransport(local_port)
-        self.fec_handler = EnhancedFecHandler(group_size=10, protection_level=0.3, enable_red=True)
-        self.abr_controller = AdaptiveBitrateController(fec_handler=self.fec_handler)
-        self.packet_buffer = PacketBuffer(target_delay_ms=100, max_delay_ms=500)
-        self.media_pipeline = GStreamerMediaPipeline(mode)
+        self.transport = UdpRtpTransport(local_port, batch_io=UDP_BATCH_IO, batch_size=UDP_BATCH_SIZE,
+                                         pool_size=UDP_RECV_POOL_SIZE)
+        self.fec_handler = EnhancedFecHandler(group_size=FEC_GROUP_SIZE, protection_level=FEC_PROTECTION_LEVEL,
+                                              enable_red=FEC_ENABLE_RED,
+                                              streaming=FEC_STREAMING, flush_on_marker=FEC_FLUSH_ON_MARKER,
+                                              interleave=(FEC_INTERLEAVE_COLUMNS, FEC_INTERLEAVE_ROWS)
+                                              if FEC_INTERLEAVE else None,
+                                              row_parity=FEC_INTERLEAVE_ROW_PARITY, fec_scheme=FEC_SCHEME,
+                                              header_version=FEC_HEADER_VERSION,
+                                              red_distance=FEC_RED_DISTANCE, red_depth=FEC_RED_DEPTH,
+                                              red_mtu=RTP_MTU,
+                                              nal_aware=FEC_NAL_AWARE,
+                                              critical_protection_level=FEC_CRITICAL_PROTECTION_LEVEL)
+        self.abr_controller = AdaptiveBitrateController(fec_handler=self.fec_handler, initial_bitrate=INITIAL_BITRATE,
+                                                        min_bitrate=MIN_BITRATE, max_bitrate=MAX_BITRATE,
+                                                        adaptive_fec_shape=FEC_ADAPTIVE_SHAPE,
+                                                        recovery_latency_ms=FEC_RECOVERY_LATENCY_MS,
+                                                        target_residual_loss=FEC_TARGET_RESIDUAL_LOSS)
+        self.packet_buffer = PacketBuffer(
+            target_delay_ms=JITTER_BUFFER_MS,
+            max_delay_ms=MAX_BUFFER_MS,
+            min_delay_ms=MIN_BUFFER_MS,
+            adaptive=ADAPTIVE_JITTER_BUFFER,
+            nack_requires_confirmation=self.fec_handler.shares_sequence_space
+        )
+        self.native_fec = FEC_NATIVE_DECODER and FEC_SCHEME == 'ulpfec'
+        # GStreamer içi FEC çözücüde boşluklar sonradan kurtarılabilir: frame atlanmaz
+        self.frame_assembler = FrameAssembler(fec_payload_type=FEC_PAYLOAD_TYPE, forward_fec=self.native_fec,
+                                              skip_undecodable=not self.native_fec)
+        # Uyarlamalı GOP'ta encoder'ın kendi IDR'ı yalnızca yedektir (en uzun aralığın iki katı)
+        self.media_pipeline = GStreamerMediaPipeline(mode, VIDEO_GOP_MODE, KEYFRAME_INTERVAL,
+                                                     fallback_keyframe_s=ADAPTIVE_GOP_MAX_INTERVAL * 2)
+        self.gop_controller = (GopController(ADAPTIVE_GOP_MIN_INTERVAL, ADAPTIVE_GOP_MAX_INTERVAL)
+                               if VIDEO_GOP_MODE == 'adaptive' and mode == 'sender' else None)
+        # Ağ hedefi (medya + FEC/RED) -> encoder bitrate'i ve çözünürlük/kare hızı basamağı
+        self.rate_controller = EncoderRateController(self.media_pipeline, ladder=VIDEO_LADDER,
+                                                     down_hold_time=LADDER_DOWN_HOLD_TIME,
+                                                     up_hold_time=LADDER_UP_HOLD_TIME,
+                                                     up_hysteresis=LADDER_UP_HYSTERESIS,
+                                                     initial_overhead=self.fec_handler.protection_level)
         self.ssrc = int(time.time()) & 0xFFFFFFFF
+        self.remote_ssrc: Optional[int] = None
+        self.cname = f"engine-{self.ssrc:08x}@{socket.gethostname()}"
+        # RTCP: alıcıda kaynak istatistikleri, göndericide son alım raporu (aralık kaybı için)
+        self.reception = ReceptionStatistics()
+        self._last_report_block = None
+        # Kurtarılamayan kayıpta keyframe isteği (alıcı) / zorlanmış keyframe (gönderici)
+        self.keyframe_requester = KeyframeRequester(KEYFRAME_REQUEST_METHOD, KEYFRAME_REQUEST_INTERVAL)
+        self.keyframe_stats = {'requests_received': 0, 'keyframes_forced': 0}
+        self._last_forced_keyframe: Optional[float] = None
+        self._last_fir_seq: Optional[int] = None
+        self._native_unrecovered = 0
+        self.nack_enabled = NACK_ENABLED
+        self.rtx_sender = RtxSender(capacity=RTX_HISTORY_SIZE, rtx_payload_type=RTX_PAYLOAD_TYPE,
+                                    rtx_ssrc=(self.ssrc + 1) & 0xFFFFFFFF, max_bitrate=RTX_MAX_BITRATE)
+        # Gecikme tabanlı BWE: göndericide tahminci, alıcıda varış zamanı feedback'i
+        self.delay_bwe = DelayBasedBwe(self.abr_controller.current_bitrate, self.abr_controller.min_bitrate,
+                                       self.abr_controller.max_bitrate) if DELAY_BWE_ENABLED else None
+        self.feedback_generator = TransportFeedbackGenerator() if DELAY_BWE_ENABLED else None
+        self.transport_seq = 0
         self.send_seq, self.send_timestamp = 0, 0
+        self._send_timestamp_wallclock: Optional[float] = None   # send_timestamp'in ilk gönderildiği an
+        self.sr_packet_count, self.sr_octet_count = 0, 0
+        self._source_ts_base: Optional[int] = None
+        self._packet_event = asyncio.Event()
         self.last_stats_time, self.last_rtcp_time = time.time(), time.time()
+        self._playout_event = asyncio.Event()
+        self._next_wakeup: Optional[float] = None
 
     async def start_sender(self, remote_host: str, remote_port: int, video_source: str = "/dev/video0"):
         self.transport.set_remote(remote_host, remote_port)
+        self.media_pipeline.set_packet_callback(asyncio.get_running_loop(), self._packet_event.set)
         self.media_pipeline.start_sender(video_source)
+        # Başlangıç bitrate'i de FEC/RED ek yükü düşülerek encoder'a verilir
+        self._apply_target_bitrate()
         self.running = True
+        await self.transport.start(on_rtcp=self._handle_rtcp)
         print(f"[Engine] Gönderici başlatılıyor -> {remote_host}:{remote_port}")
         await asyncio.gather(self._sender_loop(), self._rtcp_loop(), self._stats_loop())
 
     async def start_receiver(self):
-        self.media_pipeline.start_receiver()
+        self.media_pipeline.start_receiver(native_fec=self.native_fec,
+                                          recovery_window_ms=int(self.fec_handler.recovery_window * 1000))
         self.running = True
+        # RTP/RTCP olay güdümlü: paketler datagram callback'lerinde işlenir
+        await self.transport.start(on_rtp=self._on_rtp_packet, on_rtcp=self._handle_rtcp)
         print(f"[Engine] Alıcı başlatılıyor, port: {self.transport.local_port}")
-        await asyncio.gather(self._receiver_loop(), self._rtcp_loop(), self._playback_loop(), self._stats_loop())
+        await asyncio.gather(self._rtcp_loop(), self._feedback_loop(), self._playback_loop(), self._stats_loop())
 
     async def _sender_loop(self):
+        """
+        Olay güdümlü gönderim: appsink callback'i döngüyü uyandırır,
+        her uyandırmada bekleyen tüm paketler gönderilir (boşta CPU kullanımı yok).
+        """
         while self.running:
-            raw_packet = self.media_pipeline.get_packet()
-            if raw_packet:
-                packet = RtpPacket.parse(raw_packet)
-                packet.sequence_number, packet.timestamp, packet.ssrc = self.send_seq, self.send_timestamp, self.ssrc
-                protected_packets = self.fec_handler.protect(packet)
-                await asyncio.gather(*(self.transport.send_rtp(pkt.serialize()) for pkt in protected_packets))
-                self.send_seq = (self.send_seq + 1) & 0xFFFF
-                self.send_timestamp += 3000
-            await asyncio.sleep(0.005)
-
-    async def _receiver_loop(self):
-        receive_buffer_raw: List[bytes] = []
-        last_buffer_time = time.time()
+            await self._packet_event.wait()
+            self._packet_event.clear()
+            if self.gop_controller and self.gop_controller.poll():
+                self._force_keyframe()
+            outgoing = []
+            for raw_packet in self.media_pipeline.get_packets():
+                outgoing.extend(self._protect_media_packet(raw_packet))
+            # Uyandırma başına tüm medya + parity paketleri tek toplu gönderim
+            self.transport.send_rtp_batch(outgoing)
+
+    def _protect_media_packet(self, raw_packet: bytes) -> List[bytes]:
+        packet = RtpPacket.parse(raw_packet)
+        # Payloader'ın frame timestamp'leri korunur (aynı frame'in paketleri aynı timestamp'i taşır)
+        if self._source_ts_base is None:
+            self._source_ts_base = packet.timestamp
+        timestamp = (packet.timestamp - self._source_ts_base) & 0xFFFFFFFF
+        if timestamp != self.send_timestamp or self._send_timestamp_wallclock is None:
+            self.send_timestamp, self._send_timestamp_wallclock = timestamp, time.time()
+        packet.sequence_number, packet.timestamp, packet.ssrc = self.send_seq, self.send_timestamp, self.ssrc
+        transport_seqs = []
+        if self.delay_bwe:
+            # Extension FEC'ten önce eklenir: ULPFEC extension'ı da korur, alıcıda byte'lar aynı
+            transport_seqs.append(self._set_transport_seq(packet))
+        protected_packets = self.fec_handler.protect(packet)
+        if self.delay_bwe:
+            transport_seqs.extend(self._set_transport_seq(pkt) for pkt in protected_packets[1:])
+        serialized = [pkt.serialize() for pkt in protected_packets]
+        self.rate_controller.on_packets_sent(len(serialized[0]), sum(len(data) for data in serialized[1:]))
+        if self.delay_bwe:
+            now = time.monotonic()
+            for transport_seq, data in zip(transport_seqs, serialized):
+                self.delay_bwe.on_packet_sent(transport_seq, len(data), now)
+        if self.nack_enabled:
+            # İlk paket medya paketinin kendisi; NACK'lere RTX ile cevap için saklanır
+            self.rtx_sender.store(packet.sequence_number, serialized[0])
+        # SR sayaçları yalnızca orijinal medyayı sayar (FEC/RED/RTX hariç, RFC 3550: payload byte'ı)
+        self.sr_packet_count += 1
+        self.sr_octet_count += len(packet.payload)
+        self.send_seq = (self.send_seq + 1) & 0xFFFF
+        if self.fec_handler.shares_sequence_space:
+            # ULPFEC paketleri medya SN uzayında yer kaplar
+            fec_count = sum(1 for pkt in protected_packets if pkt.payload_type == FEC_PAYLOAD_TYPE)
+            self.send_seq = (self.send_seq + fec_count) & 0xFFFF
+        return serialized
+
+    def _set_transport_seq(self, packet: RtpPacket) -> int:
+        """Giden pakete transport-wide SN extension'ı ekler (medya, RED ve FEC ortak sayaç)"""
+        transport_seq = self.transport_seq
+        packet.set_extension(TRANSPORT_CC_EXTENSION_ID, transport_seq.to_bytes(2, 'big'))
+        self.transport_seq = (transport_seq + 1) & 0xFFFF
+        return transport_seq
+
+    def _on_rtp_packet(self, data):
+        """
+        Datagram callback'i: gelen RTP paketini FEC çözücü ve jitter buffer'a iletir.
+        Datagram havuz buffer'ı üzerinde ayrıştırılır; saklanan medya paketleri tek kopyayla
+        buffer'dan ayrılır (yeniden serialize yok).
+        """
+        packet = RtpHeaderView.parse(data)
+        if packet is None or len(packet.payload) == 0:
+            return
+        retransmitted = packet.payload_type == RTX_PAYLOAD_TYPE
+        if retransmitted:
+            if self.remote_ssrc is None: return
+            packet = unwrap_rtx(RtpPacket.parse(packet.serialize()), RTP_PAYLOAD_TYPE, self.remote_ssrc)
+            if packet is None: return
+        else:
+            self.remote_ssrc = packet.ssrc
+            if self.feedback_generator:
+                # RTX paketleri orijinalin extension'ını taşır: varış zamanı yalnızca ilk iletimden alınır
+                transport_seq = packet.get_extension(TRANSPORT_CC_EXTENSION_ID)
+                if transport_seq is not None and len(transport_seq) == 2:
+                    self.feedback_generator.on_packet(int.from_bytes(transport_seq, 'big'))
+            if packet.payload_type == RTP_PAYLOAD_TYPE or (
+                    self.fec_handler.shares_sequence_space and packet.payload_type == FEC_PAYLOAD_TYPE):
+                # Alım raporu orijinal akışın SN uzayını sayar (RTX/RED kopyaları hariç)
+                self.reception.update(packet.ssrc, packet.sequence_number)
+            if packet.payload_type in (FEC_PAYLOAD_TYPE, RED_PAYLOAD_TYPE):
+                # FEC/RED çözücü tam paket nesnesiyle çalışır (akışın küçük bir kısmı)
+                packet = RtpPacket.parse(packet.serialize())
+        if isinstance(packet, RtpHeaderView):
+            # Havuz buffer'ı sonraki alımda yeniden kullanılır: saklanacak paket kopyalanır
+            packet = packet.detach()
+        if self.native_fec:
+            # Kurtarma GStreamer'daki rtpulpfecdec'te yapılır. RED primary ile aynı SN'i taşır:
+            # açılmazsa kayıp primary'nin slotunu alır ve depayloader RED header'ını NAL sanar
+            if packet.payload_type == RED_PAYLOAD_TYPE:
+                for p in self.fec_handler.unwrap_red(packet, self.packet_buffer):
+                    self._buffer_packet(p)
+            else:
+                self._buffer_packet(packet, retransmitted)
+        else:
+            # Kalıcı FEC çözücü: paket geldiği anda işlenir, grup çözülebilir olunca kurtarılır
+            for p in self.fec_handler.receive(packet):
+                self._buffer_packet(p, retransmitted and p.sequence_number == packet.sequence_number)
+            if self.fec_handler.shares_sequence_space and packet.payload_type == FEC_PAYLOAD_TYPE:
+                # ULPFEC SN'leri jitter buffer'da boşluk gibi görünmesin; oynatmada atlanır
+                self._buffer_packet(packet)
+        if self.fec_handler.shares_sequence_space and packet.payload_type == FEC_PAYLOAD_TYPE:
+            # Boşluklar kayıp FEC paketi de olabilir: yalnızca FEC maskesindeki SN'ler medyadır
+            self.packet_buffer.confirm_media(self.fec_handler.protected_sequence_numbers(packet))
+        self._send_nacks()
+
+    def _send_nacks(self):
+        """Jitter buffer'ın tespit ettiği boşluklar için generic NACK gönderir"""
+        if not self.nack_enabled or self.remote_ssrc is None:
+            return
+        seqs = self.packet_buffer.get_nack_list(rtt_ms=self.transport.stats['last_rtt'] or None)
+        if seqs:
+            self.transport.send_rtcp(build_generic_nack(self.ssrc, self.remote_ssrc, seqs))
+
+    async def _feedback_loop(self):
+        """Alıcı: son feedback'ten bu yana gelen paketlerin varış zamanlarını bildirir"""
         while self.running:
-            data = await self.transport.receive_rtp()
-            if data: receive_buffer_raw.append(data)
-            if (time.time() - last_buffer_time) * 1000 >= 20:
-                if receive_buffer_raw:
-                    packets = [RtpPacket.parse(p) for p in receive_buffer_raw if len(p) > 12]
-                    if packets:
-                        for p in self.fec_handler.recover(packets): self.packet_buffer.push(p)
-                    receive_buffer_raw.clear()
-                last_buffer_time = time.time()
-            await asyncio.sleep(0.001)
+            await asyncio.sleep(TRANSPORT_FEEDBACK_INTERVAL)
+            if self.feedback_generator is None:
+                return
+            if self.remote_ssrc is None:
+                continue
+            feedback = self.feedback_generator.build(self.ssrc, self.remote_ssrc)
+            if feedback:
+                self.transport.send_rtcp(feedback)
 
     async def _playback_loop(self):
+        """
+        RTP timestamp güdümlü oynatma: döngü bir sonraki frame'in (veya kayıp paketin
+        bekleme süresinin) zamanında uyanır ve zamanı gelen tüm paketleri bırakır.
+        """
         while self.running:
-            packet = self.packet_buffer.pop()
-            if packet: self.media_pipeline.push_rtp_packet(packet.serialize())
-            await asyncio.sleep(0.01)
+            # Frame bazında teslim: frame başına tek Python<->GStreamer geçişi
+            for frame in self.frame_assembler.push(self.packet_buffer.pop_due()):
+                self.media_pipeline.push_rtp_frame([packet.serialize() for packet in frame])
+            self._request_keyframe()
+
+            deadline = self.packet_buffer.next_deadline()
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            self._next_wakeup = deadline
+            self._playout_event.clear()
+            try:
+                await asyncio.wait_for(self._playout_event.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def _request_keyframe(self):
+        """
+        Referans zinciri koptuysa (FEC ve NACK/RTX eksik paketi kurtaramadı) PLI/FIR gönderir;
+        keyframe-int beklenmeden yaklaşık bir RTT'de kod çözme yeniden başlar.
+        """
+        if self.remote_ssrc is None:
+            return
+        if self.native_fec:
+            # Kurtarma GStreamer içinde: kurtarılamayan kayıp rtpulpfecdec sayacından izlenir
+            unrecovered = self.media_pipeline.get_fec_unrecovered()
+            if unrecovered > self._native_unrecovered:
+                self._native_unrecovered = unrecovered
+                self.frame_assembler.mark_reference_loss()
+        request = self.keyframe_requester.poll(self.frame_assembler.waiting_for_keyframe, self.ssrc,
+                                               self.remote_ssrc, self.transport.stats['last_rtt'] or None)
+        if request:
+            self.transport.send_rtcp(request)
+            print(f"[Engine] Keyframe isteği gönderildi ({self.keyframe_requester.method.upper()})")
+
+    def _on_keyframe_request(self):
+        """Gönderici: PLI/FIR geldiğinde encoder'dan IDR ister (art arda istekler birleştirilir)"""
+        self.keyframe_stats['requests_received'] += 1
+        now = time.monotonic()
+        if self._last_forced_keyframe is not None and now - self._last_forced_keyframe < KEYFRAME_MIN_INTERVAL:
+            return
+        print("[Engine] Keyframe isteği alındı, IDR zorlanıyor")
+        self._force_keyframe(now)
+
+    def _force_keyframe(self, now: Optional[float] = None):
+        """Encoder'dan IDR (intra refresh'te yeni refresh dalgası) ister"""
+        self._last_forced_keyframe = time.monotonic() if now is None else now
+        self.keyframe_stats['keyframes_forced'] += 1
+        self.media_pipeline.force_keyframe()
+        if self.gop_controller:
+            self.gop_controller.on_keyframe(self._last_forced_keyframe)
+
+    def _buffer_packet(self, packet: RtpPacket, retransmitted: bool = False):
+        """Paketi jitter buffer'a ekler; beklenenden önce oynatılacaksa zamanlayıcıyı uyandırır"""
+        if not self.packet_buffer.push(packet, retransmitted):
+            return
+        deadline = self.packet_buffer.playout_deadline(packet.timestamp)
+        if self._next_wakeup is None or deadline < self._next_wakeup:
+            self._playout_event.set()
 
     async def _rtcp_loop(self):
         while self.running:
-            await self.transport.receive_rtcp()
-            if time.time() - self.last_rtcp_time >= 2.0:
-                rtcp_packet = self._create_receiver_report() if self.mode == 'receiver' else self._create_sender_report()
-                if rtcp_packet: await self.transport.send_rtcp(rtcp_packet)
-                self.last_rtcp_time = time.time()
-            await asyncio.sleep(1)
+            rtcp_packet = self._create_receiver_report() if self.mode == 'receiver' else self._create_sender_report()
+            if rtcp_packet: self.transport.send_rtcp(rtcp_packet)
+            self.last_rtcp_time = time.time()
+            await asyncio.sleep(RTCP_INTERVAL)
+
+    def _handle_rtcp(self, data: bytes):
+        """Datagram callback'i: raporları işler, feedback mesajlarına anında cevap verir"""
+        for fmt, pt, body in iter_rtcp_packets(data):
+            if pt == RTCP_SR:
+                report = parse_sender_report(body, fmt)
+                if report:
+                    self.reception.on_sender_report(report[1], report[2])
+            elif pt == RTCP_RR:
+                report = parse_receiver_report(body, fmt)
+                if report:
+                    self._on_report_blocks(report[1])
+            elif pt == RTCP_RTPFB and fmt == RTPFB_GENERIC_NACK and self.nack_enabled and len(body) >= 8:
+                _, _, fci = parse_feedback(body)
+                rtt_ms = self.transport.stats['last_rtt'] or None
+                self.transport.send_rtp_batch(self.rtx_sender.on_nack(parse_generic_nack(fci), rtt_ms))
+            elif pt == RTCP_PSFB and self.mode == 'sender' and len(body) >= 8:
+                _, media_ssrc, fci = parse_feedback(body)
+                if fmt == PSFB_PLI and media_ssrc == self.ssrc:
+                    self._on_keyframe_request()
+                elif fmt == PSFB_FIR:
+                    for ssrc, command_seq in parse_fir(fci):
+                        # Aynı komut numarası aynı isteğin tekrarıdır
+                        if ssrc == self.ssrc and command_seq != self._last_fir_seq:
+                            self._last_fir_seq = command_seq
+                            self._on_keyframe_request()
+            elif pt == RTCP_RTPFB and fmt == RTPFB_TRANSPORT_FEEDBACK and self.delay_bwe and len(body) >= 8:
+                _, _, fci = parse_feedback(body)
+                feedback = parse_transport_feedback(fci)
+                if feedback:
+                    self._on_transport_feedback(feedback[0], feedback[2])
+
+    def _on_transport_feedback(self, base_seq: int, arrivals: List[Optional[int]]):
+        """
+        Gönderici: varış zamanlarından gecikme tabanlı tahmini günceller; over-use
+        durumunda bitrate kayıp raporu beklenmeden düşürülür. Paket başına alındı/kayıp
+        dizisi FEC şekli için kayıp modeline de verilir.
+        """
+        self.abr_controller.process_loss_pattern([arrival is not None for arrival in arrivals])
+        estimate = self.delay_bwe.on_feedback(base_seq, arrivals, self.transport.stats['last_rtt'] or None)
+        if estimate is None:
+            return
+        self.abr_controller.update_delay_based_estimate(estimate)
+        self._apply_target_bitrate()
+
+    def _apply_target_bitrate(self):
+        """Controller'ın ağ hedefini rate controller üzerinden encoder'a uygular"""
+        self.rate_controller.update(self.abr_controller.current_bitrate)
+
+    def _on_report_blocks(self, blocks):
+        """
+        Gönderici: alım raporundan RTT (LSR/DLSR), aralık kaybı ve jitter'ı hesaplar,
+        AdaptiveController'a iletir ve kararını encoder'a uygular.
+        """
+        for block in blocks:
+            if block.ssrc != self.ssrc:
+                continue
+            stats = {'jitter': block.jitter / 90000.0, 'bytesSent': self.transport.stats['bytes_sent']}
+            rtt = round_trip_time(block)
+            if rtt is not None:
+                stats['roundTripTime'] = rtt
+                self.transport.stats['last_rtt'] = round(rtt * 1000, 1)
+
+            previous = self._last_report_block
+            if previous is not None:
+                expected = (block.highest_seq - previous.highest_seq) & 0xFFFFFFFF
+                if 0 < expected < 0x80000000:
+                    stats['packetsSent'] = expected
+                    stats['packetsLost'] = max(block.cumulative_lost - previous.cumulative_lost, 0)
+            self._last_report_block = block
+            self.transport.stats['last_loss_rate'] = block.fraction_lost / 256.0
+            if self.gop_controller:
+                self.gop_controller.on_network_stats(block.fraction_lost / 256.0, self.transport.stats['last_rtt'])
+
+            self.abr_controller.process_stats(stats)
+            self.abr_controller.adapt()
+            self._apply_target_bitrate()
 
     def _create_sender_report(self) -> bytes:
-        header = struct.pack('!BBH', (2 << 6) | 0, 200, 6)
-        payload = struct.pack('!IIIIII', self.ssrc, int(time.time()) + 2208988800, 0,
-                              self.send_timestamp, self.transport.stats['packets_sent'],
-                              self.transport.stats['bytes_sent'])
-        return header + payload
+        """
+        Compound RTCP: SR (NTP + RTP timestamp eşlemesi) + SDES CNAME.
+        RFC 3550 6.4.1: iki alan aynı anı göstermeli - son frame'in timestamp'i şimdiye taşınır.
+        """
+        now = time.time()
+        rtp_timestamp = self.send_timestamp
+        if self._send_timestamp_wallclock is not None:
+            rtp_timestamp += int((now - self._send_timestamp_wallclock) * 90000)
+        return (build_sender_report(self.ssrc, rtp_timestamp, self.sr_packet_count, self.sr_octet_count,
+                                    wallclock=now)
+                + build_sdes_cname(self.ssrc, self.cname))
 
     def _create_receiver_report(self) -> bytes:
+        """Compound RTCP: RR (kayıp, genişletilmiş SN, jitter, LSR/DLSR) + SDES CNAME"""
         if not self.transport.remote_addr: return b''
-        header = struct.pack('!BBH', (2 << 6) | 1, 201, 7)
-        reporter_ssrc = struct.pack('!I', self.ssrc)
-        fec_stats = self.fec_handler.get_stats()
-        total_expected = fec_stats.get('packets_received', 0) + fec_stats.get('packets_recovered', 0) + fec_stats.get(
-            'packets_lost', 0)
-        lost_count = fec_stats.get('packets_lost', 0)
-        fraction_lost = int((lost_count * 256) / total_expected) if total_expected > 0 else 0
-        report_block = struct.pack('!I B 3s IIII', 0, fraction_lost, (lost_count & 0xFFFFFF).to_bytes(3, 'big'), 0, 0,
-                                   0, 0)
-        return header + reporter_ssrc + report_block
+        jitter = int(self.packet_buffer.jitter * self.packet_buffer.clock_rate)
+        block = self.reception.report_block(jitter)
+        return (build_receiver_report(self.ssrc, [block] if block else [])
+                + build_sdes_cname(self.ssrc, self.cname))
 
     async def _stats_loop(self):
         while self.running:
@@ -256,12 +749,23 @@ class RtpMediaEngine:
             print("\n--- İSTATİSTİKLER ---")
             print(f"Taşıma: {self.transport.stats}")
             print(f"FEC: {self.fec_handler.get_stats()}")
-            if self.mode == 'sender': print(f"ABR: {self.abr_controller.get_current_settings()}")
+            if self.mode == 'sender':
+                print(f"ABR: {self.abr_controller.get_current_settings()}")
+                print(f"RateCtl: {self.rate_controller.get_stats()}")
+            if self.nack_enabled: print(f"RTX: {self.rtx_sender.get_stats()}")
+            if self.delay_bwe and self.mode == 'sender': print(f"BWE: {self.delay_bwe.get_stats()}")
             print(f"Buffer: {self.packet_buffer.get_stats()}")
+            print(f"Frame: {self.frame_assembler.get_stats()}")
+            if self.mode == 'sender':
+                gop = self.gop_controller.get_stats() if self.gop_controller else VIDEO_GOP_MODE
+                print(f"Keyframe: {self.keyframe_stats}, GOP: {gop}")
+            else:
+                print(f"Keyframe: {self.keyframe_requester.get_stats()}")
             print("---------------------\n")
 
     async def stop(self):
         self.running = False
+        self._packet_event.set()
         await asyncio.sleep(0.1)
         self.media_pipeline.stop()
         self.transport.close()
@@ -281,7 +785,8 @@ async def main():
 
     engine = None
     try:
-        engine = RtpMediaEngine(args.mode, args.port) if args.mode == 'receive' else RtpMediaEngine(args.mode)
+        # Motor içinde roller 'receiver' / 'sender' olarak adlandırılır
+        engine = RtpMediaEngine('receiver', args.port) if args.mode == 'receive' else RtpMediaEngine('sender')
         if args.mode == 'receive':
             await engine.start_receiver()
         else:
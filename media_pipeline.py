@@ -4,7 +4,7 @@ import threading
 import asyncio
 
 gi.require_version('Gst', '1.0')
-from gi.repository import Gst, GObject
+from gi.repository import Gst, GObject, GLib
 
 from config import GST_SENDER_PIPELINE, GST_RECEIVER_PIPELINE
 
@@ -46,6 +46,20 @@ class GStreamerPipeline:
             buf = Gst.Buffer.new_wrapped(data)
             self.appsrc.emit('push-buffer', buf)
 
+    def update_bitrate(self, bitrate: int):
+        """x264enc bitrate'ini (bps) GLib thread'inde günceller"""
+        encoder = self.pipeline.get_by_name('x264enc') if self.pipeline else None
+        if encoder:
+            GLib.idle_add(encoder.set_property, 'bitrate', bitrate // 1000)
+            print(f"[GStreamer] Bitrate güncellendi: {bitrate / 1000000:.2f} Mbps")
+
+    def update_video_format(self, width: int, height: int, framerate: int):
+        """Pipeline'da 'videocaps' capsfilter'ı varsa çözünürlük/kare hızını değiştirir"""
+        capsfilter = self.pipeline.get_by_name('videocaps') if self.pipeline else None
+        if capsfilter:
+            caps = Gst.Caps.from_string(f"video/x-raw,width={width},height={height},framerate={framerate}/1")
+            GLib.idle_add(capsfilter.set_property, 'caps', caps)
+
     def _on_new_sample(self, appsink, user_data):
         """appsink'ten gelen her yeni RTP paketi için çağrılır."""
         sample = appsink.emit('pull-sample')
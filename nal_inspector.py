@@ -0,0 +1,107 @@
+# nal_inspector.py - H.264 RTP PAYLOAD SINIFLANDIRMA (RFC 6184)
+"""
+Hafif H.264 RTP payload inceleyicisi.
+Single NAL, STAP-A ve FU-A paketlerini çözer; paketi kod çözme açısından
+önemine göre sınıflandırır. FEC/RED koruma gücü bu sınıfa göre belirlenir.
+
+Intra refresh akışında IDR yoktur; refresh dalgasının başladığı frame'i
+taşıyan recovery point SEI (payload tipi 6) bir yeniden senkronizasyon
+noktasıdır ve IDR ile aynı sınıfa konur.
+"""
+
+# Sınıflar - büyük değer = daha kritik
+NAL_CLASS_NON_REFERENCE = 0   # nal_ref_idc == 0: atılabilir frame, kaybı yayılmaz
+NAL_CLASS_REFERENCE = 1       # Referans (P) slice
+NAL_CLASS_IDR = 2             # IDR slice - sonraki tüm frame'ler buna bağlı
+NAL_CLASS_PARAMETER_SET = 3   # SPS/PPS - olmadan hiçbir şey çözülemez
+
+NAL_TYPE_SLICE = 1
+NAL_TYPE_IDR = 5
+NAL_TYPE_SEI = 6
+NAL_TYPE_SPS = 7
+NAL_TYPE_PPS = 8
+NAL_TYPE_STAP_A = 24
+NAL_TYPE_FU_A = 28
+
+SEI_RECOVERY_POINT = 6
+
+
+def _has_recovery_point(nal: bytes) -> bool:
+    """SEI NAL biriminin (header dahil) mesajlarından biri recovery point mi"""
+    offset = 1
+    while offset < len(nal) and nal[offset] != 0x80:   # rbsp_trailing_bits
+        payload_type = 0
+        while offset < len(nal) and nal[offset] == 0xFF:
+            payload_type += 255
+            offset += 1
+        if offset >= len(nal):
+            return False
+        payload_type += nal[offset]
+        offset += 1
+        if payload_type == SEI_RECOVERY_POINT:
+            return True
+        payload_size = 0
+        while offset < len(nal) and nal[offset] == 0xFF:
+            payload_size += 255
+            offset += 1
+        if offset >= len(nal):
+            return False
+        payload_size += nal[offset]
+        offset += 1 + payload_size
+    return False
+
+
+def _classify_nal(nal_header: int, nal_type: int, nal: bytes = b'') -> int:
+    """Tek bir NAL birimini sınıflandırır (nal: SEI incelemesi için NAL'in tamamı)"""
+    if nal_type in (NAL_TYPE_SPS, NAL_TYPE_PPS):
+        return NAL_CLASS_PARAMETER_SET
+    if nal_type == NAL_TYPE_IDR:
+        return NAL_CLASS_IDR
+    if nal_type == NAL_TYPE_SEI and _has_recovery_point(nal):
+        return NAL_CLASS_IDR
+    if (nal_header >> 5) & 0x03 == 0:
+        return NAL_CLASS_NON_REFERENCE
+    return NAL_CLASS_REFERENCE
+
+
+def classify_h264_payload(payload: bytes) -> int:
+    """
+    H.264 RTP payload'ını sınıflandırır.
+    Tanınmayan paketlemeler güvenli tarafta kalmak için referans sayılır.
+    """
+    if not payload:
+        return NAL_CLASS_REFERENCE
+
+    header = payload[0]
+    nal_type = header & 0x1F
+
+    # Single NAL unit
+    if 1 <= nal_type <= 23:
+        return _classify_nal(header, nal_type, payload)
+
+    # STAP-A: [2 byte boyut | NAL] tekrarları, en kritik NAL'in sınıfı alınır.
+    # Bozuk/kesik aggregate'te çözülemeyen kısım referans olabilir - güvenli taraf.
+    if nal_type == NAL_TYPE_STAP_A:
+        result = NAL_CLASS_NON_REFERENCE
+        offset = 1
+        parsed = 0
+        while offset < len(payload):
+            if offset + 2 >= len(payload):
+                return max(result, NAL_CLASS_REFERENCE)
+            size = (payload[offset] << 8) | payload[offset + 1]
+            offset += 2
+            if size == 0 or offset + size > len(payload):
+                return max(result, NAL_CLASS_REFERENCE)
+            nal = payload[offset]
+            result = max(result, _classify_nal(nal, nal & 0x1F, payload[offset:offset + size]))
+            offset += size
+            parsed += 1
+        if parsed == 0:
+            return NAL_CLASS_REFERENCE
+        return result
+
+    # FU-A: NRI indicator'da, NAL tipi FU header'da
+    if nal_type == NAL_TYPE_FU_A and len(payload) >= 2:
+        return _classify_nal(header, payload[1] & 0x1F)
+
+    return NAL_CLASS_REFERENCE
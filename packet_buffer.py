@@ -1,45 +1,108 @@
 # packet_buffer.py - AKILLI PAKET TAMPONLAMA
 
-from typing import Optional, Dict
-from collections import OrderedDict
+from typing import Optional, Dict, List
+from collections import deque
 import time
-from aiortc.rtp import RtpPacket
+from rtp import RtpPacket
+
+
+def seq_diff(a: int, b: int) -> int:
+    """RFC 1982 seri sayı farkı (16 bit): a - b, [-32768, 32767] aralığında"""
+    return ((a - b + 0x8000) & 0xFFFF) - 0x8000
+
+
+def ts_diff(a: int, b: int) -> int:
+    """RFC 1982 seri sayı farkı (32 bit RTP timestamp)"""
+    return ((a - b + 0x80000000) & 0xFFFFFFFF) - 0x80000000
 
 
 class PacketBuffer:
     """
     Akıllı paket tamponlama - jitter kompanzasyonu ve sıralama
+    Sabit kapasiteli halka buffer: paket seq mod N slotunda tutulur (O(1) ekleme/çıkarma)
     """
 
+    # Adaptif gecikme histogramı (NetEQ tarzı)
+    HISTOGRAM_BIN_MS = 5
+    HISTOGRAM_FORGET_FACTOR = 0.998   # Her örnekte eski örneklerin ağırlığı
+    DELAY_PERCENTILE = 0.95
+    DELAY_MARGIN_MS = 5
+    SHRINK_RATE_MS_PER_S = 20         # Hedef gecikme en fazla bu hızla küçülür
+    TARGET_UPDATE_INTERVAL = 0.1      # Hedef gecikme güncelleme aralığı (saniye)
+    TRANSIT_WINDOW_S = 2.0            # En hızlı yol (min transit) penceresi
+
+    # NACK için boşluk takibi
+    NACK_MAX_RETRIES = 3
+    NACK_MAX_LIST = 256               # Daha büyük boşlukta NACK yerine keyframe beklenir
+    NACK_DEFAULT_RTT_MS = 100
+
     def __init__(self,
                  target_delay_ms: int = 100,
                  max_delay_ms: int = 500,
-                 reorder_tolerance: int = 5):
+                 capacity: int = 1024,
+                 min_delay_ms: int = 30,
+                 adaptive: bool = True,
+                 nack_requires_confirmation: bool = False):
         """
-        target_delay_ms: Hedef gecikme (jitter buffer)
+        target_delay_ms: Hedef gecikme (jitter buffer) - adaptif modda başlangıç değeri
         max_delay_ms: Maksimum gecikme (timeout)
-        reorder_tolerance: Kaç paket geriye kadar reorder tolere edilir
+        capacity: Halka buffer slot sayısı (2'nin kuvveti)
+        min_delay_ms: Adaptif hedef gecikmenin alt sınırı
+        adaptive: Hedef gecikmeyi gecikme histogramından ayarla
+        nack_requires_confirmation: FEC medya SN uzayını paylaşıyorsa (ULPFEC) boşluk kayıp bir
+                                    FEC paketi olabilir; SN yalnızca confirm_media ile medya olduğu
+                                    doğrulandıktan sonra NACK'lenir
         """
+        if capacity & (capacity - 1):
+            raise ValueError(f"Kapasite 2'nin kuvveti olmalı: {capacity}")
+
         self.target_delay = target_delay_ms
+        self.min_delay = min(min_delay_ms, target_delay_ms)
         self.max_delay = max_delay_ms
-        self.reorder_tolerance = reorder_tolerance
+        self.adaptive = adaptive
+        self.nack_requires_confirmation = nack_requires_confirmation
 
-        # Ana buffer - OrderedDict for efficient FIFO
-        self.buffer: OrderedDict[int, RtpPacket] = OrderedDict()
+        # Ana buffer - seq & mask indeksli slotlar
+        self.capacity = capacity
+        self._mask = capacity - 1
+        self._slots: List[Optional[RtpPacket]] = [None] * capacity
+        self._count = 0
 
         # Sıra takibi
         self.next_seq = None
         self.highest_seq = None
+        # [next_seq, _scan_seq) aralığında paket yok: ilk mevcut paket araması buradan başlar
+        # (kayıp patlamasında boş slotlar her çağrıda yeniden taranmaz)
+        self._scan_seq = None
+
+        # Derinlik takibi (RTP timestamp): en yeni ve oynatma başının timestamp'i
+        self._max_ts = None
+        self._head_ts = None
 
         # Zaman takibi
         self.first_packet_time = None
         self.last_pop_time = None
-        self.last_cleanup_time = time.time()
 
-        # Adaptif jitter buffer
+        # Oynatma zamanlayıcısı: RTP timestamp -> duvar saati (monotonic) eşlemesi
+        # transit = varış - ts/clock; en hızlı yol (pencere minimumu) referans alınır
+        self.clock_rate = 90000
+        self._ref_ts = None
+        self._base_transit = None
+        self._transit_window = deque()  # (varış, transit) - transit'e göre artan
+
+        # RFC 3550 interarrival jitter (saniye) - önceki paketin varışına göre
+        self.jitter = 0.0
         self.jitter_estimator = 0.0
-        self.jitter_variance = 0.0
-        self.alpha = 0.125  # Smoothing factor
+        self._last_arrival = None
+        self._last_arrival_ts = None
+
+        # Eksik paketler (NACK): seq -> [ilk tespit, NACK sayısı, son NACK zamanı, medya olduğu biliniyor]
+        self._missing: Dict[int, list] = {}
+
+        # Adaptif hedef gecikme: gecikme histogramı + yüzdelik
+        self._histogram = [0.0] * (max_delay_ms // self.HISTOGRAM_BIN_MS + 1)
+        self._histogram_weight = 1.0
+        self._last_target_update = None
 
         # İstatistikler
         self.stats = {
@@ -48,12 +111,16 @@ class PacketBuffer:
             'packets_dropped': 0,
             'packets_reordered': 0,
             'buffer_depth_ms': 0,
-            'avg_jitter_ms': 0
+            'avg_jitter_ms': 0,
+            'target_delay_ms': target_delay_ms,
+            'nacks_sent': 0,
+            'packets_retransmitted': 0
         }
 
-    def push(self, packet: RtpPacket) -> bool:
+    def push(self, packet: RtpPacket, retransmitted: bool = False) -> bool:
         """
         Paketi buffer'a ekler
+        retransmitted: RTX ile gelen paket - gecikmesi jitter/hedef gecikme tahminine katılmaz
         Returns: Başarılı ekleme True, drop edildi False
         """
         seq = packet.sequence_number
@@ -62,36 +129,60 @@ class PacketBuffer:
         if self.next_seq is None:
             self.next_seq = seq
             self.highest_seq = seq
+            self._scan_seq = seq
+            self._head_ts = packet.timestamp
+            self._max_ts = packet.timestamp
             self.first_packet_time = time.time()
 
-        # Duplicate kontrolü
-        if seq in self.buffer:
-            return False
+        offset = seq_diff(seq, self.next_seq)
 
-        # Çok eski paket kontrolü
-        if self.next_seq is not None and seq < self.next_seq - self.reorder_tolerance:
+        # Çok eski paket: oynatma başı bu paketi geçti
+        if offset < 0:
             self.stats['packets_dropped'] += 1
             return False
 
+        # Kapasiteyi aşan ileri sıçrama: baştaki paketleri düşürerek yer aç
+        if offset >= self.capacity:
+            self._advance_head(seq_diff(seq, self.next_seq) - self.capacity + 1)
+
+        # Duplicate kontrolü
+        index = seq & self._mask
+        if self._slots[index] is not None:
+            return False
+
         # Buffer'a ekle
-        self.buffer[seq] = packet
+        self._slots[index] = packet
+        self._count += 1
+        if seq_diff(seq, self._scan_seq) < 0:
+            self._scan_seq = seq
         self.stats['packets_buffered'] += 1
 
-        # Reorder tespit
-        if self.highest_seq is not None and seq < self.highest_seq:
-            self.stats['packets_reordered'] += 1
-
-        # En yüksek sequence number'ı güncelle
-        if self.highest_seq is None or seq > self.highest_seq:
+        if retransmitted:
+            self.stats['packets_retransmitted'] += 1
+
+        # Reorder tespit / en yüksek sequence number'ı güncelle, boşlukları NACK listesine ekle
+        advance = seq_diff(seq, self.highest_seq)
+        if advance < 0:
+            self._missing.pop(seq, None)
+            if not retransmitted:
+                self.stats['packets_reordered'] += 1
+        else:
+            if advance > 1:
+                self._track_gap(advance - 1)
             self.highest_seq = seq
 
-        # Jitter hesaplama
-        self._update_jitter(packet)
+        if ts_diff(packet.timestamp, self._max_ts) > 0:
+            self._max_ts = packet.timestamp
 
-        # Periyodik temizlik
-        if time.time() - self.last_cleanup_time > 1.0:
+        # Jitter ve oynatma zamanlaması
+        if not retransmitted:
+            arrival = time.monotonic()
+            self._update_jitter(packet, arrival)
+            self._update_playout_clock(packet, arrival)
+
+        # Maksimum gecikme koruması
+        if self.get_depth_ms() > self.max_delay:
             self._cleanup()
-            self.last_cleanup_time = time.time()
 
         return True
 
@@ -107,23 +198,194 @@ class PacketBuffer:
             return None
 
         # Sıradaki paketi ara
-        if self.next_seq in self.buffer:
-            packet = self.buffer.pop(self.next_seq)
+        index = self.next_seq & self._mask
+        packet = self._slots[index]
+        if packet is not None:
+            self._slots[index] = None
+            self._count -= 1
+            self._head_ts = packet.timestamp
             self.stats['packets_played'] += 1
             self.next_seq = (self.next_seq + 1) & 0xFFFF
             self.last_pop_time = time.time()
             return packet
 
-        # Paket kayıp - atla
-        self.next_seq = (self.next_seq + 1) & 0xFFFF
+        # Paket kayıp - buffer'daki ilk mevcut pakete atla
+        self._skip_to_next_available()
+        return None
+
+    def get(self, seq: int) -> Optional[RtpPacket]:
+        """Buffer'da bekleyen (henüz oynatılmamış) seq numaralı paket"""
+        packet = self._slots[seq & self._mask]
+        return packet if packet is not None and packet.sequence_number == seq else None
 
-        # Buffer'daki en küçük sequence'a atla
-        if self.buffer:
-            min_seq = min(self.buffer.keys())
-            if min_seq > self.next_seq:
-                # Büyük boşluk var, reset
-                self.next_seq = min_seq
+    def __contains__(self, seq: int) -> bool:
+        return self.get(seq) is not None
+
+    def _track_gap(self, count: int):
+        """highest_seq'ten sonraki count paketi eksik olarak işaretler"""
+        if len(self._missing) + count > self.NACK_MAX_LIST:
+            self._missing.clear()
+            return
+        now = time.monotonic()
+        confirmed = not self.nack_requires_confirmation
+        for offset in range(1, count + 1):
+            self._missing[(self.highest_seq + offset) & 0xFFFF] = [now, 0, 0.0, confirmed]
+
+    def confirm_media(self, seqs: List[int]):
+        """Bir FEC maskesinin koruduğu (dolayısıyla medya olan) eksik SN'leri NACK'lenebilir yapar"""
+        for seq in seqs:
+            state = self._missing.get(seq)
+            if state is not None:
+                state[3] = True
+
+    def get_nack_list(self, rtt_ms: Optional[float] = None, now: Optional[float] = None) -> List[int]:
+        """
+        NACK gönderilmesi gereken sequence number'lar: ilk kez eksik görülenler ve
+        son istekten bu yana ~1.5 RTT geçip hâlâ gelmeyenler.
+        Oynatma başının gerisinde kalan veya deneme hakkı biten paketler listeden çıkar.
+        """
+        if not self._missing:
+            return []
+        now = time.monotonic() if now is None else now
+        retry_interval = 1.5 * (rtt_ms or self.NACK_DEFAULT_RTT_MS) / 1000.0
+
+        nack_list = []
+        for seq, state in list(self._missing.items()):
+            if seq_diff(seq, self.next_seq) < 0 or state[1] >= self.NACK_MAX_RETRIES:
+                del self._missing[seq]
+                continue
+            if not state[3]:
+                continue    # Kayıp FEC paketi olabilir: gönderici geçmişinde yok
+            if state[1] == 0 or now - state[2] >= retry_interval:
+                state[1] += 1
+                state[2] = now
+                nack_list.append(seq)
+
+        self.stats['nacks_sent'] += len(nack_list)
+        return nack_list
+
+    def _update_playout_clock(self, packet: RtpPacket, arrival: float):
+        """
+        RTP timestamp -> duvar saati eşlemesini günceller.
+        Son TRANSIT_WINDOW_S içindeki en küçük transit (en hızlı yol) referans alınır;
+        paketin bu referansa göre gecikmesi histograma eklenir.
+        Akış sıçraması (gecikme max_delay'in çok ötesinde) eşlemeyi sıfırlar.
+        """
+        if self._ref_ts is None:
+            self._ref_ts = packet.timestamp
+        transit = arrival - ts_diff(packet.timestamp, self._ref_ts) / self.clock_rate
+
+        if (self._base_transit is not None
+                and abs(transit - self._base_transit) > (self.max_delay + self.target_delay) / 1000.0):
+            self._ref_ts = packet.timestamp
+            self._transit_window.clear()
+            transit = arrival
+
+        # Monoton deque ile kayan pencere minimumu
+        window = self._transit_window
+        while window and window[-1][1] >= transit:
+            window.pop()
+        window.append((arrival, transit))
+        while window[0][0] < arrival - self.TRANSIT_WINDOW_S:
+            window.popleft()
+        self._base_transit = window[0][1]
+
+        if self.adaptive:
+            self._update_target_delay((transit - self._base_transit) * 1000.0, arrival)
+
+    def _update_target_delay(self, delay_ms: float, now: float):
+        """
+        Gecikme örneğini histograma ekler, hedef gecikmeyi periyodik olarak günceller.
+        Hedef büyümesi anında, küçülmesi SHRINK_RATE_MS_PER_S ile sınırlıdır.
+        """
+        # Unutma faktörü: tüm kutuları küçültmek yerine yeni örneğin ağırlığı büyütülür
+        self._histogram_weight /= self.HISTOGRAM_FORGET_FACTOR
+        index = min(int(delay_ms) // self.HISTOGRAM_BIN_MS, len(self._histogram) - 1)
+        self._histogram[index] += self._histogram_weight
+        if self._histogram_weight > 1e6:
+            self._histogram = [value / self._histogram_weight for value in self._histogram]
+            self._histogram_weight = 1.0
+
+        if self._last_target_update is None:
+            self._last_target_update = now
+            return
+        elapsed = now - self._last_target_update
+        if elapsed < self.TARGET_UPDATE_INTERVAL:
+            return
+        self._last_target_update = now
+
+        # Hedef: gecikme dağılımının yüzdeliği + pay
+        threshold = sum(self._histogram) * self.DELAY_PERCENTILE
+        cumulative = 0.0
+        percentile_ms = 0
+        for index, value in enumerate(self._histogram):
+            cumulative += value
+            if cumulative >= threshold:
+                percentile_ms = (index + 1) * self.HISTOGRAM_BIN_MS
+                break
+        desired = max(self.min_delay, min(percentile_ms + self.DELAY_MARGIN_MS, self.max_delay))
+
+        if desired > self.target_delay:
+            self.target_delay = desired
+        else:
+            self.target_delay = max(desired, self.target_delay - self.SHRINK_RATE_MS_PER_S * elapsed)
+        self.stats['target_delay_ms'] = round(self.target_delay, 1)
+
+    def playout_deadline(self, timestamp: int) -> Optional[float]:
+        """RTP timestamp'inin oynatılma zamanı (time.monotonic() cinsinden)"""
+        if self._base_transit is None:
+            return None
+        return (self._base_transit + ts_diff(timestamp, self._ref_ts) / self.clock_rate
+                + self.target_delay / 1000.0)
 
+    def next_deadline(self) -> Optional[float]:
+        """
+        Sıradaki olayın zamanı: baştaki paketin oynatma zamanı, baş eksikse
+        kayıp paketin son bekleme anı (ilk mevcut paketin oynatma zamanı).
+        """
+        packet = self._first_available()
+        return self.playout_deadline(packet.timestamp) if packet is not None else None
+
+    def pop_due(self, now: Optional[float] = None) -> List[RtpPacket]:
+        """
+        Zamanı gelen tüm paketleri sırayla döndürür. Eksik paketin zamanı geçtiyse
+        boşluk atlanır; böylece oynatma gecikmesi deterministik olur.
+        """
+        now = time.monotonic() if now is None else now
+        due = []
+        while self._count:
+            packet = self._first_available()
+            if packet is None or self.playout_deadline(packet.timestamp) > now:
+                break
+
+            # Kayıp paketlerin bekleme süresi doldu: atla
+            self._skip_to_next_available()
+            index = self.next_seq & self._mask
+            self._slots[index] = None
+            self._count -= 1
+            self._head_ts = packet.timestamp
+            self.next_seq = (self.next_seq + 1) & 0xFFFF
+            self.stats['packets_played'] += 1
+            due.append(packet)
+
+        if due:
+            self.last_pop_time = time.time()
+        return due
+
+    def _first_available(self) -> Optional[RtpPacket]:
+        """Oynatma başından itibaren ilk mevcut paket (başı değiştirmez)"""
+        if not self._count:
+            return None
+        span = seq_diff(self.highest_seq, self.next_seq)
+        # Baş _scan_seq'i geçtiyse (pop) işaret geçersizdir; taramaya baştan başlanır
+        seq = self._scan_seq if 0 < seq_diff(self._scan_seq, self.next_seq) <= span else self.next_seq
+        for _ in range(max(seq_diff(self.highest_seq, seq), 0) + 1):
+            packet = self._slots[seq & self._mask]
+            if packet is not None:
+                self._scan_seq = seq
+                return packet
+            seq = (seq + 1) & 0xFFFF
+        self._scan_seq = seq
         return None
 
     def pop_batch(self, max_count: int = 10) -> list:
@@ -139,11 +401,31 @@ class PacketBuffer:
                 break
         return packets
 
+    def _skip_to_next_available(self):
+        """Oynatma başını boş slotların üzerinden ilk mevcut pakete taşır"""
+        packet = self._first_available()
+        if packet is not None:
+            self.next_seq = packet.sequence_number
+        elif seq_diff(self.highest_seq, self.next_seq) >= 0:
+            self.next_seq = (self.highest_seq + 1) & 0xFFFF
+
+    def _advance_head(self, count: int):
+        """Oynatma başını count paket ilerletir, aradaki paketleri düşürür"""
+        for _ in range(count):
+            index = self.next_seq & self._mask
+            packet = self._slots[index]
+            if packet is not None:
+                self._slots[index] = None
+                self._count -= 1
+                self._head_ts = packet.timestamp
+                self.stats['packets_dropped'] += 1
+            self.next_seq = (self.next_seq + 1) & 0xFFFF
+
     def _is_ready_to_play(self) -> bool:
         """
         Buffer'ın playback için hazır olup olmadığını kontrol eder
         """
-        if not self.buffer:
+        if not self._count:
             return False
 
         # İlk paket için bekle
@@ -152,115 +434,84 @@ class PacketBuffer:
             if elapsed < self.target_delay:
                 return False
 
-        # Adaptif jitter buffer
-        if self.stats['avg_jitter_ms'] > 0:
-            required_depth = min(
-                self.target_delay + 2 * self.stats['avg_jitter_ms'],
-                self.max_delay
-            )
-            if self.get_depth_ms() < required_depth:
-                return False
+        # Adaptif jitter buffer: hedef gecikme jitter'ı zaten içeriyor
+        if self.get_depth_ms() < min(self.target_delay, self.max_delay):
+            return False
 
         return True
 
     def get_depth_ms(self) -> int:
         """
-        Buffer derinliğini milisaniye olarak hesaplar
+        Buffer derinliğini milisaniye olarak hesaplar - O(1)
+        En yeni timestamp ile oynatma başının timestamp'i arasındaki fark (90kHz clock)
         """
-        if len(self.buffer) < 2:
+        if self._count < 2:
             return 0
 
-        # RTP timestamp'lerden hesapla (90kHz clock varsayımı)
-        timestamps = [p.timestamp for p in self.buffer.values()]
-        if timestamps:
-            depth = (max(timestamps) - min(timestamps)) / 90
-            self.stats['buffer_depth_ms'] = int(depth)
-            return int(depth)
-
-        return 0
+        depth = max(ts_diff(self._max_ts, self._head_ts), 0) // 90
+        self.stats['buffer_depth_ms'] = depth
+        return depth
 
     def get_depth_packets(self) -> int:
         """
         Buffer'daki paket sayısını döndürür
         """
-        return len(self.buffer)
+        return self._count
 
-    def _update_jitter(self, packet: RtpPacket):
+    def _update_jitter(self, packet: RtpPacket, arrival: float):
         """
-        Jitter tahminini günceller (RFC 3550)
+        Interarrival jitter tahminini günceller (RFC 3550 A.8)
+        D = (R_j - R_i) - (S_j - S_i), J += (|D| - J) / 16; i önceki gelen paket
         """
-        if self.last_pop_time is None:
-            return
-
-        # Arrival time difference
-        arrival_delta = time.time() - self.last_pop_time
-
-        # RTP timestamp difference (90kHz clock)
-        if hasattr(self, '_last_rtp_timestamp'):
-            rtp_delta = (packet.timestamp - self._last_rtp_timestamp) / 90000.0
-
-            # Jitter calculation
-            diff = abs(arrival_delta - rtp_delta) * 1000  # Convert to ms
-
-            # Exponential moving average
-            self.jitter_estimator = (1 - self.alpha) * self.jitter_estimator + self.alpha * diff
-            self.jitter_variance = (1 - self.alpha) * self.jitter_variance + self.alpha * abs(
-                diff - self.jitter_estimator)
-
+        if self._last_arrival is not None:
+            transit_delta = ((arrival - self._last_arrival)
+                             - ts_diff(packet.timestamp, self._last_arrival_ts) / self.clock_rate)
+            self.jitter += (abs(transit_delta) - self.jitter) / 16.0
+            self.jitter_estimator = self.jitter * 1000
             self.stats['avg_jitter_ms'] = self.jitter_estimator
 
-        self._last_rtp_timestamp = packet.timestamp
+        self._last_arrival = arrival
+        self._last_arrival_ts = packet.timestamp
 
     def _cleanup(self):
         """
-        Eski paketleri temizler (timeout)
+        Maksimum gecikmeyi aşan eski paketleri oynatma başından düşürür
         """
-        if not self.buffer:
-            return
-
-        current_time = time.time()
-        max_age_seconds = self.max_delay / 1000.0
-
-        # Timestamp bazlı temizlik
-        if self.highest_seq is not None:
-            cutoff_seq = self.next_seq - self.reorder_tolerance if self.next_seq else 0
-
-            to_remove = []
-            for seq, packet in self.buffer.items():
-                # Çok eski sequence number
-                if seq < cutoff_seq:
-                    to_remove.append(seq)
-
-            for seq in to_remove:
-                del self.buffer[seq]
-                self.stats['packets_dropped'] += 1
-
-        # Buffer overflow koruması
-        max_packets = 100
-        if len(self.buffer) > max_packets:
-            # En eski paketleri sil
-            while len(self.buffer) > max_packets // 2:
-                seq = next(iter(self.buffer))
-                del self.buffer[seq]
-                self.stats['packets_dropped'] += 1
+        while self._count and self.get_depth_ms() > self.max_delay:
+            self._advance_head(1)
+            self._skip_to_next_available()
 
     def reset(self):
         """
         Buffer'ı sıfırlar
         """
-        self.buffer.clear()
+        self._slots = [None] * self.capacity
+        self._count = 0
         self.next_seq = None
         self.highest_seq = None
+        self._scan_seq = None
+        self._max_ts = None
+        self._head_ts = None
         self.first_packet_time = None
         self.last_pop_time = None
+        self._ref_ts = None
+        self._base_transit = None
+        self._transit_window.clear()
+        self.jitter = 0.0
         self.jitter_estimator = 0.0
-        self.jitter_variance = 0.0
+        self._last_arrival = None
+        self._last_arrival_ts = None
+        self._missing.clear()
+        self._histogram = [0.0] * len(self._histogram)
+        self._histogram_weight = 1.0
+        self._last_target_update = None
 
     def get_stats(self) -> Dict:
         """
         Buffer istatistiklerini döndürür
         """
-        self.stats['current_packets'] = len(self.buffer)
+        self.stats['current_packets'] = self._count
+        self.stats['packets_missing'] = len(self._missing)
         self.stats['current_depth_ms'] = self.get_depth_ms()
 
         if self.stats['packets_buffered'] > 0:
@@ -0,0 +1,202 @@
+# rate_controller.py - KAPALI DÖNGÜ ENCODER HIZ KONTROLÜ
+"""
+AdaptiveController'ın ağ hedef bitrate'ini encoder ayarlarına çevirir.
+- Bütçe: ağ hedefi FEC/RED ek yükünü de taşımalıdır; video bitrate'i
+  hedef / (1 + ölçülen koruma oranı) olarak hesaplanır.
+- Yumuşak geçiş: düşüşler hemen uygulanır (tıkanıklık), artışlar saniyede
+  en fazla MAX_INCREASE_PER_S oranında rampalanır; küçük değişiklikler encoder'ı
+  yeniden ayarlamaz.
+- Merdiven: video bütçesi mevcut çözünürlük/kare hızının taşıyabileceğinin altına
+  düşünce bir alt basamağa inilir, bütçe histerezisle geri yükselince çıkılır.
+- GOP: uyarlamalı modda periyodik keyframe aralığı kayıp ve RTT ile ayarlanır.
+"""
+import math
+import time
+from typing import List, Optional, Tuple, Dict
+
+# (genişlik, yükseklik, fps, basamağın gerektirdiği minimum video bitrate'i bps)
+DEFAULT_VIDEO_LADDER = [
+    (640, 480, 30, 800000),
+    (640, 480, 15, 500000),
+    (480, 360, 15, 300000),
+    (320, 240, 15, 150000),
+]
+
+
+class EncoderRateController:
+    """
+    Ağ hedefi -> encoder bitrate'i ve video formatı.
+    media_pipeline: update_bitrate(bps) ve update_video_format(w, h, fps) sağlayan pipeline
+    """
+
+    MAX_INCREASE_PER_S = 0.10       # Artış rampası (saniyede %10)
+    DEADBAND = 0.05                 # Bundan küçük değişiklik encoder'a gönderilmez
+    OVERHEAD_SMOOTHING = 0.3        # Ölçülen koruma oranının EMA katsayısı
+    MIN_OVERHEAD_BYTES = 50000      # Oran ölçümü için gereken minimum medya byte'ı
+
+    def __init__(self, media_pipeline,
+                 ladder: Optional[List[Tuple[int, int, int, int]]] = None,
+                 down_hold_time: float = 1.0,
+                 up_hold_time: float = 5.0,
+                 up_hysteresis: float = 1.3,
+                 initial_overhead: float = 0.3):
+        """
+        ladder: Yüksekten düşüğe sıralı (genişlik, yükseklik, fps, min bitrate) basamakları
+        down_hold_time: Bütçe basamağın altında bu kadar kalırsa bir alt basamağa inilir (s)
+        up_hold_time: Bütçe üst basamağın eşiğini bu kadar aşarsa yukarı çıkılır (s)
+        up_hysteresis: Üst basamağa çıkış için minimum bitrate çarpanı
+        initial_overhead: Ölçüm yapılana kadar kullanılan FEC/RED ek yük oranı
+        """
+        self.media_pipeline = media_pipeline
+        self.ladder = ladder or DEFAULT_VIDEO_LADDER
+        self.down_hold_time = down_hold_time
+        self.up_hold_time = up_hold_time
+        self.up_hysteresis = up_hysteresis
+
+        self.overhead = initial_overhead
+        self._media_bytes = 0
+        self._protection_bytes = 0
+
+        self.rung = 0
+        self._below_since: Optional[float] = None
+        self._above_since: Optional[float] = None
+
+        self.encoder_bitrate: Optional[float] = None   # Rampalanan (henüz uygulanmamış olabilir) bitrate
+        self._applied_bitrate: Optional[int] = None
+        self._last_update: Optional[float] = None
+
+        self.stats = {
+            'bitrate_updates': 0,
+            'ladder_switches': 0,
+            'video_budget_bps': 0
+        }
+
+    def on_packets_sent(self, media_bytes: int, protection_bytes: int):
+        """Gönderilen medya ve koruma (FEC/RED) byte'larını ek yük ölçümüne ekler"""
+        self._media_bytes += media_bytes
+        self._protection_bytes += protection_bytes
+        if self._media_bytes >= self.MIN_OVERHEAD_BYTES:
+            ratio = self._protection_bytes / self._media_bytes
+            self.overhead += self.OVERHEAD_SMOOTHING * (ratio - self.overhead)
+            self._media_bytes = self._protection_bytes = 0
+
+    def update(self, target_bitrate: int, now: Optional[float] = None) -> int:
+        """
+        Ağ hedef bitrate'ini (medya + koruma) uygular; encoder'a verilen video bitrate'ini döndürür
+        """
+        now = time.monotonic() if now is None else now
+        elapsed = 0.0 if self._last_update is None else min(now - self._last_update, 1.0)
+        self._last_update = now
+
+        budget = target_bitrate / (1.0 + self.overhead)
+        self.stats['video_budget_bps'] = int(budget)
+
+        if self.encoder_bitrate is None or budget <= self.encoder_bitrate:
+            self.encoder_bitrate = budget
+        else:
+            self.encoder_bitrate = min(budget, self.encoder_bitrate * (1.0 + self.MAX_INCREASE_PER_S * elapsed))
+
+        # Artışlar rampalı: basamak kararı encoder'a gerçekten verilen bitrate'e göre
+        self._update_ladder(self.encoder_bitrate, now)
+
+        bitrate = int(self.encoder_bitrate)
+        applied = self._applied_bitrate
+        if applied is None or abs(bitrate - applied) >= self.DEADBAND * applied:
+            self._applied_bitrate = bitrate
+            self.stats['bitrate_updates'] += 1
+            self.media_pipeline.update_bitrate(bitrate)
+        return bitrate
+
+    def _update_ladder(self, budget: float, now: float):
+        """Video bitrate'ine göre çözünürlük/kare hızı basamağını histerezisle değiştirir"""
+        if self.rung < len(self.ladder) - 1 and budget < self.ladder[self.rung][3]:
+            self._above_since = None
+            if self._below_since is None:
+                self._below_since = now
+            elif now - self._below_since >= self.down_hold_time:
+                self._switch_rung(self.rung + 1, budget)
+            return
+        self._below_since = None
+
+        if self.rung > 0 and budget >= self.ladder[self.rung - 1][3] * self.up_hysteresis:
+            if self._above_since is None:
+                self._above_since = now
+            elif now - self._above_since >= self.up_hold_time:
+                self._switch_rung(self.rung - 1, budget)
+        else:
+            self._above_since = None
+
+    def _switch_rung(self, rung: int, budget: float):
+        self.rung = rung
+        self._below_since = self._above_since = None
+        self.stats['ladder_switches'] += 1
+        width, height, framerate, _ = self.ladder[rung]
+        print(f"[RateCtl] Video formatı {width}x{height}@{framerate} "
+              f"(bütçe: {budget / 1000000:.2f} Mbps)")
+        self.media_pipeline.update_video_format(width, height, framerate)
+
+    @property
+    def video_format(self) -> Tuple[int, int, int]:
+        return self.ladder[self.rung][:3]
+
+    def get_stats(self) -> Dict:
+        width, height, framerate = self.video_format
+        return dict(self.stats, encoder_bitrate=self._applied_bitrate, overhead=round(self.overhead, 3),
+                    video_format=f"{width}x{height}@{framerate}")
+
+
+class GopController:
+    """
+    Uyarlamalı GOP: periyodik IDR aralığı kayıp x RTT ile ayarlanır.
+    Kayıpsız ağda keyframe patlamaları seyrekleşir (kurtarma PLI/FIR ile yapılır);
+    kayıp ve RTT büyüdükçe PLI turu pahalılaşır ve istek kendisi de kaybolabilir,
+    periyodik keyframe aralığı en kısa değere doğru iner.
+    Encoder'ın key-int-max'ı en uzun aralığa ayarlanır, keyframe'leri bu sınıf zorlar.
+    """
+
+    LOSS_RTT_SATURATION = 10.0      # kayıp oranı x RTT (ms) bu değerde en kısa aralık (%5 @ 200 ms)
+    LOSS_SMOOTHING = 0.3            # Rapor başına kayıp oranı EMA katsayısı
+
+    def __init__(self, min_interval: float = 1.0, max_interval: float = 10.0):
+        """
+        min_interval: Yüksek kayıp/RTT altında keyframe aralığı (s)
+        max_interval: Kayıpsız ağda keyframe aralığı (s)
+        """
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.interval = max_interval
+        self._loss_rate = 0.0
+        self._last_keyframe: Optional[float] = None
+
+        self.stats = {
+            'periodic_keyframes': 0
+        }
+
+    def on_network_stats(self, loss_rate: float, rtt_ms: Optional[float]):
+        """Alım raporundan kayıp oranı ve RTT ile keyframe aralığını günceller"""
+        self._loss_rate += self.LOSS_SMOOTHING * (loss_rate - self._loss_rate)
+        severity = min(1.0, self._loss_rate * (rtt_ms or 0.0) / self.LOSS_RTT_SATURATION)
+        # Geometrik ara değer: düşük kayıpta bile aralık belirgin şekilde kısalır
+        self.interval = self.max_interval * math.pow(self.min_interval / self.max_interval, severity)
+
+    def poll(self, now: Optional[float] = None) -> bool:
+        """
+        Periyodik keyframe zamanı geldiyse True. Çağıran keyframe'i zorlar ve on_keyframe
+        ile sayacı sıfırlar (PLI/FIR ile zorlananlarla aynı yol).
+        """
+        now = time.monotonic() if now is None else now
+        if self._last_keyframe is None:
+            # Akışın ilk frame'i zaten IDR
+            self._last_keyframe = now
+            return False
+        if now - self._last_keyframe < self.interval:
+            return False
+        self.stats['periodic_keyframes'] += 1
+        return True
+
+    def on_keyframe(self, now: Optional[float] = None):
+        """Zorlanan her keyframe (PLI/FIR dahil) periyodik sayacı sıfırlar"""
+        self._last_keyframe = time.monotonic() if now is None else now
+
+    def get_stats(self) -> Dict:
+        return dict(self.stats, interval=round(self.interval, 2), loss_rate=round(self._loss_rate, 4))
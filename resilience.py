@@ -1,16 +1,58 @@
 # resilience.py - %20 PAKET KAYBINA DAYANIKLI VERSİYON
 
 import numpy as np
-from aiortc.rtp import RtpPacket
-from typing import List, Dict, Optional
+from rtp import RtpPacket
+from typing import List, Dict, Optional, Tuple
 from collections import deque
+from functools import lru_cache
 import struct
 import hashlib
+import time
+import zlib
+
+from nal_inspector import NAL_CLASS_IDR, NAL_CLASS_NON_REFERENCE, classify_h264_payload
+from gf256 import GF_MUL, MAX_GROUP_SIZE, cauchy_matrix, cauchy_row, gf_invert_matrix, gf_matmul
 
 # config.py'den import edilecek değerler
 FEC_PAYLOAD_TYPE = 127
 RED_PAYLOAD_TYPE = 100
 
+# Her FEC sembolünün başındaki kurtarma alanları: payload uzunluğu, timestamp, marker|PT
+SYMBOL_HEADER = struct.Struct('!HIB')
+
+# RFC 5109 ULPFEC: FEC header (E|L|P|X|CC, M|PT, SN base, TS recovery, length recovery)
+ULPFEC_HEADER = struct.Struct('!BBHIH')
+# ULP level 0 header: protection length + 16 bit maske (L=0) veya 48 bit maske (L=1)
+ULPFEC_LEVEL_SHORT = struct.Struct('!HH')
+ULPFEC_LEVEL_LONG = struct.Struct('!HHI')
+RTP_FIXED_HEADER = struct.Struct('!BBHII')
+
+# FEC wire format v2: [0x82 | satır | SN base | k | maske uzunluğu] + maske + CRC32
+# v1'in ilk byte'ı korunan paket sayısıdır (<= 16), böylece iki sürüm ilk byte'tan ayrılır
+FEC_V2_MARKER = 0x82
+FEC_V2_HEADER = struct.Struct('!BBHBB')
+FEC_V2_XOR_ROW = 0xFF  # Tüm katsayıları 1 olan XOR satırı (interleave parity'si)
+# FEC wire format v1: 16 bitlik SN maskesi, ancak header en fazla 10 katsayı taşır
+FEC_V1_MAX_GROUP_SIZE = 10
+
+# RFC 2198 RED: redundant blok header'ı F|PT (8 bit) + timestamp offset (14 bit) + uzunluk (10 bit)
+RED_BLOCK_HEADER = struct.Struct('!I')
+RED_MAX_TS_OFFSET = 0x3FFF
+RED_MAX_BLOCK_LENGTH = 0x3FF
+
+
+@lru_cache(maxsize=256)
+def _decode_matrix(group_size: int, missing_idx: Tuple[int, ...],
+                   equations: Tuple[Tuple[int, ...], ...]) -> np.ndarray:
+    """
+    Kayıp desenine göre terslenmiş çözüm matrisi (LRU cache'li)
+    Anahtar: (grup boyutu, kayıp pozisyonları, kullanılan parity satırları)
+    """
+    sub_matrix = np.array([[coeffs[i] for i in missing_idx] for coeffs in equations], dtype=np.uint8)
+    inverse = gf_invert_matrix(sub_matrix)
+    inverse.setflags(write=False)
+    return inverse
+
 
 class FecHandler:
     """
@@ -18,24 +60,96 @@ class FecHandler:
     Reed-Solomon benzeri sistematik kodlama + RED desteği
     """
 
-    def __init__(self, group_size=10, protection_level=0.3, enable_red=True):
+    def __init__(self, group_size=10, protection_level=0.3, enable_red=True,
+                 recovery_window_ms=200, streaming=False, flush_on_marker=False,
+                 interleave: Optional[Tuple[int, int]] = None, row_parity=False,
+                 fec_scheme='rs', header_version=2, red_distance=1, red_depth=1,
+                 nal_aware=False, critical_protection_level=0.5, red_mtu=1400):
         """
         group_size: Bir FEC grubundaki paket sayısı
         protection_level: FEC oranı (0.3 = %30 FEC paketi)
         enable_red: RED (Redundancy Encoding) aktif mi
+        recovery_window_ms: Alıcıda bir grubun kurtarılmak için bekletileceği süre
+        streaming: Parity her paket geldiğinde biriktirilir (grup sonunda hesaplama patlaması yok)
+        flush_on_marker: Frame sonunda (marker bit) yarım grup için parity hemen gönderilir
+        interleave: (L sütun, D satır) - SMPTE 2022-1 tarzı 2-D XOR FEC matrisi.
+                    Verilirse ardışık grup FEC'inin yerine geçer; L paketlik burst kurtarılır.
+        row_parity: Interleave modunda sütunlara ek olarak satır parity'si de üret
+        fec_scheme: 'rs' (Reed-Solomon, özel header) veya 'ulpfec' (RFC 5109 XOR,
+                    GStreamer rtpulpfecenc/rtpulpfecdec ile uyumlu)
+        header_version: RS FEC header sürümü (1: 16 paket/10 katsayı + MD5, 2: değişken maske + CRC32).
+                        Alıcı her iki sürümü de çözer.
+        red_distance: RED redundant blokları arasındaki paket mesafesi (iki uç da aynı değeri kullanmalı)
+        red_depth: RED paketindeki redundant blok sayısı
+        nal_aware: H.264 NAL sınıfına göre eşit olmayan koruma (SPS/PPS/IDR ve intra refresh
+                   recovery point SEI'si güçlü, atılabilir frame'ler korumasız; sınıf değişince
+                   grup kapatılır)
+        critical_protection_level: nal_aware modunda SPS/PPS/IDR gruplarının FEC oranı
+        red_mtu: RED paketinin (RTP header dahil) aşmaması gereken boyut; sığmayan en eski
+                 redundant bloklar atlanır (IP fragmentasyonu kaybı büyütür)
         """
         self.group_size = group_size
         self.protection_level = protection_level
         self.enable_red = enable_red
+        self.recovery_window = recovery_window_ms / 1000.0
+        self.streaming = streaming
+        self.flush_on_marker = flush_on_marker
+        self.interleave = interleave
+        self.row_parity = row_parity
+        self.fec_scheme = fec_scheme
+        self.header_version = header_version
+        self.nal_aware = nal_aware
+        self.critical_protection_level = critical_protection_level
+
+        if fec_scheme not in ('rs', 'ulpfec'):
+            raise ValueError(f"Bilinmeyen FEC şeması: {fec_scheme}")
+        if header_version not in (1, 2):
+            raise ValueError(f"Bilinmeyen FEC header sürümü: {header_version}")
+        if fec_scheme == 'rs' and group_size > self.max_group_size:
+            raise ValueError(f"Grup boyutu en fazla {self.max_group_size} olabilir: {group_size}")
+        if interleave and fec_scheme == 'rs' and header_version == 1:
+            columns, rows = interleave
+            # v1 header: 16 bitlik SN maskesi ve en fazla 10 katsayı
+            if columns * rows > 16 or rows > FEC_V1_MAX_GROUP_SIZE or columns > FEC_V1_MAX_GROUP_SIZE:
+                raise ValueError(f"Interleave matrisi v1 FEC header sınırını aşıyor: {columns}x{rows}")
+        self._interleave_buffer: List[RtpPacket] = []
+        self._group_critical = False
+        # Interleave modunda sütun başına parity sayısı (1: XOR, >1: RS/ULPFEC)
+        self.column_parity = 1
+        if interleave and fec_scheme == 'ulpfec':
+            columns, rows = interleave
+            # Matris içi satır/sütun parity SN'leri de 48 bitlik maskeye girer
+            if self.shape_span(rows, self.column_parity, columns) >= self.max_protected_span:
+                raise ValueError(f"Interleave matrisi ULPFEC maskesini aşıyor: {columns}x{rows}"
+                                 f"{' (satır parity ile)' if row_parity else ''}")
+        # set_fec_shape ile istenen (grup boyutu, parity, derinlik); bir sonraki pakette uygulanır
+        self._pending_shape: Optional[Tuple[int, int, int]] = None
 
         # Buffers
         self._media_packet_buffer = []
         self.tx_buffer = deque(maxlen=group_size * 2)
-        self.rx_buffer = {}
-        self.fec_buffer = {}
+
+        # Alıcı tarafı kalıcı çözücü durumu
+        self.rx_buffer: Dict[int, RtpPacket] = {}   # SN -> alınan/kurtarılan medya paketi
+        self.fec_buffer: Dict[tuple, dict] = {}     # korunan SN'ler -> bekleyen FEC denklemleri
+        self._seq_groups: Dict[int, set] = {}       # SN -> o SN'i koruyan bekleyen grup anahtarları
+        self._group_deadlines = deque()             # (son tarih, grup anahtarı) - oluşturma sırasında
+        self._rx_arrivals = deque()                 # (varış zamanı, SN) - süre aşımı için
+        self._last_expire_time = 0.0
+
+        # Kodlama matrisi - grup başına yeniden ayrılmaz, gerektiğinde büyür
+        self._encode_matrix = np.zeros((group_size, 1504), dtype=np.uint8)
+
+        # Streaming mod: açık grubun parity biriktiricileri
+        self._parity_acc = np.zeros((max(1, int(group_size * protection_level)), 1500), dtype=np.uint8)
+        self._acc_rows = 0
+        self._acc_width = 0
 
         # RED için
-        self.red_history_size = 3
+        self.red_distance = red_distance
+        self.red_depth = red_depth
+        self.red_mtu = red_mtu
+        self.red_history_size = red_distance * red_depth + 1
         self.red_buffer = deque(maxlen=self.red_history_size)
 
         # İstatistikler
@@ -44,7 +158,8 @@ class FecHandler:
             'packets_received': 0,
             'packets_recovered': 0,
             'packets_lost': 0,
-            'fec_packets_generated': 0
+            'fec_packets_generated': 0,
+            'red_blocks_skipped': 0
         }
 
     def protect(self, packet: RtpPacket) -> List[RtpPacket]:
@@ -52,95 +167,409 @@ class FecHandler:
         Paketi FEC ve RED ile korur
         Returns: Gönderilecek paketler listesi
         """
+        packets_to_send = self._protect(packet)
+        if self.shares_sequence_space:
+            # Aynı çağrıda birden fazla grup kapanabilir (şekil değişimi, sınıf değişimi):
+            # FEC SN'leri medya paketinden sonra ardışık verilir, gönderici bu kadar SN atlar
+            fec_index = 0
+            for pkt in packets_to_send:
+                if pkt.payload_type == FEC_PAYLOAD_TYPE:
+                    fec_index += 1
+                    pkt.sequence_number = (packet.sequence_number + fec_index) & 0xFFFF
+        return packets_to_send
+
+    def _protect(self, packet: RtpPacket) -> List[RtpPacket]:
         packets_to_send = [packet]
-        self._media_packet_buffer.append(packet)
         self.stats['packets_sent'] += 1
+        nal_class = classify_h264_payload(packet.payload) if self.nal_aware else None
 
-        # RED: Kritik paketler için redundant kopya
-        if self.enable_red and self._is_critical_packet(packet):
+        if self._pending_shape:
+            packets_to_send.extend(self._apply_pending_shape())
+
+        # RED: Kritik paketler için redundant kopya (geçmiş tüm paketleri tutar)
+        if self.enable_red:
+            self.red_buffer.append(packet)
+        if self.enable_red and self._is_critical_packet(packet, nal_class):
             red_packet = self._create_red_packet(packet)
             if red_packet:
                 packets_to_send.append(red_packet)
 
-        # FEC: Grup dolduğunda FEC paketleri oluştur
-        if len(self._media_packet_buffer) >= self.group_size:
-            fec_packets = self._generate_advanced_fec(self._media_packet_buffer[:self.group_size])
-            packets_to_send.extend(fec_packets)
-            self._media_packet_buffer = self._media_packet_buffer[self.group_size:]
+        # Atılabilir (non-reference) frame'ler için FEC bütçesi harcanmaz
+        if nal_class == NAL_CLASS_NON_REFERENCE:
+            return packets_to_send
+
+        if self.interleave:
+            packets_to_send.extend(self._protect_interleaved(packet))
+            return packets_to_send
+
+        # Grup sınırları: koruma sınıfı değişirse veya maske kapasitesi dolarsa grubu kapat
+        critical = nal_class is not None and nal_class >= NAL_CLASS_IDR
+        if self._media_packet_buffer and (critical != self._group_critical or self._span_exceeded(packet)):
+            packets_to_send.extend(self.flush())
+        if not self._media_packet_buffer:
+            self._group_critical = critical
+
+        self._media_packet_buffer.append(packet)
+        if self.streaming and self.fec_scheme == 'rs':
+            self._accumulate_parity(packet)
+
+        # FEC: Grup dolduğunda (veya frame sonunda) FEC paketleri oluştur
+        group_full = len(self._media_packet_buffer) >= self.group_size
+        if group_full or (self.flush_on_marker and packet.marker):
+            packets_to_send.extend(self.flush())
 
         return packets_to_send
 
-    def _is_critical_packet(self, packet: RtpPacket) -> bool:
+    def _protect_interleaved(self, packet: RtpPacket) -> List[RtpPacket]:
+        """
+        L x D matrisine paketleri satır satır yerleştirir.
+        Son satıra gelen her paket kendi sütununu tamamlar ve sütun parity'si hemen gönderilir;
+        böylece ardışık L paketlik bir burst her sütundan yalnızca bir paket götürür.
+        """
+        columns, rows = self.interleave
+        matrix = self._interleave_buffer
+        fec_packets = []
+        # Araya giren SN'ler (korumasız paketler, şekil değişimi FEC'i) sütunu maskeden taşırıyorsa
+        # yarım matris kapatılır ve paket yeni bir matrise başlar
+        if len(matrix) >= columns and self._span_exceeded(packet, matrix[len(matrix) % columns]):
+            fec_packets.extend(self._flush_interleaved())
+        matrix.append(packet)
+        position = len(matrix) - 1
+
+        # Satır parity'si: satırdaki L ardışık paket
+        if self.row_parity and (position + 1) % columns == 0:
+            fec_packets.extend(self._generate_xor_fec(matrix[position + 1 - columns:]))
+
+        # Sütun parity'si: c, c+L, c+2L, ... pozisyonlarındaki D paket
+        if position >= (rows - 1) * columns:
+            fec_packets.extend(self._generate_column_fec(matrix[position - (rows - 1) * columns::columns]))
+
+        if len(matrix) == columns * rows:
+            matrix.clear()
+
+        # Aynı pakette hem satır hem sütun parity'si çıkabilir: SN'leri ardışık ver
+        for i, fec_packet in enumerate(fec_packets):
+            fec_packet.sequence_number = (packet.sequence_number + i + 1) & 0xFFFF
+
+        return fec_packets
+
+    def _generate_column_fec(self, column: List[RtpPacket]) -> List[RtpPacket]:
+        """Interleave sütununun parity'si (column_parity > 1 ise RS/ULPFEC, değilse XOR)"""
+        if self.column_parity > 1:
+            return (self._generate_ulpfec(column, self.column_parity) if self.fec_scheme == 'ulpfec'
+                    else self._generate_advanced_fec(column, self.column_parity))
+        return self._generate_xor_fec(column)
+
+    def _flush_interleaved(self) -> List[RtpPacket]:
+        """Yarım matrisi kapatır: parity'si henüz gönderilmemiş sütunlar eldeki paketleriyle korunur"""
+        columns, rows = self.interleave
+        matrix = self._interleave_buffer
+        # Son satıra ulaşmış sütunların parity'si zaten gönderildi
+        completed = max(0, len(matrix) - (rows - 1) * columns)
+        fec_packets = []
+        for column in range(completed, min(columns, len(matrix))):
+            fec_packets.extend(self._generate_column_fec(matrix[column::columns]))
+        matrix.clear()
+        return fec_packets
+
+    @property
+    def shares_sequence_space(self) -> bool:
+        """
+        ULPFEC paketleri medya ile aynı SN uzayını kullanır (rtpulpfecenc gibi):
+        gönderici her FEC paketi için bir SN atlamalıdır.
+        """
+        return self.fec_scheme == 'ulpfec'
+
+    def _generate_xor_fec(self, media_packets: List[RtpPacket]) -> List[RtpPacket]:
+        """Tek satırlık XOR parity (tüm katsayılar 1)"""
+        if self.fec_scheme == 'ulpfec':
+            return [self._create_ulpfec_packet(media_packets, (media_packets[-1].sequence_number + 1) & 0xFFFF)]
+        coefficients = np.ones((1, len(media_packets)), dtype=np.uint8)
+        parity = np.bitwise_xor.reduce(self._pack_group(media_packets), axis=0)
+        return self._build_fec_packets(media_packets, coefficients, parity[None, :], [FEC_V2_XOR_ROW])
+
+    def flush(self) -> List[RtpPacket]:
+        """Açık grubu (yarım olsa bile) kapatır ve FEC paketlerini döndürür"""
+        if not self._media_packet_buffer:
+            return []
+
+        media_packets = self._media_packet_buffer
+        self._media_packet_buffer = []
+
+        if self.fec_scheme == 'ulpfec':
+            return self._generate_ulpfec(media_packets)
+        if not self.streaming:
+            return self._generate_advanced_fec(media_packets)
+
+        # Cauchy katsayıları grup boyutundan bağımsız: yarım grup için ilk satırlar yeterli
+        num_fec_packets = min(self._acc_rows, max(1, int(len(media_packets) * self._group_protection_level())))
+        coefficients = cauchy_matrix(num_fec_packets, len(media_packets))
+        fec_packets = self._build_fec_packets(media_packets, coefficients,
+                                              self._parity_acc[:num_fec_packets, :self._acc_width],
+                                              range(num_fec_packets))
+        self._acc_rows = 0
+        return fec_packets
+
+    def _accumulate_parity(self, packet: RtpPacket):
+        """Paketi açık grubun parity biriktiricilerine katlar"""
+        column = len(self._media_packet_buffer) - 1
+        if column == 0:
+            # Yeni grup: parity satır sayısı grup başında sabitlenir
+            self._acc_rows = max(1, int(self.group_size * self._group_protection_level()))
+            self._acc_width = 0
+
+        width = SYMBOL_HEADER.size + len(packet.payload)
+        acc = self._parity_acc
+        if acc.shape[0] < self._acc_rows or acc.shape[1] < width:
+            grown = np.zeros((max(self._acc_rows, acc.shape[0]), max(width, acc.shape[1])), dtype=np.uint8)
+            grown[:acc.shape[0], :self._acc_width] = acc[:, :self._acc_width]
+            self._parity_acc = acc = grown
+
+        rows = acc[:self._acc_rows]
+        if column == 0:
+            rows[:, :width] = 0
+        elif width > self._acc_width:
+            rows[:, self._acc_width:width] = 0
+        self._acc_width = max(self._acc_width, width)
+
+        symbol = np.frombuffer(
+            SYMBOL_HEADER.pack(len(packet.payload), packet.timestamp & 0xFFFFFFFF,
+                               (packet.marker << 7) | packet.payload_type) + packet.payload,
+            dtype=np.uint8
+        )
+        coeff_column = cauchy_matrix(self._acc_rows, column + 1)[:, column]
+        rows[:, :width] ^= GF_MUL[coeff_column[:, None], symbol[None, :]]
+
+    def _is_critical_packet(self, packet: RtpPacket, nal_class: Optional[int] = None) -> bool:
         """Paketin kritik olup olmadığını kontrol eder (keyframe vb.)"""
+        if nal_class is not None:
+            return nal_class >= NAL_CLASS_IDR
         # Marker bit genelde frame sonu/keyframe'i gösterir
         return packet.marker or (packet.sequence_number % 30 == 0)
 
-    def _create_red_packet(self, packet: RtpPacket) -> Optional[RtpPacket]:
-        """RED paketi oluşturur - önceki paketlerin kopyasını içerir"""
-        self.red_buffer.append(packet)
-
-        if len(self.red_buffer) < 2:
-            return None
-
-        red_payload = bytearray()
+    def _group_protection_level(self) -> float:
+        """Açık grubun FEC oranı (nal_aware modunda kritik gruplar daha güçlü korunur)"""
+        if self._group_critical:
+            return max(self.protection_level, self.critical_protection_level)
+        return self.protection_level
+
+    @property
+    def max_protected_span(self) -> int:
+        """FEC header'ının SN maskesinin kapsayabileceği en geniş SN aralığı"""
+        if self.fec_scheme == 'ulpfec':
+            return 48
+        if self.header_version == 1:
+            return 16
+        return 255 * 8
+
+    @property
+    def max_group_size(self) -> int:
+        """Tek FEC grubundaki en fazla medya paketi"""
+        if self.fec_scheme == 'rs':
+            return MAX_GROUP_SIZE if self.header_version == 2 else FEC_V1_MAX_GROUP_SIZE
+        return self.max_protected_span
+
+    def _span_exceeded(self, packet: RtpPacket, first: Optional[RtpPacket] = None) -> bool:
+        """
+        Yeni paket, ilk paketi first olan grubun (varsayılan: açık grup) SN maskesine sığmıyor mu
+        (atlanan paketler ve araya giren FEC SN'leri aralığı büyütür)
+        """
+        first = first or self._media_packet_buffer[0]
+        return (packet.sequence_number - first.sequence_number) & 0xFFFF >= self.max_protected_span
 
-        # RED header: [F|PT|timestamp_offset|length]
-        # F: More blocks flag (1 bit)
-        # PT: Payload type (7 bits)
+    def shape_span(self, group_size: int, parity_count: int, interleave_depth: int = 1) -> int:
+        """
+        Şeklin tek bir FEC maskesinde kapladığı SN aralığı (son - ilk korunan SN).
+        ULPFEC'te matris içinde gönderilen FEC paketleri de medya SN'leri arasına girer:
+        son satıra kadar her satır parity'si ve son satırda önceki sütunların parity'leri.
+        """
+        span = (group_size - 1) * interleave_depth
+        if self.shares_sequence_space and interleave_depth > 1:
+            span += (group_size - 1) * self.row_parity + (interleave_depth - 1) * parity_count
+        return span
 
-        # Önceki paket için header
-        prev_packet = self.red_buffer[-2]
-        ts_offset = (packet.timestamp - prev_packet.timestamp) & 0x3FFF
+    def set_fec_shape(self, group_size: int, parity_count: int, interleave_depth: int = 1):
+        """
+        Grup boyutu, parity sayısı ve interleave derinliğini birlikte değiştirir.
+        interleave_depth > 1: depth sütunlu, group_size satırlı matris; her sütun
+        (depth paket aralıklı group_size paket) parity_count FEC paketiyle korunur.
+        Açık grup bir sonraki pakette eski şekille kapatılır.
+        """
+        if group_size > self.max_group_size:
+            raise ValueError(f"Grup boyutu en fazla {self.max_group_size} olabilir: {group_size}")
+        if self.shape_span(group_size, parity_count, interleave_depth) >= self.max_protected_span:
+            raise ValueError(f"FEC şekli SN maskesini aşıyor: {group_size}+{parity_count}x{interleave_depth}")
+        if self.fec_shape != (group_size, parity_count, interleave_depth):
+            self._pending_shape = (group_size, parity_count, interleave_depth)
+
+    @property
+    def fec_shape(self) -> Tuple[int, int, int]:
+        """(grup boyutu, parity sayısı, interleave derinliği)"""
+        if self._pending_shape:
+            return self._pending_shape
+        if self.interleave:
+            columns, rows = self.interleave
+            return rows, self.column_parity, columns
+        return self.group_size, max(1, int(self.group_size * self.protection_level)), 1
+
+    def _apply_pending_shape(self) -> List[RtpPacket]:
+        group_size, parity_count, depth = self._pending_shape
+        self._pending_shape = None
+        fec_packets = self.flush()
+        interleave = (depth, group_size) if depth > 1 else None
+        if interleave != self.interleave and self._interleave_buffer:
+            fec_packets.extend(self._flush_interleaved())
+        self.interleave = interleave
+        self.group_size = group_size
+        self.column_parity = parity_count
+        # int(k * m/k) kayan nokta hatasıyla m-1 vermesin
+        self.protection_level = parity_count / group_size + 1e-9
+        return fec_packets
 
-        # Header byte: F=1 (more blocks), PT=96 (H264)
-        red_payload.append(0x80 | 96)
-        # Timestamp offset (14 bits) + Length (10 bits) = 24 bits = 3 bytes
-        red_payload.extend(struct.pack('!H', ts_offset << 2 | (len(prev_packet.payload) >> 8)))
-        red_payload.append(len(prev_packet.payload) & 0xFF)
-        # Önceki paketin payload'ı (truncated)
-        red_payload.extend(prev_packet.payload[:min(100, len(prev_packet.payload))])
+    def _create_red_packet(self, packet: RtpPacket) -> Optional[RtpPacket]:
+        """
+        RFC 2198 RED paketi oluşturur.
+        Redundant bloklar (en eskiden yeniye) primary'den red_distance, 2*red_distance, ...
+        paket önceki paketlerin tam payload'larıdır. Bloklar memoryview olarak toplanır
+        ve payload tek bir join ile kurulur.
+        Alıcı SN eşlemesini pozisyondan yaptığı için bloklar yalnızca en eski uçtan atlanır:
+        en yeniden başlanır, sınırları (10 bit uzunluk, 14 bit offset) veya red_mtu bütçesini
+        aşan ilk blokta durulur.
+        """
+        history = self.red_buffer
+        # Gönderilen RED paketi primary ile aynı header'ı (transport-cc extension dahil) taşır
+        budget = self.red_mtu - packet.header_size - len(packet.payload) - 1
+        headers = []
+        blocks = []
+        available = min(self.red_depth, (len(history) - 1) // self.red_distance)
+
+        for level in range(1, available + 1):
+            redundant = history[-1 - level * self.red_distance]
+            ts_offset = (packet.timestamp - redundant.timestamp) & 0xFFFFFFFF
+            size = RED_BLOCK_HEADER.size + len(redundant.payload)
+            if (ts_offset > RED_MAX_TS_OFFSET or len(redundant.payload) > RED_MAX_BLOCK_LENGTH
+                    or size > budget):
+                self.stats['red_blocks_skipped'] += available - level + 1
+                break
+            budget -= size
+            # Header: F=1 | PT (7) | timestamp offset (14) | block length (10)
+            headers.append(RED_BLOCK_HEADER.pack(((0x80 | redundant.payload_type) << 24) | (ts_offset << 10)
+                                                 | len(redundant.payload)))
+            blocks.append(memoryview(redundant.payload))
+
+        if not blocks:
+            return None
 
-        # Son blok için header (primary encoding)
-        red_payload.append(96)  # F=0, PT=96
-        # Mevcut paketin payload'ı
-        red_payload.extend(packet.payload)
+        headers.reverse()
+        blocks.reverse()
+        # Son blok için header (primary encoding): F=0 | PT
+        headers.append(bytes([packet.payload_type & 0x7F]))
 
         return RtpPacket(
             payload_type=RED_PAYLOAD_TYPE,
             sequence_number=packet.sequence_number,
             timestamp=packet.timestamp,
             ssrc=packet.ssrc,
-            payload=bytes(red_payload),
+            payload=b''.join([*headers, *blocks, memoryview(packet.payload)]),
             marker=packet.marker
         )
 
-    def _generate_advanced_fec(self, media_packets: List[RtpPacket]) -> List[RtpPacket]:
+    def _generate_ulpfec(self, media_packets: List[RtpPacket],
+                         num_fec_packets: Optional[int] = None) -> List[RtpPacket]:
         """
-        Sistematik FEC kodlaması - Reed-Solomon benzeri
-        Her FEC paketi farklı katsayılarla oluşturulur
+        RFC 5109 ULPFEC - tek seviyeli XOR parity
+        N FEC paketi gruba araya serpiştirilmiş maskelerle dağıtılır:
+        i. FEC paketi j % N == i olan medya paketlerini korur (ardışık kayıplar farklı FEC'lere düşer)
         """
-        num_fec_packets = max(1, int(len(media_packets) * self.protection_level))
-        fec_packets = []
+        if num_fec_packets is None:
+            num_fec_packets = max(1, int(len(media_packets) * self._group_protection_level()))
+        num_fec_packets = min(len(media_packets), num_fec_packets)
+        last_seq = media_packets[-1].sequence_number
+        return [
+            self._create_ulpfec_packet(media_packets[fec_idx::num_fec_packets], (last_seq + fec_idx + 1) & 0xFFFF)
+            for fec_idx in range(num_fec_packets)
+        ]
+
+    def _create_ulpfec_packet(self, media_packets: List[RtpPacket], sequence_number: int) -> RtpPacket:
+        """
+        ULPFEC paketi oluşturur. Sabit RTP header'dan sonraki her şey (CSRC, extension,
+        payload) XOR'lanır; hesaplama 8 byte hizalı uint64 görünümler üzerinde yapılır.
+        """
+        raw_packets = [p.serialize() for p in media_packets]
+        protection_length = max(len(raw) for raw in raw_packets) - RTP_FIXED_HEADER.size
+        width = (protection_length + 7) & ~7
+
+        rows = self._group_matrix(len(raw_packets), width)[:len(raw_packets), :width]
+        pxcc = mpt = ts = length = 0
+        for i, raw in enumerate(raw_packets):
+            body_len = len(raw) - RTP_FIXED_HEADER.size
+            rows[i, :body_len] = np.frombuffer(raw, dtype=np.uint8, offset=RTP_FIXED_HEADER.size)
+            rows[i, body_len:] = 0
+            pxcc ^= raw[0] & 0x3F
+            mpt ^= raw[1]
+            ts ^= media_packets[i].timestamp & 0xFFFFFFFF
+            length ^= body_len
+
+        parity = np.bitwise_xor.reduce(rows.view(np.uint64), axis=0).view(np.uint8)[:protection_length]
+
+        base_seq = media_packets[0].sequence_number
+        mask = 0
+        for p in media_packets:
+            mask |= 1 << (47 - ((p.sequence_number - base_seq) & 0xFFFF))
+
+        long_mask = any((p.sequence_number - base_seq) & 0xFFFF >= 16 for p in media_packets)
+        header = ULPFEC_HEADER.pack((long_mask << 6) | pxcc, mpt, base_seq, ts, length)
+        if long_mask:
+            level = ULPFEC_LEVEL_LONG.pack(protection_length, mask >> 32, mask & 0xFFFFFFFF)
+        else:
+            level = ULPFEC_LEVEL_SHORT.pack(protection_length, mask >> 32)
+
+        self.stats['fec_packets_generated'] += 1
+        return RtpPacket(
+            payload_type=FEC_PAYLOAD_TYPE,
+            sequence_number=sequence_number,
+            timestamp=media_packets[-1].timestamp,
+            ssrc=media_packets[0].ssrc,
+            payload=header + level + parity.tobytes()
+        )
+
+    def _generate_advanced_fec(self, media_packets: List[RtpPacket],
+                               num_fec_packets: Optional[int] = None) -> List[RtpPacket]:
+        """
+        Sistematik Reed-Solomon kodlaması - GF(2^8) üzerinde Cauchy matrisi
+        Tüm parity satırları tek bir vektörel geçişte hesaplanır
+        """
+        if num_fec_packets is None:
+            num_fec_packets = max(1, int(len(media_packets) * self._group_protection_level()))
 
         print(f"[FEC] {len(media_packets)} medya paketi için {num_fec_packets} FEC paketi oluşturuluyor")
 
-        for fec_idx in range(num_fec_packets):
-            # Her FEC paketi için farklı katsayılar
-            coefficients = self._generate_vandermonde_coefficients(fec_idx, len(media_packets))
+        coefficients = cauchy_matrix(num_fec_packets, len(media_packets))
+        parity = gf_matmul(coefficients, self._pack_group(media_packets))
+
+        return self._build_fec_packets(media_packets, coefficients, parity, range(num_fec_packets))
 
-            # FEC payload hesapla
-            fec_payload = self._calculate_fec_payload(media_packets, coefficients)
+    def _build_fec_packets(self, media_packets: List[RtpPacket], coefficients: np.ndarray,
+                           parity: np.ndarray, row_ids) -> List[RtpPacket]:
+        """Parity satırlarından header'lı FEC paketlerini oluşturur"""
+        fec_packets = []
+
+        for fec_idx, row_id in enumerate(row_ids):
+            parity_bytes = parity[fec_idx].tobytes()
 
             # FEC header oluştur
-            fec_header = self._create_fec_header(media_packets, coefficients)
+            if self.header_version == 2:
+                fec_header = self._create_fec_header_v2(media_packets, row_id, parity_bytes)
+            else:
+                fec_header = self._create_fec_header(media_packets, coefficients[fec_idx].tolist())
 
             # FEC paketi oluştur
             fec_packet = RtpPacket(
                 payload_type=FEC_PAYLOAD_TYPE,
-                sequence_number=media_packets[-1].sequence_number + fec_idx + 1,
+                sequence_number=(media_packets[-1].sequence_number + fec_idx + 1) & 0xFFFF,
                 timestamp=media_packets[-1].timestamp,
                 ssrc=media_packets[0].ssrc,
-                payload=fec_header + fec_payload
+                payload=fec_header + parity_bytes
             )
 
             fec_packets.append(fec_packet)
@@ -148,42 +577,41 @@ class FecHandler:
 
         return fec_packets
 
-    def _generate_vandermonde_coefficients(self, row: int, cols: int) -> List[int]:
+    def _group_matrix(self, rows: int, width: int) -> np.ndarray:
         """
-        Vandermonde matrisi katsayıları üretir
-        Sistematik kod için kullanılır
+        Paylaşılan kodlama matrisini döndürür; gerekirse büyütür.
+        Satır uzunluğu 8'in katı tutulur ki uint64 görünümleri alınabilsin.
         """
-        # GF(256) üzerinde Vandermonde matrisi
-        # Her satır: [1, a^i, a^(2i), ..., a^((cols-1)*i)]
-        # a = 2 (primitive element)
-        coeffs = []
-        base = pow(2, row + 1, 257)  # GF(257) kullanıyoruz basitlik için
-
-        for col in range(cols):
-            coeff = pow(base, col, 257) % 256
-            coeffs.append(coeff if coeff != 0 else 1)  # 0'dan kaçın
-
-        return coeffs
-
-    def _calculate_fec_payload(self, packets: List[RtpPacket], coeffs: List[int]) -> bytes:
+        matrix = self._encode_matrix
+        if matrix.shape[0] < rows or matrix.shape[1] < width:
+            matrix = np.zeros((max(rows, matrix.shape[0]), (max(width, matrix.shape[1]) + 7) & ~7),
+                              dtype=np.uint8)
+            self._encode_matrix = matrix
+        return matrix
+
+    def _pack_group(self, packets: List[RtpPacket]) -> np.ndarray:
         """
-        FEC payload'ı hesaplar - linear combination in GF(256)
+        Grubu önceden ayrılmış 2-D uint8 matrise yerleştirir.
+        Her satır: [uzunluk | timestamp | marker+PT | payload | sıfır padding]
+        Kurtarılan paketin orijinal uzunluğu ve header alanları da geri gelir.
         """
-        max_len = max(len(p.payload) for p in packets)
-        result = np.zeros(max_len, dtype=np.uint16)
-
-        for packet, coeff in zip(packets, coeffs):
-            # Paketi padding'le
-            padded = np.pad(
-                np.frombuffer(packet.payload, dtype=np.uint8),
-                (0, max_len - len(packet.payload)),
-                'constant'
-            )
-
-            # GF(256) üzerinde linear combination
-            result = (result + padded * coeff) % 256
-
-        return result.astype(np.uint8).tobytes()
+        rows = len(packets)
+        width = SYMBOL_HEADER.size + max(len(p.payload) for p in packets)
+
+        matrix = self._group_matrix(rows, width)
+        view = matrix[:rows, :width]
+        flat = memoryview(matrix).cast('B')
+        stride = matrix.shape[1]
+        for i, packet in enumerate(packets):
+            offset = i * stride
+            payload_len = len(packet.payload)
+            SYMBOL_HEADER.pack_into(flat, offset, payload_len, packet.timestamp & 0xFFFFFFFF,
+                                    (packet.marker << 7) | packet.payload_type)
+            start = offset + SYMBOL_HEADER.size
+            flat[start:start + payload_len] = packet.payload
+            view[i, SYMBOL_HEADER.size + payload_len:] = 0
+
+        return view
 
     def _create_fec_header(self, packets: List[RtpPacket], coeffs: List[int]) -> bytes:
         """
@@ -207,13 +635,13 @@ class FecHandler:
         # Sequence number bitmask (hangi paketler korunuyor)
         bitmask = 0
         for p in packets:
-            offset = p.sequence_number - base_seq
+            offset = (p.sequence_number - base_seq) & 0xFFFF
             if offset < 16:
                 bitmask |= (1 << offset)
         header.extend(struct.pack('!H', bitmask))
 
-        # Katsayılar (maksimum 10 tane)
-        for coeff in coeffs[:10]:
+        # Katsayılar (en fazla FEC_V1_MAX_GROUP_SIZE; grup boyutu kurucuda sınırlanır)
+        for coeff in coeffs[:FEC_V1_MAX_GROUP_SIZE]:
             header.append(coeff)
 
         # Padding
@@ -226,238 +654,456 @@ class FecHandler:
 
         return bytes(header)
 
-    def recover(self, received_packets: List[RtpPacket]) -> List[RtpPacket]:
+    def _create_fec_header_v2(self, packets: List[RtpPacket], row: int, parity: bytes) -> bytes:
         """
-        Kayıp paketleri FEC ve RED kullanarak kurtarır
-        Returns: Sıralı tüm paketler (alınan + kurtarılan)
+        FEC header v2
+        Format:
+        - 1 byte: Sürüm işareti (0x82)
+        - 1 byte: Katsayı satırı (Cauchy satır indeksi, 0xFF = XOR)
+        - 2 bytes: Base sequence number
+        - 1 byte: Korunan paket sayısı
+        - 1 byte: Maske uzunluğu (N byte)
+        - N bytes: Sequence number maskesi (MSB = base)
+        - 4 bytes: CRC32 (header + parity)
         """
-        media_packets = {}
-        fec_packets = []
-        red_packets = []
+        base_seq = packets[0].sequence_number
+        offsets = [(p.sequence_number - base_seq) & 0xFFFF for p in packets]
+        mask_len = max(offsets) // 8 + 1
+        if mask_len > 255:
+            raise ValueError(f"FEC v2 maskesi çok uzun: {mask_len} byte")
+
+        mask = bytearray(mask_len)
+        for offset in offsets:
+            mask[offset >> 3] |= 0x80 >> (offset & 7)
 
-        # Paketleri kategorize et
+        header = FEC_V2_HEADER.pack(FEC_V2_MARKER, row, base_seq, len(packets), mask_len) + mask
+        checksum = zlib.crc32(parity, zlib.crc32(header))
+        return header + struct.pack('!I', checksum)
+
+    def recover(self, received_packets: List[RtpPacket]) -> List[RtpPacket]:
+        """
+        Kayıp paketleri FEC ve RED kullanarak kurtarır (toplu arayüz)
+        Returns: Sıralı teslim edilebilir paketler (alınan + kurtarılan)
+        """
+        delivered = []
         for packet in received_packets:
-            if packet.payload_type == FEC_PAYLOAD_TYPE:
-                fec_packets.append(packet)
-            elif packet.payload_type == RED_PAYLOAD_TYPE:
-                red_packets.append(packet)
-                # RED'den primary payload'ı çıkar
-                primary = self._extract_primary_from_red(packet)
-                if primary:
-                    media_packets[primary.sequence_number] = primary
-            else:
-                media_packets[packet.sequence_number] = packet
-                self.stats['packets_received'] += 1
-
-        # İlk önce RED ile kurtarma dene
-        if red_packets:
-            recovered_from_red = self._recover_from_red(red_packets, media_packets)
-            media_packets.update(recovered_from_red)
-
-        # Sonra FEC ile kurtarma dene
-        if fec_packets:
-            recovered_from_fec = self._recover_using_fec(fec_packets, media_packets)
-            media_packets.update(recovered_from_fec)
-
-        # İstatistikleri güncelle
-        if media_packets:
-            expected_seqs = set(range(
-                min(media_packets.keys()),
-                max(media_packets.keys()) + 1
-            ))
-            missing = expected_seqs - media_packets.keys()
-            self.stats['packets_lost'] = len(missing)
+            delivered.extend(self.receive(packet))
+        return sorted(delivered, key=lambda p: p.sequence_number)
 
+    def receive(self, packet: RtpPacket, now: Optional[float] = None) -> List[RtpPacket]:
+        """
+        Alıcı tarafı kalıcı FEC çözücü - her paket geldiğinde çağrılır.
+        Medya ve FEC paketleri gruplara göre indekslenir; bir grup çözülebilir
+        hale geldiği anda kurtarma yapılır. Gruplar batch sınırına göre değil,
+        gecikme bütçesine (recovery_window) göre düşürülür.
+        Returns: Yeni teslim edilebilir medya paketleri
+        """
+        now = time.monotonic() if now is None else now
+        delivered = []
+
+        if packet.payload_type == FEC_PAYLOAD_TYPE:
+            self._add_fec_packet(packet, now, delivered)
+        elif packet.payload_type == RED_PAYLOAD_TYPE:
+            # RED'den primary payload'ı ve redundant blokları çıkar
+            primary = self._extract_primary_from_red(packet)
+            if primary:
+                self._add_media_packet(primary, now, delivered)
+            for recovered in self._recover_from_red([packet], self.rx_buffer).values():
+                self._add_media_packet(recovered, now, delivered)
+        else:
+            self.stats['packets_received'] += 1
+            self._add_media_packet(packet, now, delivered)
+
+        if now - self._last_expire_time >= 0.01:
+            self._expire(now)
+            self._last_expire_time = now
+
+        return delivered
+
+    def _add_media_packet(self, packet: RtpPacket, now: float, delivered: List[RtpPacket]):
+        """Medya paketini indeksler ve bu paketi bekleyen grupları çözmeyi dener"""
+        seq = packet.sequence_number
+        if seq in self.rx_buffer:
+            return
+
+        self.rx_buffer[seq] = packet
+        self._rx_arrivals.append((now, seq))
+        delivered.append(packet)
+
+        for key in list(self._seq_groups.get(seq, ())):
+            # Önceki kurtarma zinciri grubu silmiş olabilir
+            if key in self.fec_buffer:
+                self._try_recover_group(key, now, delivered)
+
+    def _add_fec_packet(self, fec_packet: RtpPacket, now: float, delivered: List[RtpPacket]):
+        """FEC paketini grubuna ekler ve grup çözülebilir ise hemen kurtarır"""
+        if self.fec_scheme == 'ulpfec':
+            parsed = self._parse_ulpfec_header(fec_packet)
+        else:
+            parsed = self._parse_fec_header(fec_packet)
+        if parsed is None:
+            return
+
+        protected_seqs, coeffs, parity = parsed
+        key = tuple(protected_seqs)
+        if all(seq in self.rx_buffer for seq in key):
+            return
+
+        group = self.fec_buffer.get(key)
+        if group is None:
+            group = {'equations': [], 'deadline': now + self.recovery_window}
+            self.fec_buffer[key] = group
+            self._group_deadlines.append((group['deadline'], key))
+            for seq in key:
+                self._seq_groups.setdefault(seq, set()).add(key)
+        group['equations'].append((coeffs, parity, fec_packet.ssrc))
+
+        self._try_recover_group(key, now, delivered)
+
+    def _try_recover_group(self, key: tuple, now: float, delivered: List[RtpPacket]):
+        """Grup tamamlandıysa siler, çözülebilir ise kayıpları kurtarır"""
+        group = self.fec_buffer[key]
+        missing = sum(1 for seq in key if seq not in self.rx_buffer)
+        if missing == 0:
+            self._drop_group(key)
+            return
+        # XOR (ULPFEC) denklemleri tek kayıp çözebilir
+        if self.fec_scheme == 'ulpfec':
+            solver, capacity = self._recover_ulpfec, 1
+        else:
+            solver, capacity = self._solve_group, len(group['equations'])
+        if missing > capacity:
+            return
+
+        self._drop_group(key)
+        try:
+            recovered = solver(list(key), group['equations'], self.rx_buffer)
+        except Exception as e:
+            print(f"[FEC] Recovery error: {e}")
+            return
+
+        for packet in recovered.values():
+            self._add_media_packet(packet, now, delivered)
+
+    def _drop_group(self, key: tuple):
+        """Grubu ve SN indeksindeki kayıtlarını siler"""
+        del self.fec_buffer[key]
+        for seq in key:
+            keys = self._seq_groups.get(seq)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._seq_groups[seq]
+
+    def _expire(self, now: float):
+        """Gecikme bütçesini aşan grupları ve eski medya paketlerini düşürür"""
+        deadlines = self._group_deadlines
+        while deadlines and deadlines[0][0] <= now:
+            deadline, key = deadlines.popleft()
+            group = self.fec_buffer.get(key)
+            # Grup çözülüp silinmiş veya aynı anahtarla yeniden oluşturulmuş olabilir
+            if group is None or group['deadline'] != deadline:
+                continue
+            missing = [seq for seq in key if seq not in self.rx_buffer]
+            self._drop_group(key)
             if missing:
-                print(f"[FEC] Kurtarılamayan paketler: {sorted(missing)}")
+                self.stats['packets_lost'] += len(missing)
+                print(f"[FEC] Kurtarılamayan paketler: {missing}")
+
+        horizon = now - self.recovery_window
+        while self._rx_arrivals and self._rx_arrivals[0][0] < horizon:
+            _, seq = self._rx_arrivals.popleft()
+            self.rx_buffer.pop(seq, None)
+
+    def _parse_red_payload(self, payload: bytes) -> Optional[Tuple[List[tuple], tuple]]:
+        """
+        RFC 2198 RED payload'ını çözer (kopyasız, memoryview dilimleri)
+        Returns: ([(PT, ts offset, blok), ...] en eskiden yeniye, (PT, primary blok)) veya None
+        """
+        view = memoryview(payload)
+        offset = 0
+        block_headers = []
+
+        # Header'lar: F=1 olanlar 4 byte, son (primary) header 1 byte
+        while True:
+            if offset >= len(view):
+                return None
+            if view[offset] & 0x80:
+                if offset + RED_BLOCK_HEADER.size > len(view):
+                    return None
+                (word,) = RED_BLOCK_HEADER.unpack_from(view, offset)
+                block_headers.append(((word >> 24) & 0x7F, (word >> 10) & RED_MAX_TS_OFFSET,
+                                      word & RED_MAX_BLOCK_LENGTH))
+                offset += RED_BLOCK_HEADER.size
+            else:
+                primary_pt = view[offset] & 0x7F
+                offset += 1
+                break
 
-        return sorted(media_packets.values(), key=lambda p: p.sequence_number)
+        redundant = []
+        for pt, ts_offset, length in block_headers:
+            if offset + length > len(view):
+                return None
+            redundant.append((pt, ts_offset, view[offset:offset + length]))
+            offset += length
+
+        return redundant, (primary_pt, view[offset:])
 
     def _extract_primary_from_red(self, red_packet: RtpPacket) -> Optional[RtpPacket]:
         """RED paketinden primary payload'ı çıkarır"""
-        try:
-            payload = red_packet.payload
-            offset = 0
-
-            # RED header'ları atla
-            while offset < len(payload):
-                header_byte = payload[offset]
-                offset += 1
+        parsed = self._parse_red_payload(red_packet.payload)
+        if parsed is None:
+            print(f"[FEC] RED extraction error: SN {red_packet.sequence_number}")
+            return None
 
-                if header_byte & 0x80:  # F bit set - more blocks
-                    # Skip timestamp offset (14 bits) + length (10 bits)
-                    if offset + 2 < len(payload):
-                        length = ((payload[offset] & 0x03) << 8) | payload[offset + 1]
-                        offset += 2 + length  # Skip header + block data
-                else:
-                    # Final block - primary encoding
-                    break
-
-            # Primary payload
-            if offset < len(payload):
-                return RtpPacket(
-                    payload_type=96,  # H264
-                    sequence_number=red_packet.sequence_number,
-                    timestamp=red_packet.timestamp,
-                    ssrc=red_packet.ssrc,
-                    payload=payload[offset:],
-                    marker=red_packet.marker
-                )
-        except Exception as e:
-            print(f"[FEC] RED extraction error: {e}")
+        primary_pt, block = parsed[1]
+        return RtpPacket(
+            payload_type=primary_pt,
+            sequence_number=red_packet.sequence_number,
+            timestamp=red_packet.timestamp,
+            ssrc=red_packet.ssrc,
+            payload=bytes(block),
+            marker=red_packet.marker
+        )
 
-        return None
+    def unwrap_red(self, red_packet: RtpPacket, existing) -> List[RtpPacket]:
+        """
+        RED paketini FEC çözücüsünü kullanmadan medya paketlerine açar (kurtarma başka
+        yerde yapılıyorsa, ör. GStreamer rtpulpfecdec). existing: SN ile sorgulanabilen
+        (in / get) alınmış paketler - bunlarda olan redundant bloklar atlanır.
+        Returns: Kurtarılan redundant paketler + primary
+        """
+        packets = list(self._recover_from_red([red_packet], existing).values())
+        primary = self._extract_primary_from_red(red_packet)
+        if primary:
+            packets.append(primary)
+        return packets
 
     def _recover_from_red(self, red_packets: List[RtpPacket],
                           existing: Dict[int, RtpPacket]) -> Dict[int, RtpPacket]:
-        """RED paketlerinden kayıp paketleri kurtarır"""
+        """
+        RED paketlerinden kayıp paketleri tam payload'larıyla kurtarır.
+        i. redundant bloğun SN'i: primary SN - red_distance * (blok sayısı - i)
+        RFC 2198 blokları marker bit'i taşımaz: sonraki paketin (SN + 1) timestamp'i
+        biliniyorsa ve farklıysa kurtarılan paket frame'in son paketidir.
+        """
         recovered = {}
 
         for red_packet in red_packets:
-            try:
-                payload = red_packet.payload
-                offset = 0
-                seq_offset = 0
-
-                # RED bloklarını parse et
-                while offset < len(payload):
-                    header_byte = payload[offset]
-                    offset += 1
-
-                    if header_byte & 0x80:  # More blocks
-                        if offset + 2 >= len(payload):
-                            break
-
-                        # Timestamp offset ve length
-                        ts_offset = (payload[offset] << 6) | (payload[offset + 1] >> 2)
-                        length = ((payload[offset + 1] & 0x03) << 8) | payload[offset + 2]
-                        offset += 2
-
-                        # Önceki paket
-                        prev_seq = red_packet.sequence_number - 1 - seq_offset
-
-                        if offset + length <= len(payload):
-                            if prev_seq not in existing and prev_seq not in recovered:
-                                recovered[prev_seq] = RtpPacket(
-                                    payload_type=96,
-                                    sequence_number=prev_seq,
-                                    timestamp=red_packet.timestamp - ts_offset,
-                                    ssrc=red_packet.ssrc,
-                                    payload=payload[offset:offset + length]
-                                )
-                                self.stats['packets_recovered'] += 1
-                                print(f"[FEC] RED ile kurtarıldı: SN {prev_seq}")
-
-                        offset += length
-                        seq_offset += 1
-                    else:
-                        break  # Primary encoding
-
-            except Exception as e:
-                print(f"[FEC] RED recovery error: {e}")
+            parsed = self._parse_red_payload(red_packet.payload)
+            if parsed is None:
+                print(f"[FEC] RED recovery error: SN {red_packet.sequence_number}")
                 continue
 
+            redundant = parsed[0]
+            # Bu RED paketindeki SN -> timestamp eşlemesi (primary dahil)
+            timestamps = {red_packet.sequence_number: red_packet.timestamp}
+            for i, (_, ts_offset, _) in enumerate(redundant):
+                seq = (red_packet.sequence_number - self.red_distance * (len(redundant) - i)) & 0xFFFF
+                timestamps[seq] = (red_packet.timestamp - ts_offset) & 0xFFFFFFFF
+
+            for i, (pt, ts_offset, block) in enumerate(redundant):
+                if not len(block):
+                    continue  # Yer tutucu blok (eski göndericiler)
+
+                prev_seq = (red_packet.sequence_number - self.red_distance * (len(redundant) - i)) & 0xFFFF
+                if prev_seq in existing or prev_seq in recovered:
+                    continue
+
+                timestamp = timestamps[prev_seq]
+                next_seq = (prev_seq + 1) & 0xFFFF
+                next_packet = existing.get(next_seq)
+                next_ts = next_packet.timestamp if next_packet is not None else timestamps.get(next_seq)
+                recovered[prev_seq] = RtpPacket(
+                    payload_type=pt,
+                    sequence_number=prev_seq,
+                    timestamp=timestamp,
+                    ssrc=red_packet.ssrc,
+                    payload=bytes(block),
+                    marker=int(next_ts is not None and next_ts != timestamp)
+                )
+                self.stats['packets_recovered'] += 1
+                print(f"[FEC] RED ile kurtarıldı: SN {prev_seq}")
+
         return recovered
 
-    def _recover_using_fec(self, fec_packets: List[RtpPacket],
-                           existing: Dict[int, RtpPacket]) -> Dict[int, RtpPacket]:
+    def protected_sequence_numbers(self, fec_packet: RtpPacket) -> List[int]:
+        """FEC paketinin koruduğu medya SN'leri (header çözülemezse boş)"""
+        parsed = (self._parse_ulpfec_header(fec_packet) if self.fec_scheme == 'ulpfec'
+                  else self._parse_fec_header(fec_packet))
+        return parsed[0] if parsed else []
+
+    def _parse_fec_header(self, fec_packet: RtpPacket) -> Optional[Tuple[List[int], Tuple[int, ...], bytes]]:
         """
-        FEC paketlerini kullanarak kayıp paketleri kurtarır
-        Gaussian elimination benzeri bir yöntem kullanır
+        FEC header'ını çözer
+        Returns: (korunan SN listesi, katsayı satırı, parity payload) veya None
         """
-        recovered = {}
+        payload = fec_packet.payload
+        if payload[:1] == bytes([FEC_V2_MARKER]):
+            return self._parse_fec_header_v2(payload)
+        if len(payload) < 19:
+            return None
 
-        for fec_packet in fec_packets:
-            try:
-                # FEC header'ı parse et
-                header = fec_packet.payload[:19]
-                if len(header) < 19:
-                    continue
+        num_protected = payload[0]
+        base_seq, bitmask = struct.unpack_from('!HH', payload, 1)
 
-                num_protected = header[0]
-                base_seq = struct.unpack('!H', header[1:3])[0]
-                bitmask = struct.unpack('!H', header[3:5])[0]
-                coeffs = list(header[5:15])
-
-                # Korunan paketleri belirle
-                protected_seqs = []
-                for i in range(16):
-                    if bitmask & (1 << i):
-                        protected_seqs.append(base_seq + i)
-
-                if len(protected_seqs) != num_protected:
-                    protected_seqs = list(range(base_seq, base_seq + num_protected))
-
-                # Kayıp paketleri bul
-                missing = [seq for seq in protected_seqs if seq not in existing]
-
-                # Sadece 1 kayıp varsa kurtarabiliriz
-                if len(missing) == 1:
-                    missing_seq = missing[0]
-                    fec_payload = fec_packet.payload[19:]
-
-                    # FEC hesaplamasını tersine çevir
-                    result = np.frombuffer(fec_payload, dtype=np.uint8).copy()
-
-                    # Bilinen paketleri çıkar
-                    for i, seq in enumerate(protected_seqs):
-                        if seq in existing and i < len(coeffs):
-                            packet_payload = existing[seq].payload
-                            padded = np.pad(
-                                np.frombuffer(packet_payload, dtype=np.uint8),
-                                (0, len(result) - len(packet_payload)),
-                                'constant'
-                            )
-                            # GF(256) subtraction
-                            result = (result - padded * coeffs[i]) % 256
-
-                    # Kayıp paketin katsayısıyla böl
-                    missing_idx = protected_seqs.index(missing_seq)
-                    if missing_idx < len(coeffs) and coeffs[missing_idx] != 0:
-                        # Modular inverse in GF(256)
-                        inv_coeff = self._gf256_inverse(coeffs[missing_idx])
-                        result = (result * inv_coeff) % 256
-
-                        # Kurtarılan paketi oluştur
-                        recovered[missing_seq] = RtpPacket(
-                            payload_type=96,
-                            sequence_number=missing_seq,
-                            timestamp=existing[protected_seqs[0]].timestamp,
-                            ssrc=existing[protected_seqs[0]].ssrc,
-                            payload=result.tobytes()
-                        )
-                        self.stats['packets_recovered'] += 1
-                        print(f"[FEC] FEC ile kurtarıldı: SN {missing_seq}")
-
-                # Birden fazla kayıp varsa daha karmaşık kurtarma
-                elif 2 <= len(missing) <= 3 and len(fec_packets) >= len(missing):
-                    # TODO: Matrix inversion ile çoklu kurtarma
-                    pass
-
-            except Exception as e:
-                print(f"[FEC] Recovery error: {e}")
-                continue
+        # v1 header en fazla FEC_V1_MAX_GROUP_SIZE katsayı taşır
+        if num_protected == 0 or num_protected > FEC_V1_MAX_GROUP_SIZE:
+            return None
+        coeffs = tuple(payload[5:5 + num_protected])
 
-        return recovered
+        # Korunan paketleri belirle
+        protected_seqs = [(base_seq + i) & 0xFFFF for i in range(16) if bitmask & (1 << i)]
+        if len(protected_seqs) != num_protected:
+            protected_seqs = [(base_seq + i) & 0xFFFF for i in range(num_protected)]
+
+        return protected_seqs, coeffs, payload[19:]
+
+    def _parse_fec_header_v2(self, payload: bytes) -> Optional[Tuple[List[int], Tuple[int, ...], bytes]]:
+        """FEC header v2'yi çözer ve CRC32'yi doğrular"""
+        if len(payload) < FEC_V2_HEADER.size + 4:
+            return None
+
+        _, row, base_seq, num_protected, mask_len = FEC_V2_HEADER.unpack_from(payload, 0)
+        header_len = FEC_V2_HEADER.size + mask_len
+        if num_protected == 0 or len(payload) < header_len + 4:
+            return None
+
+        parity = payload[header_len + 4:]
+        (checksum,) = struct.unpack_from('!I', payload, header_len)
+        if zlib.crc32(parity, zlib.crc32(payload[:header_len])) != checksum:
+            print("[FEC] v2 CRC hatası, FEC paketi atlandı")
+            return None
+
+        mask = payload[FEC_V2_HEADER.size:header_len]
+        protected_seqs = [(base_seq + i) & 0xFFFF for i in range(mask_len * 8)
+                          if mask[i >> 3] & (0x80 >> (i & 7))]
+        if len(protected_seqs) != num_protected:
+            return None
+
+        if row == FEC_V2_XOR_ROW:
+            coeffs = (1,) * num_protected
+        elif num_protected <= MAX_GROUP_SIZE:
+            coeffs = cauchy_row(row, num_protected)
+        else:
+            return None
+
+        return protected_seqs, coeffs, parity
+
+    def _parse_ulpfec_header(self, fec_packet: RtpPacket) -> Optional[Tuple[List[int], tuple, bytes]]:
+        """
+        RFC 5109 ULPFEC header'ını çözer (yalnızca seviye 0)
+        Returns: (korunan SN listesi, kurtarma alanları, parity payload) veya None
+        """
+        payload = fec_packet.payload
+        if len(payload) < ULPFEC_HEADER.size + ULPFEC_LEVEL_SHORT.size:
+            return None
 
-    def _gf256_inverse(self, a: int) -> int:
-        """GF(256) üzerinde modular inverse hesaplar"""
-        # Extended Euclidean algorithm
-        if a == 0:
-            return 0
+        flags, mpt, base_seq, ts, length = ULPFEC_HEADER.unpack_from(payload, 0)
+        if flags & 0x80:
+            return None  # E biti rezerve
+
+        if flags & 0x40:
+            if len(payload) < ULPFEC_HEADER.size + ULPFEC_LEVEL_LONG.size:
+                return None
+            protection_length, mask_hi, mask_lo = ULPFEC_LEVEL_LONG.unpack_from(payload, ULPFEC_HEADER.size)
+            mask, offset = (mask_hi << 32) | mask_lo, ULPFEC_HEADER.size + ULPFEC_LEVEL_LONG.size
+        else:
+            protection_length, mask_hi = ULPFEC_LEVEL_SHORT.unpack_from(payload, ULPFEC_HEADER.size)
+            mask, offset = mask_hi << 32, ULPFEC_HEADER.size + ULPFEC_LEVEL_SHORT.size
+
+        protected_seqs = [(base_seq + i) & 0xFFFF for i in range(48) if mask & (1 << (47 - i))]
+        if not protected_seqs:
+            return None
 
-        # GF(256) için a^254 = a^-1 (Fermat's little theorem)
-        result = 1
-        power = 254
-        base = a
+        return protected_seqs, (flags & 0x3F, mpt, ts, length), payload[offset:offset + protection_length]
 
-        while power > 0:
-            if power & 1:
-                result = (result * base) % 257
-            base = (base * base) % 257
-            power >>= 1
+    def _recover_ulpfec(self, protected_seqs: List[int], equations: List[tuple],
+                        existing: Dict[int, RtpPacket]) -> Dict[int, RtpPacket]:
+        """Tek kayıplı ULPFEC kurtarma: eksik paket = FEC XOR (bilinen paketler)"""
+        missing = [seq for seq in protected_seqs if seq not in existing]
+        if len(missing) != 1:
+            return {}
 
-        return result % 256
+        (pxcc, mpt, ts, length), parity, ssrc = equations[0]
+        body = np.frombuffer(parity, dtype=np.uint8).copy()
+        for seq in protected_seqs:
+            if seq == missing[0]:
+                continue
+            raw = existing[seq].serialize()
+            known = np.frombuffer(raw, dtype=np.uint8, offset=RTP_FIXED_HEADER.size)[:len(body)]
+            body[:len(known)] ^= known
+            pxcc ^= raw[0] & 0x3F
+            mpt ^= raw[1]
+            ts ^= existing[seq].timestamp & 0xFFFFFFFF
+            length ^= len(raw) - RTP_FIXED_HEADER.size
+
+        if length > len(body):
+            return {}
+
+        header = RTP_FIXED_HEADER.pack(0x80 | pxcc, mpt, missing[0], ts, ssrc)
+        packet = RtpPacket.parse(header + body[:length].tobytes())
+        self.stats['packets_recovered'] += 1
+        print(f"[FEC] ULPFEC ile kurtarıldı: SN {missing[0]}")
+        return {missing[0]: packet}
+
+    def _solve_group(self, protected_seqs: List[int], equations: List[tuple],
+                     existing: Dict[int, RtpPacket]) -> Dict[int, RtpPacket]:
+        """
+        Bir grubun kayıp paketlerini çözer: D_kayıp = A^-1 * (P - C_bilinen * D_bilinen)
+        """
+        missing_idx = [i for i, seq in enumerate(protected_seqs) if seq not in existing]
+        if not missing_idx or len(missing_idx) > len(equations):
+            return {}
+
+        known_idx = [i for i in range(len(protected_seqs)) if i not in missing_idx]
+        used = equations[:len(missing_idx)]
+        width = min(len(parity) for _, parity, _ in used)
+
+        # Sendromlar: parity'den bilinen paketlerin katkısı çıkarılır (GF(256)'da çıkarma = XOR)
+        syndromes = np.empty((len(used), width), dtype=np.uint8)
+        for row, (_, parity, _) in enumerate(used):
+            syndromes[row] = np.frombuffer(parity, dtype=np.uint8, count=width)
+
+        if known_idx:
+            coeff_matrix = np.array([coeffs for coeffs, _, _ in used], dtype=np.uint8)
+            known_data = self._pack_group([existing[protected_seqs[i]] for i in known_idx])
+            known_width = min(known_data.shape[1], width)
+            syndromes[:, :known_width] ^= gf_matmul(coeff_matrix[:, known_idx],
+                                                    known_data[:, :known_width])
+
+        decode_matrix = _decode_matrix(len(protected_seqs), tuple(missing_idx),
+                                       tuple(coeffs for coeffs, _, _ in used))
+        symbols = gf_matmul(decode_matrix, syndromes)
+
+        recovered = {}
+        ssrc = used[0][2]
+        for row, idx in enumerate(missing_idx):
+            seq = protected_seqs[idx]
+            packet = self._unpack_symbol(symbols[row], seq, ssrc)
+            if packet:
+                recovered[seq] = packet
+                self.stats['packets_recovered'] += 1
+                print(f"[FEC] FEC ile kurtarıldı: SN {seq}")
+
+        return recovered
+
+    def _unpack_symbol(self, symbol: np.ndarray, seq: int, ssrc: int) -> Optional[RtpPacket]:
+        """Kurtarılan sembolden orijinal RTP paketini yeniden kurar"""
+        if len(symbol) < SYMBOL_HEADER.size:
+            return None
+        length, timestamp, marker_pt = SYMBOL_HEADER.unpack_from(symbol.tobytes(), 0)
+        end = SYMBOL_HEADER.size + length
+        if end > len(symbol):
+            return None
+        return RtpPacket(
+            payload_type=marker_pt & 0x7F,
+            sequence_number=seq,
+            timestamp=timestamp,
+            ssrc=ssrc,
+            payload=symbol[SYMBOL_HEADER.size:end].tobytes(),
+            marker=marker_pt >> 7
+        )
 
     def get_stats(self) -> Dict:
         """İstatistikleri döndürür"""
@@ -0,0 +1,147 @@
+# retransmission.py - NACK TABANLI SEÇİCİ YENİDEN İLETİM (RTX, RFC 4588)
+"""
+Gönderici tarafı paket geçmişi: gönderilen paketler seq & mask slotlarında
+serialize edilmiş halde tutulur. NACK'lenen paketler ayrı SSRC ve PT ile
+RTX paketi olarak (OSN + orijinal payload) yeniden gönderilir.
+"""
+import struct
+import time
+from typing import List, Optional, Dict
+
+from rtp import RtpPacket
+
+RTX_PAYLOAD_TYPE = 97
+RTP_FIXED_HEADER_SIZE = 12
+
+
+def _rtp_header_length(data: bytes) -> int:
+    """CSRC listesi ve header extension dahil RTP header uzunluğu"""
+    length = RTP_FIXED_HEADER_SIZE + 4 * (data[0] & 0x0F)
+    if data[0] & 0x10 and len(data) >= length + 4:
+        length += 4 + 4 * struct.unpack_from('!H', data, length + 2)[0]
+    return length
+
+
+class RtxSender:
+    """
+    Sınırlı, sequence number indeksli gönderim geçmişi ve RTX üretici.
+    Yeniden iletim token bucket ile bant genişliği sınırlıdır; aynı paket
+    bir RTT içinde ikinci kez gönderilmez.
+    """
+
+    def __init__(self,
+                 capacity: int = 1024,
+                 rtx_payload_type: int = RTX_PAYLOAD_TYPE,
+                 rtx_ssrc: int = 0,
+                 max_bitrate: int = 1000000):
+        """
+        capacity: Geçmişte tutulan paket sayısı (2'nin kuvveti)
+        rtx_payload_type: RTX paketlerinin PT'si
+        rtx_ssrc: RTX akışının SSRC'si (RFC 4588 session multiplexing)
+        max_bitrate: Yeniden iletim için ayrılan maksimum bitrate (bps)
+        """
+        if capacity & (capacity - 1):
+            raise ValueError(f"Kapasite 2'nin kuvveti olmalı: {capacity}")
+
+        self.capacity = capacity
+        self._mask = capacity - 1
+        self._seqs: List[Optional[int]] = [None] * capacity
+        self._packets: List[Optional[bytes]] = [None] * capacity
+        self._last_resent = [0.0] * capacity
+
+        self.rtx_payload_type = rtx_payload_type
+        self.rtx_ssrc = rtx_ssrc
+        self._rtx_seq = 0
+
+        # Token bucket (byte): en fazla 250 ms'lik patlama
+        self.max_bitrate = max_bitrate
+        self._bucket_size = max_bitrate / 8 * 0.25
+        self._tokens = self._bucket_size
+        self._last_refill = time.monotonic()
+
+        self.stats = {
+            'nacks_received': 0,
+            'packets_requested': 0,
+            'packets_retransmitted': 0,
+            'not_in_history': 0,
+            'rate_limited': 0
+        }
+
+    def store(self, sequence_number: int, data: bytes):
+        """Gönderilen paketi geçmişe ekler (slotu eski paketin üzerine yazar)"""
+        index = sequence_number & self._mask
+        self._seqs[index] = sequence_number
+        self._packets[index] = data
+        self._last_resent[index] = 0.0
+
+    def on_nack(self, seqs: List[int], rtt_ms: Optional[float] = None) -> List[bytes]:
+        """
+        NACK'lenen paketler için gönderilecek RTX paketlerini döndürür
+        """
+        now = time.monotonic()
+        self._refill(now)
+        min_interval = (rtt_ms if rtt_ms else 100) / 1000.0
+        self.stats['nacks_received'] += 1
+
+        rtx_packets = []
+        for seq in seqs:
+            self.stats['packets_requested'] += 1
+            index = seq & self._mask
+            data = self._packets[index]
+            if data is None or self._seqs[index] != seq:
+                self.stats['not_in_history'] += 1
+                continue
+            if now - self._last_resent[index] < min_interval:
+                continue
+            if self._tokens < len(data):
+                self.stats['rate_limited'] += 1
+                continue
+
+            self._tokens -= len(data)
+            self._last_resent[index] = now
+            rtx_packets.append(self._build_rtx(data, seq))
+            self.stats['packets_retransmitted'] += 1
+
+        return rtx_packets
+
+    def _refill(self, now: float):
+        self._tokens = min(self._bucket_size,
+                           self._tokens + (now - self._last_refill) * self.max_bitrate / 8)
+        self._last_refill = now
+
+    def _build_rtx(self, data: bytes, sequence_number: int) -> bytes:
+        """
+        RFC 4588 RTX paketi: orijinal header (PT, SN, SSRC değişmiş) + OSN + payload.
+        Orijinal padding atılır.
+        """
+        header_length = _rtp_header_length(data)
+        end = len(data)
+        if data[0] & 0x20:
+            end -= data[-1]
+
+        header = bytearray(data[:header_length])
+        header[0] &= ~0x20 & 0xFF
+        header[1] = (data[1] & 0x80) | self.rtx_payload_type
+        struct.pack_into('!H', header, 2, self._rtx_seq)
+        struct.pack_into('!I', header, 8, self.rtx_ssrc)
+        self._rtx_seq = (self._rtx_seq + 1) & 0xFFFF
+
+        return bytes(header) + struct.pack('!H', sequence_number) + data[header_length:end]
+
+    def get_stats(self) -> Dict:
+        return self.stats
+
+
+def unwrap_rtx(packet: RtpPacket, media_payload_type: int, media_ssrc: int) -> Optional[RtpPacket]:
+    """RTX paketinden orijinal medya paketini geri oluşturur"""
+    if len(packet.payload) < 2:
+        return None
+    original = RtpPacket(payload_type=media_payload_type,
+                         marker=packet.marker,
+                         sequence_number=struct.unpack_from('!H', packet.payload)[0],
+                         timestamp=packet.timestamp,
+                         ssrc=media_ssrc,
+                         payload=packet.payload[2:])
+    original.csrc = packet.csrc
+    original.extension_profile, original.extension = packet.extension_profile, packet.extension
+    return original
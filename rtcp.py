@@ -0,0 +1,474 @@
+# rtcp.py - RTCP PAKET OLUŞTURMA VE AYRIŞTIRMA
+"""
+RTCP compound paket oluşturma/ayrıştırma.
+- SR/RR (RFC 3550): NTP zaman damgası, genişletilmiş en yüksek SN, interarrival
+  jitter ve LSR/DLSR ile gönderici tarafında RTT hesabı
+- SDES CNAME (compound paketin zorunlu parçası)
+- RFC 4585 transport feedback: generic NACK (RTPFB, FMT=1) kayıp paketleri
+  PID + BLP çiftleriyle bildirir
+- Transport-wide congestion control feedback (RTPFB, FMT=15,
+  draft-holmer-rmcat-transport-wide-cc-extensions): paket başına varış zamanı
+- Keyframe istekleri: PLI (PSFB, FMT=1, RFC 4585) ve FIR (PSFB, FMT=4, RFC 5104)
+"""
+import struct
+import time
+from collections import namedtuple
+from typing import Iterator, List, Optional, Tuple
+
+RTCP_VERSION = 2
+
+# RTCP paket tipleri
+RTCP_SR = 200
+RTCP_RR = 201
+RTCP_SDES = 202
+RTCP_BYE = 203
+RTCP_RTPFB = 205   # Transport layer feedback (RFC 4585)
+RTCP_PSFB = 206    # Payload-specific feedback (RFC 4585)
+
+# RTPFB FMT değerleri
+RTPFB_GENERIC_NACK = 1
+RTPFB_TRANSPORT_FEEDBACK = 15
+
+# PSFB FMT değerleri
+PSFB_PLI = 1
+PSFB_FIR = 4
+
+# SDES eleman tipleri
+SDES_CNAME = 1
+
+# 1900 ile 1970 arasındaki saniye farkı (NTP epoch)
+NTP_EPOCH_OFFSET = 2208988800
+
+RTCP_HEADER = '!BBH'          # V/P/count, PT, uzunluk (32 bit kelime - 1)
+SENDER_INFO = '!IIIII'        # NTP saniye, NTP kesir, RTP timestamp, paket sayısı, byte sayısı
+REPORT_BLOCK = '!IIIIII'      # SSRC, kayıp oranı + toplam kayıp, en yüksek SN, jitter, LSR, DLSR
+FEEDBACK_SSRCS = '!II'        # Gönderen SSRC, medya kaynağı SSRC
+NACK_ITEM = '!HH'             # PID, BLP
+FIR_ITEM = '!IB3x'            # Hedef SSRC, komut sequence number, ayrılmış
+TRANSPORT_FEEDBACK_HEADER = '!HHI'  # Base SN, paket durum sayısı, referans zamanı (24 bit) + feedback sayacı
+
+# Transport-wide feedback paket durumları ve zaman birimleri
+TWCC_NOT_RECEIVED = 0
+TWCC_SMALL_DELTA = 1          # 1 byte, 0..63.75 ms
+TWCC_LARGE_DELTA = 2          # 2 byte işaretli
+TWCC_DELTA_UNIT_US = 250
+TWCC_REFERENCE_UNIT_US = 64000
+
+ReportBlock = namedtuple('ReportBlock', ['ssrc', 'fraction_lost', 'cumulative_lost',
+                                         'highest_seq', 'jitter', 'lsr', 'dlsr'])
+
+
+def ntp_timestamp(wallclock: Optional[float] = None) -> Tuple[int, int]:
+    """Duvar saatini 64 bit NTP zaman damgasına (saniye, kesir) çevirir"""
+    wallclock = time.time() if wallclock is None else wallclock
+    seconds = int(wallclock)
+    return (seconds + NTP_EPOCH_OFFSET) & 0xFFFFFFFF, int((wallclock - seconds) * (1 << 32)) & 0xFFFFFFFF
+
+
+def ntp_compact(wallclock: Optional[float] = None) -> int:
+    """NTP zaman damgasının orta 32 biti (16.16 sabit nokta, LSR/DLSR formatı)"""
+    seconds, fraction = ntp_timestamp(wallclock)
+    return ((seconds & 0xFFFF) << 16) | (fraction >> 16)
+
+
+def round_trip_time(block: ReportBlock, wallclock: Optional[float] = None) -> Optional[float]:
+    """
+    Gönderici tarafı RTT (saniye): A - LSR - DLSR (RFC 3550 6.4.1).
+    Alıcı henüz SR almadıysa (LSR=0) None döner.
+    """
+    if block.lsr == 0:
+        return None
+    rtt = (ntp_compact(wallclock) - block.lsr - block.dlsr) & 0xFFFFFFFF
+    if rtt & 0x80000000:
+        return None
+    return rtt / 65536.0
+
+
+def iter_rtcp_packets(data: bytes) -> Iterator[Tuple[int, int, memoryview]]:
+    """
+    Compound RTCP paketini gezer: (count/FMT, PT, gövde) üçlüleri döndürür.
+    Bozuk uzunlukta ayrıştırma durur.
+    """
+    view = memoryview(data)
+    offset = 0
+    while offset + 4 <= len(view):
+        first, pt, length = struct.unpack_from(RTCP_HEADER, view, offset)
+        if first >> 6 != RTCP_VERSION:
+            return
+        end = offset + (length + 1) * 4
+        if end > len(view):
+            return
+        yield first & 0x1F, pt, view[offset + 4:end]
+        offset = end
+
+
+def _pack_report_blocks(blocks: List[ReportBlock]) -> bytes:
+    return b''.join(
+        struct.pack(REPORT_BLOCK, block.ssrc,
+                    (block.fraction_lost << 24) | (block.cumulative_lost & 0xFFFFFF),
+                    block.highest_seq, block.jitter, block.lsr, block.dlsr)
+        for block in blocks)
+
+
+def _parse_report_blocks(body: memoryview, offset: int, count: int) -> List[ReportBlock]:
+    blocks = []
+    for _ in range(count):
+        if offset + 24 > len(body):
+            break
+        ssrc, lost, highest_seq, jitter, lsr, dlsr = struct.unpack_from(REPORT_BLOCK, body, offset)
+        cumulative_lost = lost & 0xFFFFFF
+        if cumulative_lost & 0x800000:    # 24 bit işaretli (duplicate paketler negatif yapabilir)
+            cumulative_lost -= 0x1000000
+        blocks.append(ReportBlock(ssrc, lost >> 24, cumulative_lost, highest_seq, jitter, lsr, dlsr))
+        offset += 24
+    return blocks
+
+
+def build_sender_report(ssrc: int, rtp_timestamp: int, packet_count: int, octet_count: int,
+                        blocks: Optional[List[ReportBlock]] = None,
+                        wallclock: Optional[float] = None) -> bytes:
+    """Sender Report: gönderici bilgisi + (varsa) alım raporları"""
+    blocks = blocks or []
+    ntp_seconds, ntp_fraction = ntp_timestamp(wallclock)
+    body = (struct.pack('!I', ssrc)
+            + struct.pack(SENDER_INFO, ntp_seconds, ntp_fraction, rtp_timestamp & 0xFFFFFFFF,
+                          packet_count & 0xFFFFFFFF, octet_count & 0xFFFFFFFF)
+            + _pack_report_blocks(blocks))
+    return struct.pack(RTCP_HEADER, (RTCP_VERSION << 6) | len(blocks), RTCP_SR, len(body) // 4) + body
+
+
+def build_receiver_report(ssrc: int, blocks: List[ReportBlock]) -> bytes:
+    body = struct.pack('!I', ssrc) + _pack_report_blocks(blocks)
+    return struct.pack(RTCP_HEADER, (RTCP_VERSION << 6) | len(blocks), RTCP_RR, len(body) // 4) + body
+
+
+def build_sdes_cname(ssrc: int, cname: str) -> bytes:
+    """Tek kaynaklı SDES paketi (CNAME), 32 bit sınırına null ile doldurulur"""
+    text = cname.encode('utf-8')[:255]
+    chunk = struct.pack('!IBB', ssrc, SDES_CNAME, len(text)) + text + b'\x00'
+    chunk += b'\x00' * (-len(chunk) % 4)
+    return struct.pack(RTCP_HEADER, (RTCP_VERSION << 6) | 1, RTCP_SDES, len(chunk) // 4) + chunk
+
+
+def parse_sender_report(body: memoryview, count: int):
+    """SR gövdesi -> (ssrc, ntp_saniye, ntp_kesir, rtp_timestamp, paket, byte, raporlar)"""
+    if len(body) < 24:
+        return None
+    ssrc = struct.unpack_from('!I', body)[0]
+    ntp_seconds, ntp_fraction, rtp_timestamp, packets, octets = struct.unpack_from(SENDER_INFO, body, 4)
+    return ssrc, ntp_seconds, ntp_fraction, rtp_timestamp, packets, octets, _parse_report_blocks(body, 24, count)
+
+
+def parse_receiver_report(body: memoryview, count: int):
+    """RR gövdesi -> (ssrc, raporlar)"""
+    if len(body) < 4:
+        return None
+    return struct.unpack_from('!I', body)[0], _parse_report_blocks(body, 4, count)
+
+
+class ReceptionStatistics:
+    """
+    Tek bir kaynağın alım istatistikleri (RFC 3550 A.1 / A.3).
+    Sequence cycle takibi ile genişletilmiş en yüksek SN, toplam ve aralık
+    kaybı hesaplanır; son SR'ın LSR/DLSR bilgisi saklanır.
+    """
+
+    MAX_DROPOUT = 3000
+    MAX_MISORDER = 100
+    MIN_SEQUENTIAL = 2
+
+    def __init__(self):
+        self.ssrc = None
+        self.base_seq = 0
+        self.max_seq = 0
+        self.bad_seq = 0
+        self.cycles = 0
+        self.received = 0
+        self.expected_prior = 0
+        self.received_prior = 0
+        self.probation = 0
+        self._last_sr = 0              # Son SR'ın NTP orta 32 biti
+        self._last_sr_time = None      # Son SR'ın alındığı an (monotonic)
+
+    def _init_seq(self, seq: int):
+        self.base_seq = self.max_seq = seq
+        self.bad_seq = 0x10000 + 1     # Hiçbir SN'e eşit olmayan değer
+        self.cycles = 0
+        self.received = 0
+        self.expected_prior = self.received_prior = 0
+
+    def update(self, ssrc: int, seq: int):
+        """
+        Orijinal akıştan alınan her paket için çağrılır (RFC 3550 A.1 update_seq).
+        Yeni kaynak MIN_SEQUENTIAL ardışık paketle doğrulanır; büyük bir SN sıçraması
+        ancak ardından gelen paket de sıçramayı onaylarsa kaynağın yeniden başladığı sayılır.
+        """
+        if self.ssrc != ssrc:
+            self.ssrc = ssrc
+            self._init_seq(seq)
+            self.max_seq = (seq - 1) & 0xFFFF
+            self.probation = self.MIN_SEQUENTIAL
+
+        if self.probation:
+            if seq == (self.max_seq + 1) & 0xFFFF:
+                self.probation -= 1
+                self.max_seq = seq
+                if self.probation == 0:
+                    self._init_seq(seq)
+                    self.received += 1
+            else:
+                self.probation = self.MIN_SEQUENTIAL - 1
+                self.max_seq = seq
+            return
+
+        delta = (seq - self.max_seq) & 0xFFFF
+        if delta < self.MAX_DROPOUT:
+            if seq < self.max_seq:
+                self.cycles += 1 << 16
+            self.max_seq = seq
+        elif delta <= 0x10000 - self.MAX_MISORDER:
+            if seq != self.bad_seq:
+                # Tek bir sıçrayan paket (çok gecikmiş/bozuk) istatistikleri sıfırlamaz
+                self.bad_seq = (seq + 1) & 0xFFFF
+                return
+            # Art arda iki paket sıçramayı onayladı: kaynak yeniden başlamış say
+            self._init_seq(seq)
+        # else: yinelenen veya sırası bozuk paket
+        self.received += 1
+
+    def on_sender_report(self, ntp_seconds: int, ntp_fraction: int, now: Optional[float] = None):
+        self._last_sr = ((ntp_seconds & 0xFFFF) << 16) | (ntp_fraction >> 16)
+        self._last_sr_time = time.monotonic() if now is None else now
+
+    @property
+    def extended_highest_seq(self) -> int:
+        return self.cycles + self.max_seq
+
+    def report_block(self, jitter: int, now: Optional[float] = None) -> Optional[ReportBlock]:
+        """
+        Alım raporu bloğu; aralık kaybı son rapordan bu yana hesaplanır.
+        jitter: RTP timestamp biriminde interarrival jitter
+        """
+        if self.ssrc is None or self.probation:
+            return None
+        now = time.monotonic() if now is None else now
+
+        expected = self.extended_highest_seq - self.base_seq + 1
+        lost = expected - self.received
+        expected_interval = expected - self.expected_prior
+        received_interval = self.received - self.received_prior
+        self.expected_prior, self.received_prior = expected, self.received
+        lost_interval = expected_interval - received_interval
+        fraction = (lost_interval << 8) // expected_interval if expected_interval > 0 and lost_interval > 0 else 0
+
+        dlsr = 0
+        if self._last_sr_time is not None:
+            dlsr = int((now - self._last_sr_time) * 65536) & 0xFFFFFFFF
+
+        return ReportBlock(self.ssrc, min(fraction, 255), max(min(lost, 0x7FFFFF), -0x800000),
+                           self.extended_highest_seq & 0xFFFFFFFF, jitter & 0xFFFFFFFF,
+                           self._last_sr, dlsr)
+
+
+def build_feedback(pt: int, fmt: int, sender_ssrc: int, media_ssrc: int, fci: bytes) -> bytes:
+    """RFC 4585 feedback paketi: ortak header + FCI"""
+    length = (8 + len(fci)) // 4
+    return (struct.pack(RTCP_HEADER, (RTCP_VERSION << 6) | fmt, pt, length)
+            + struct.pack(FEEDBACK_SSRCS, sender_ssrc, media_ssrc) + fci)
+
+
+def parse_feedback(body: memoryview) -> Tuple[int, int, memoryview]:
+    """Feedback gövdesini (gönderen SSRC, medya SSRC, FCI) olarak ayırır"""
+    sender_ssrc, media_ssrc = struct.unpack_from(FEEDBACK_SSRCS, body)
+    return sender_ssrc, media_ssrc, body[8:]
+
+
+def build_generic_nack(sender_ssrc: int, media_ssrc: int, seqs: List[int]) -> bytes:
+    """
+    Kayıp sequence number listesinden generic NACK paketi oluşturur.
+    Her FCI girdisi PID ve onu izleyen 16 paketin bit maskesini (BLP) taşır.
+    """
+    fci = bytearray()
+    pid, blp = None, 0
+    for seq in seqs:
+        if pid is not None:
+            distance = (seq - pid) & 0xFFFF
+            if 1 <= distance <= 16:
+                blp |= 1 << (distance - 1)
+                continue
+            fci += struct.pack(NACK_ITEM, pid, blp)
+        pid, blp = seq, 0
+    if pid is not None:
+        fci += struct.pack(NACK_ITEM, pid, blp)
+    return build_feedback(RTCP_RTPFB, RTPFB_GENERIC_NACK, sender_ssrc, media_ssrc, bytes(fci))
+
+
+def parse_generic_nack(fci: memoryview) -> List[int]:
+    """Generic NACK FCI'sından kayıp sequence number listesini çıkarır"""
+    seqs = []
+    for offset in range(0, len(fci) - 3, 4):
+        pid, blp = struct.unpack_from(NACK_ITEM, fci, offset)
+        seqs.append(pid)
+        for bit in range(16):
+            if blp & (1 << bit):
+                seqs.append((pid + bit + 1) & 0xFFFF)
+    return seqs
+
+
+def build_transport_feedback(sender_ssrc: int, media_ssrc: int, base_seq: int, feedback_count: int,
+                             arrivals: List[Optional[int]]) -> bytes:
+    """
+    Transport-wide CC feedback paketi.
+    arrivals: base_seq'ten başlayarak her transport SN için varış zamanı (µs) ya da
+    alınmadıysa None. Durumlar 2 bitlik status vector chunk'larıyla (7 paket/chunk)
+    kodlanır; ilk delta referans zamanına, sonrakiler bir önceki pakete görelidir.
+    """
+    first = next((t for t in arrivals if t is not None), 0)
+    reference = first // TWCC_REFERENCE_UNIT_US
+    previous = reference * TWCC_REFERENCE_UNIT_US
+
+    statuses, deltas = [], bytearray()
+    for arrival in arrivals:
+        if arrival is None:
+            statuses.append(TWCC_NOT_RECEIVED)
+            continue
+        delta = round((arrival - previous) / TWCC_DELTA_UNIT_US)
+        if 0 <= delta <= 0xFF:
+            statuses.append(TWCC_SMALL_DELTA)
+            deltas.append(delta)
+        else:
+            delta = max(-0x8000, min(0x7FFF, delta))
+            statuses.append(TWCC_LARGE_DELTA)
+            deltas += struct.pack('!h', delta)
+        # Niceleme hatası birikmesin: referans, alıcının gördüğü zamana ilerler
+        previous += delta * TWCC_DELTA_UNIT_US
+
+    fci = bytearray(struct.pack(TRANSPORT_FEEDBACK_HEADER, base_seq & 0xFFFF, len(statuses),
+                                ((reference & 0xFFFFFF) << 8) | (feedback_count & 0xFF)))
+    for start in range(0, len(statuses), 7):
+        chunk = 0xC000
+        for i, status in enumerate(statuses[start:start + 7]):
+            chunk |= status << (12 - 2 * i)
+        fci += struct.pack('!H', chunk)
+    fci += deltas
+    fci += b'\x00' * (-len(fci) % 4)
+    return build_feedback(RTCP_RTPFB, RTPFB_TRANSPORT_FEEDBACK, sender_ssrc, media_ssrc, bytes(fci))
+
+
+def parse_transport_feedback(fci: memoryview) -> Optional[Tuple[int, int, List[Optional[int]]]]:
+    """
+    Transport-wide CC FCI -> (base SN, feedback sayacı, varış zamanları µs / None).
+    Run-length, 1 bit ve 2 bit status vector chunk'larının hepsi desteklenir.
+    """
+    if len(fci) < 8:
+        return None
+    base_seq, status_count, reference = struct.unpack_from(TRANSPORT_FEEDBACK_HEADER, fci)
+    feedback_count = reference & 0xFF
+    reference >>= 8
+    if reference & 0x800000:    # 24 bit işaretli
+        reference -= 0x1000000
+
+    statuses = []
+    offset = 8
+    while len(statuses) < status_count:
+        if offset + 2 > len(fci):
+            return None
+        chunk = struct.unpack_from('!H', fci, offset)[0]
+        offset += 2
+        if not chunk & 0x8000:
+            # Run-length chunk: 2 bit durum + 13 bit tekrar
+            statuses.extend([(chunk >> 13) & 0x03] * (chunk & 0x1FFF))
+        elif chunk & 0x4000:
+            statuses.extend((chunk >> (12 - 2 * i)) & 0x03 for i in range(7))
+        else:
+            statuses.extend((chunk >> (13 - i)) & 0x01 for i in range(14))
+    del statuses[status_count:]
+
+    arrivals = []
+    current = reference * TWCC_REFERENCE_UNIT_US
+    for status in statuses:
+        if status == TWCC_SMALL_DELTA:
+            if offset + 1 > len(fci):
+                return None
+            current += fci[offset] * TWCC_DELTA_UNIT_US
+            offset += 1
+        elif status == TWCC_LARGE_DELTA:
+            if offset + 2 > len(fci):
+                return None
+            current += struct.unpack_from('!h', fci, offset)[0] * TWCC_DELTA_UNIT_US
+            offset += 2
+        else:
+            arrivals.append(None)
+            continue
+        arrivals.append(current)
+    return base_seq, feedback_count, arrivals
+
+
+def build_pli(sender_ssrc: int, media_ssrc: int) -> bytes:
+    """Picture Loss Indication: FCI'sız feedback"""
+    return build_feedback(RTCP_PSFB, PSFB_PLI, sender_ssrc, media_ssrc, b'')
+
+
+def build_fir(sender_ssrc: int, media_ssrc: int, command_seq: int) -> bytes:
+    """
+    Full Intra Request (RFC 5104): hedef SSRC FCI'da taşınır, ortak header'daki
+    medya SSRC alanı 0'dır. Aynı isteğin tekrarı aynı komut numarasını kullanır.
+    """
+    return build_feedback(RTCP_PSFB, PSFB_FIR, sender_ssrc, 0,
+                          struct.pack(FIR_ITEM, media_ssrc, command_seq & 0xFF))
+
+
+def parse_fir(fci: memoryview) -> List[Tuple[int, int]]:
+    """FIR FCI'sından (hedef SSRC, komut sequence number) listesi"""
+    return [struct.unpack_from(FIR_ITEM, fci, offset)[:2] for offset in range(0, len(fci) - 7, 8)]
+
+
+class KeyframeRequester:
+    """
+    Alıcı tarafı keyframe isteği zamanlaması.
+    Kod çözme IDR beklerken istek gönderilir; istek (veya cevabı) kaybolabileceği için
+    yanıt gelmezse RTT'ye bağlı aralıkla tekrarlanır, aralık min_interval'dan kısa olamaz.
+    FIR modunda yeni bir kayıp olayı yeni komut numarası alır, tekrarlar aynısını kullanır.
+    """
+
+    def __init__(self, method: str = 'pli', min_interval: float = 0.2):
+        """
+        method: 'pli' veya 'fir'
+        min_interval: Ardışık istekler arasındaki minimum süre (saniye)
+        """
+        if method not in ('pli', 'fir'):
+            raise ValueError(f"Bilinmeyen keyframe isteği yöntemi: {method}")
+        self.method = method
+        self.min_interval = min_interval
+        self._last_request: Optional[float] = None
+        self._pending = False
+        self._command_seq = 0
+        self.stats = {'requests_sent': 0, 'loss_events': 0}
+
+    def poll(self, waiting_for_keyframe: bool, sender_ssrc: int, media_ssrc: int,
+             rtt_ms: Optional[float] = None, now: Optional[float] = None) -> Optional[bytes]:
+        """Gönderilmesi gereken istek paketini döndürür; gerek yoksa veya sınırlanmışsa None"""
+        if not waiting_for_keyframe:
+            self._pending = False
+            return None
+        now = time.monotonic() if now is None else now
+        if not self._pending:
+            # Yeni kayıp olayı
+            self._pending = True
+            self._command_seq = (self._command_seq + 1) & 0xFF
+            self.stats['loss_events'] += 1
+        elif self._last_request is not None:
+            retry_interval = max(self.min_interval, 1.5 * (rtt_ms or 100) / 1000.0)
+            if now - self._last_request < retry_interval:
+                return None
+        if self._last_request is not None and now - self._last_request < self.min_interval:
+            return None
+
+        self._last_request = now
+        self.stats['requests_sent'] += 1
+        if self.method == 'fir':
+            return build_fir(sender_ssrc, media_ssrc, self._command_seq)
+        return build_pli(sender_ssrc, media_ssrc)
+
+    def get_stats(self):
+        return self.stats
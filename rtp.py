@@ -0,0 +1,255 @@
+# rtp.py - RTP PAKET KODEK'İ VE HAFİF HEADER GÖRÜNÜMÜ
+"""
+RtpPacket: __slots__ tabanlı, önceden derlenmiş struct ile parse/serialize eden
+kompakt RTP paketi (RFC 3550). Header extension'ı ham olarak taşır; RFC 8285
+one-byte extension elemanlarına erişim sağlar.
+
+RtpHeaderView: alınan datagram üzerinde kopyasız RTP görünümü. Header alanları
+ihtiyaç anında doğrudan buffer'dan okunur; payload bir memoryview dilimidir.
+Paket iletilirken yeniden serialize edilmez, orijinal byte'lar kullanılır.
+"""
+import struct
+from typing import Optional, Union, List
+
+RTP_VERSION = 2
+RTP_FIXED_HEADER_SIZE = 12
+ONE_BYTE_EXTENSION_PROFILE = 0xBEDE
+
+RTP_HEADER = struct.Struct('!BBHII')
+EXTENSION_HEADER = struct.Struct('!HH')
+_SEQ = struct.Struct('!H')
+_U32 = struct.Struct('!I')
+
+
+def _one_byte_elements(data: Union[bytes, memoryview]):
+    """RFC 8285 one-byte extension elemanlarını (id, değer) olarak gezer"""
+    offset = 0
+    while offset < len(data):
+        element_id, size = data[offset] >> 4, (data[offset] & 0x0F) + 1
+        if element_id == 0:      # padding baytı
+            offset += 1
+            continue
+        if element_id == 15:     # ayrılmış: ayrıştırma durur
+            return
+        yield element_id, data[offset + 1:offset + 1 + size]
+        offset += 1 + size
+
+
+class RtpPacket:
+    """Kompakt RTP paketi"""
+
+    __slots__ = ('payload_type', 'marker', 'sequence_number', 'timestamp', 'ssrc',
+                 'csrc', 'extension_profile', 'extension', 'padding_size', 'payload')
+
+    def __init__(self,
+                 payload_type: int = 0,
+                 marker: int = 0,
+                 sequence_number: int = 0,
+                 timestamp: int = 0,
+                 ssrc: int = 0,
+                 payload: bytes = b''):
+        self.payload_type = payload_type
+        self.marker = marker
+        self.sequence_number = sequence_number
+        self.timestamp = timestamp
+        self.ssrc = ssrc
+        self.csrc: List[int] = []
+        self.extension_profile: Optional[int] = None
+        self.extension = b''
+        self.padding_size = 0
+        self.payload = payload
+
+    @classmethod
+    def parse(cls, data: Union[bytes, bytearray, memoryview]) -> 'RtpPacket':
+        """Datagramı ayrıştırır; geçersiz pakette ValueError fırlatır"""
+        length = len(data)
+        if length < RTP_FIXED_HEADER_SIZE:
+            raise ValueError("RTP paketi header'dan kısa")
+        first, second, seq, timestamp, ssrc = RTP_HEADER.unpack_from(data)
+        if first >> 6 != RTP_VERSION:
+            raise ValueError("RTP versiyonu 2 değil")
+
+        packet = cls(second & 0x7F, second >> 7, seq, timestamp, ssrc)
+        offset = RTP_FIXED_HEADER_SIZE
+        csrc_count = first & 0x0F
+        if csrc_count:
+            if length < offset + 4 * csrc_count:
+                raise ValueError("RTP CSRC listesi eksik")
+            packet.csrc = list(struct.unpack_from(f'!{csrc_count}I', data, offset))
+            offset += 4 * csrc_count
+
+        if first & 0x10:
+            if length < offset + 4:
+                raise ValueError("RTP header extension eksik")
+            profile, words = EXTENSION_HEADER.unpack_from(data, offset)
+            offset += 4
+            if length < offset + 4 * words:
+                raise ValueError("RTP header extension kesik")
+            packet.extension_profile = profile
+            packet.extension = bytes(data[offset:offset + 4 * words])
+            offset += 4 * words
+
+        end = length
+        if first & 0x20:
+            packet.padding_size = data[-1]
+            end -= packet.padding_size
+            if end < offset:
+                raise ValueError("RTP padding uzunluğu geçersiz")
+        packet.payload = bytes(data[offset:end])
+        return packet
+
+    def serialize(self) -> bytes:
+        first = (RTP_VERSION << 6) | len(self.csrc)
+        if self.padding_size:
+            first |= 0x20
+        parts = [RTP_HEADER.pack(first | (0x10 if self.extension_profile is not None else 0),
+                                 (self.marker << 7) | self.payload_type, self.sequence_number,
+                                 self.timestamp, self.ssrc)]
+        if self.csrc:
+            parts.append(struct.pack(f'!{len(self.csrc)}I', *self.csrc))
+        if self.extension_profile is not None:
+            extension = self.extension + b'\x00' * (-len(self.extension) % 4)
+            parts.append(EXTENSION_HEADER.pack(self.extension_profile, len(extension) // 4))
+            parts.append(extension)
+        parts.append(self.payload)
+        if self.padding_size:
+            parts.append(b'\x00' * (self.padding_size - 1) + bytes([self.padding_size]))
+        return b''.join(parts)
+
+    @property
+    def header_size(self) -> int:
+        """Serileştirilmiş header uzunluğu (CSRC ve 4 byte'a hizalanmış extension dahil)"""
+        size = RTP_FIXED_HEADER_SIZE + 4 * len(self.csrc)
+        if self.extension_profile is not None:
+            size += EXTENSION_HEADER.size + len(self.extension) + (-len(self.extension) % 4)
+        return size
+
+    def _one_byte_elements(self):
+        if self.extension_profile != ONE_BYTE_EXTENSION_PROFILE:
+            return iter(())
+        return _one_byte_elements(self.extension)
+
+    def get_extension(self, ext_id: int) -> Optional[bytes]:
+        """RFC 8285 one-byte header extension elemanını döndürür"""
+        for element_id, value in self._one_byte_elements():
+            if element_id == ext_id:
+                return bytes(value)
+        return None
+
+    def set_extension(self, ext_id: int, value: bytes):
+        """RFC 8285 one-byte header extension elemanı ekler (aynı id varsa değiştirir)"""
+        if not 1 <= ext_id <= 14 or not 1 <= len(value) <= 16:
+            raise ValueError(f"Geçersiz one-byte extension: id={ext_id}, uzunluk={len(value)}")
+        elements = bytearray()
+        for element_id, existing in self._one_byte_elements():
+            if element_id != ext_id:
+                elements.append((element_id << 4) | (len(existing) - 1))
+                elements += existing
+        elements.append((ext_id << 4) | (len(value) - 1))
+        elements += value
+        self.extension_profile = ONE_BYTE_EXTENSION_PROFILE
+        self.extension = bytes(elements)
+
+    def __repr__(self) -> str:
+        return (f"RtpPacket(seq={self.sequence_number}, ts={self.timestamp}, "
+                f"pt={self.payload_type}, marker={self.marker}, payload={len(self.payload)})")
+
+
+class RtpHeaderView:
+    """
+    RTP paketi görünümü (RtpPacket ile aynı alan adları).
+    Yalnızca okuma amaçlıdır; alt buffer'ın (örn. havuz buffer'ı) ömrü görünüme bağlıdır.
+    """
+
+    __slots__ = ('_view', '_header_length', '_payload_end')
+
+    def __init__(self, data: Union[bytes, bytearray, memoryview], header_length: int, payload_end: int):
+        self._view = data if isinstance(data, memoryview) else memoryview(data)
+        self._header_length = header_length
+        self._payload_end = payload_end
+
+    @classmethod
+    def parse(cls, data: Union[bytes, bytearray, memoryview]) -> Optional['RtpHeaderView']:
+        """Header uzunluğunu doğrular; geçersiz pakette None döndürür"""
+        length = len(data)
+        if length < RTP_FIXED_HEADER_SIZE or data[0] >> 6 != RTP_VERSION:
+            return None
+
+        header_length = RTP_FIXED_HEADER_SIZE + 4 * (data[0] & 0x0F)
+        if data[0] & 0x10:
+            if length < header_length + 4:
+                return None
+            header_length += 4 + 4 * ((data[header_length + 2] << 8) | data[header_length + 3])
+
+        payload_end = length
+        if data[0] & 0x20:
+            payload_end -= data[length - 1]
+        if header_length > payload_end:
+            return None
+        return cls(data, header_length, payload_end)
+
+    @property
+    def marker(self) -> int:
+        return self._view[1] >> 7
+
+    @property
+    def payload_type(self) -> int:
+        return self._view[1] & 0x7F
+
+    @property
+    def sequence_number(self) -> int:
+        return _SEQ.unpack_from(self._view, 2)[0]
+
+    @property
+    def timestamp(self) -> int:
+        return _U32.unpack_from(self._view, 4)[0]
+
+    @property
+    def ssrc(self) -> int:
+        return _U32.unpack_from(self._view, 8)[0]
+
+    @property
+    def header_length(self) -> int:
+        return self._header_length
+
+    @property
+    def payload(self) -> memoryview:
+        return self._view[self._header_length:self._payload_end]
+
+    def get_extension(self, ext_id: int) -> Optional[bytes]:
+        """RFC 8285 one-byte header extension elemanını buffer'dan okur"""
+        view = self._view
+        if not view[0] & 0x10:
+            return None
+        offset = RTP_FIXED_HEADER_SIZE + 4 * (view[0] & 0x0F)
+        if _SEQ.unpack_from(view, offset)[0] != ONE_BYTE_EXTENSION_PROFILE:
+            return None
+        for element_id, value in _one_byte_elements(view[offset + 4:self._header_length]):
+            if element_id == ext_id:
+                return bytes(value)
+        return None
+
+    @property
+    def data(self) -> memoryview:
+        """Paketin tamamı (header + payload + padding)"""
+        return self._view
+
+    def detach(self) -> 'RtpHeaderView':
+        """
+        Alt buffer'dan bağımsız görünüm (tek kopya, yeniden ayrıştırma yok).
+        Havuz buffer'ı yeniden kullanılmadan önce saklanacak paketler için.
+        """
+        if isinstance(self._view.obj, bytes):
+            return self
+        return RtpHeaderView(self._view.tobytes(), self._header_length, self._payload_end)
+
+    def serialize(self) -> bytes:
+        """Orijinal paket byte'ları (yeniden kodlama yok)"""
+        obj = self._view.obj
+        if isinstance(obj, bytes) and len(obj) == len(self._view):
+            return obj
+        return self._view.tobytes()
+
+    def __repr__(self) -> str:
+        return (f"RtpHeaderView(seq={self.sequence_number}, ts={self.timestamp}, "
+                f"pt={self.payload_type}, marker={self.marker}, payload={len(self.payload)})")
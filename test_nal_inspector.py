@@ -0,0 +1,29 @@
+# test_nal_inspector.py - H.264 PAYLOAD SINIFLANDIRMA TESTLERİ
+import pytest
+
+from nal_inspector import classify_h264_payload, NAL_CLASS_NON_REFERENCE, NAL_CLASS_REFERENCE, NAL_CLASS_IDR
+
+STAP_A = 0x18 | 0x60
+NON_REF_SLICE = bytes([0x01, 0xAA, 0xBB])   # nal_ref_idc = 0
+
+
+def test_stap_a_non_reference_only():
+    payload = bytes([STAP_A, 0x00, len(NON_REF_SLICE)]) + NON_REF_SLICE
+    assert classify_h264_payload(payload) == NAL_CLASS_NON_REFERENCE
+
+
+@pytest.mark.parametrize('payload', [
+    bytes([STAP_A]),                                                        # boş aggregate
+    bytes([STAP_A, 0x00]),                                                  # kesik boyut alanı
+    bytes([STAP_A, 0x00, 0x00]),                                            # sıfır boyut
+    bytes([STAP_A, 0x00, 0x10]) + NON_REF_SLICE,                            # boyut payload'ı aşıyor
+    bytes([STAP_A, 0x00, len(NON_REF_SLICE)]) + NON_REF_SLICE + bytes([0x00]),   # kesik ikinci NAL
+])
+def test_malformed_stap_a_is_conservative(payload):
+    assert classify_h264_payload(payload) == NAL_CLASS_REFERENCE
+
+
+def test_truncated_stap_a_keeps_more_critical_class():
+    idr = bytes([0x65, 0x88])
+    payload = bytes([STAP_A, 0x00, len(idr)]) + idr + bytes([0x00, 0x10, 0x01])
+    assert classify_h264_payload(payload) == NAL_CLASS_IDR
@@ -0,0 +1,155 @@
+# test_packet_buffer.py - JITTER BUFFER (HALKA BUFFER) TESTLERİ
+import random
+
+from packet_buffer import PacketBuffer, seq_diff
+from rtp import RtpPacket
+
+
+def _packet(seq: int, timestamp: int = None) -> RtpPacket:
+    return RtpPacket(payload_type=96, sequence_number=seq & 0xFFFF,
+                     timestamp=(seq * 10 if timestamp is None else timestamp) & 0xFFFFFFFF,
+                     ssrc=0x1234, payload=bytes([seq & 0xFF]) * 10)
+
+
+class _CountingSlots(list):
+    reads = 0
+
+    def __getitem__(self, index):
+        _CountingSlots.reads += 1
+        return super().__getitem__(index)
+
+
+def _brute_first(buffer: PacketBuffer):
+    if buffer.next_seq is None:
+        return None
+    for offset in range(buffer.capacity):
+        packet = buffer.get((buffer.next_seq + offset) & 0xFFFF)
+        if packet is not None:
+            return packet
+    return None
+
+
+def test_first_available_does_not_rescan_burst_gap():
+    buffer = PacketBuffer(capacity=1024)
+    buffer.push(_packet(100))
+    buffer.push(_packet(700))
+    assert [p.sequence_number for p in buffer.pop_due(now=float('inf'))] == [100, 700]
+
+    buffer.push(_packet(701))
+    buffer.push(_packet(1300))
+    buffer._slots = _CountingSlots(buffer._slots)
+    buffer.pop_due(now=0.0)   # Baş 701 - henüz zamanı gelmedi
+    buffer._advance_head(1)   # 701 düşer, 702..1299 boş
+    assert buffer.next_deadline() is not None
+    _CountingSlots.reads = 0
+    for _ in range(100):
+        assert buffer._first_available().sequence_number == 1300
+    assert _CountingSlots.reads <= 100
+
+
+def test_first_available_matches_full_scan_across_wrap():
+    rng = random.Random(7)
+    buffer = PacketBuffer(capacity=256)
+    seq = 65000
+    for _ in range(5000):
+        seq = (seq + rng.choice([1, 1, 1, 2, 5, 40])) & 0xFFFF
+        if rng.random() < 0.9:
+            buffer.push(_packet(seq))
+        late = (seq - rng.randint(1, 30)) & 0xFFFF
+        if rng.random() < 0.2:
+            buffer.push(_packet(late))
+        if rng.random() < 0.3:
+            buffer.pop_due(now=float('inf'))
+        elif rng.random() < 0.1:
+            buffer.pop()
+        expected = _brute_first(buffer)
+        actual = buffer._first_available()
+        assert (actual and actual.sequence_number) == (expected and expected.sequence_number)
+        if actual is not None:
+            assert seq_diff(actual.sequence_number, buffer.next_seq) >= 0
+
+
+def test_playout_order_across_sequence_wrap():
+    buffer = PacketBuffer()
+    for seq in (65533, 65535, 65534, 0, 1):
+        assert buffer.push(_packet(seq))
+    assert [p.sequence_number for p in buffer.pop_due(now=float('inf'))] == [65533, 65534, 65535, 0, 1]
+    assert buffer.stats['packets_reordered'] == 1
+
+
+def test_nack_gap_across_sequence_wrap():
+    buffer = PacketBuffer()
+    buffer.push(_packet(65534))
+    buffer.push(_packet(1))
+    assert buffer.get_nack_list(now=0.0) == [65535, 0]
+
+
+def test_duplicate_and_late_packets_rejected():
+    buffer = PacketBuffer()
+    assert buffer.push(_packet(10))
+    assert not buffer.push(_packet(10))
+    assert buffer.stats['packets_buffered'] == 1
+
+    buffer.push(_packet(12))
+    buffer.pop_due(now=float('inf'))
+    # Oynatma başı 11'i geçti: geç gelen paket oynatılamaz
+    assert not buffer.push(_packet(11))
+    assert not buffer.push(_packet(10))
+    assert buffer.stats['packets_dropped'] == 2
+    assert 11 not in buffer
+
+
+def test_reordered_packet_cancels_pending_nack():
+    buffer = PacketBuffer()
+    buffer.push(_packet(1))
+    buffer.push(_packet(3))
+    buffer.push(_packet(2))
+    assert buffer.get_nack_list(now=0.0) == []
+    assert buffer.stats['packets_reordered'] == 1
+
+
+def test_nack_retry_interval_and_limit():
+    buffer = PacketBuffer()
+    buffer.push(_packet(1))
+    buffer.push(_packet(3))
+    assert buffer.get_nack_list(rtt_ms=100, now=0.0) == [2]
+    # 1.5 RTT dolmadan tekrar istenmez
+    assert buffer.get_nack_list(rtt_ms=100, now=0.1) == []
+    assert buffer.get_nack_list(rtt_ms=100, now=0.16) == [2]
+    assert buffer.get_nack_list(rtt_ms=100, now=0.32) == [2]
+    # NACK_MAX_RETRIES sonrası boşluk bırakılır
+    assert buffer.get_nack_list(rtt_ms=100, now=1.0) == []
+    assert buffer.get_stats()['packets_missing'] == 0
+
+
+def test_retransmission_fills_gap_without_reorder_count():
+    buffer = PacketBuffer()
+    buffer.push(_packet(1))
+    buffer.push(_packet(3))
+    assert buffer.get_nack_list(now=0.0) == [2]
+    assert buffer.push(_packet(2), retransmitted=True)
+    assert buffer.stats['packets_retransmitted'] == 1
+    assert buffer.stats['packets_reordered'] == 0
+    assert buffer.get_nack_list(now=1.0) == []
+
+
+def test_ulpfec_gap_nacked_only_after_confirmation():
+    """ULPFEC SN uzayında boşluk kayıp FEC paketi olabilir: FEC maskesi doğrulamadan NACK yok"""
+    buffer = PacketBuffer(nack_requires_confirmation=True)
+    buffer.push(_packet(10))
+    buffer.push(_packet(14))       # 11, 12, 13 eksik
+    assert buffer.get_nack_list(now=0.0) == []
+    buffer.confirm_media([11, 12, 99])   # 13 FEC paketiydi, 99 eksik değil
+    assert buffer.get_nack_list(now=0.0) == [11, 12]
+    assert 99 not in buffer
+
+
+def test_unconfirmed_gap_expires_when_head_passes():
+    buffer = PacketBuffer(nack_requires_confirmation=True)
+    buffer.push(_packet(10))
+    buffer.push(_packet(12))
+    buffer.pop_due(now=float('inf'))
+    assert buffer.get_nack_list(now=0.0) == []
+    assert buffer.get_stats()['packets_missing'] == 0
+    buffer.confirm_media([11])     # Geç gelen FEC maskesi: artık oynatılamaz
+    assert buffer.get_nack_list(now=0.0) == []
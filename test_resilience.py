@@ -0,0 +1,97 @@
+# test_resilience.py - FEC ŞEKLİ / SN MASKESİ TESTLERİ
+import pytest
+
+from loss_model import candidate_shapes
+from packet_buffer import PacketBuffer
+from resilience import FecHandler, FEC_PAYLOAD_TYPE, RED_PAYLOAD_TYPE
+from rtp import RtpPacket
+
+
+def _send(handler: FecHandler, count: int, state: dict):
+    """Göndericiyi taklit eder: ULPFEC'te her FEC paketi için bir SN atlanır"""
+    sent = []
+    for _ in range(count):
+        packet = RtpPacket(payload_type=96, sequence_number=state['seq'], timestamp=state['seq'] * 3000,
+                           ssrc=0x1234, payload=bytes([state['seq'] & 0xFF]) * 200)
+        protected = handler.protect(packet)
+        state['seq'] = (state['seq'] + 1) & 0xFFFF
+        if handler.shares_sequence_space:
+            state['seq'] = (state['seq'] + sum(1 for p in protected if p.payload_type == FEC_PAYLOAD_TYPE)) & 0xFFFF
+        sent.extend(protected)
+    return sent
+
+
+@pytest.mark.parametrize('row_parity', [False, True])
+def test_ulpfec_every_selectable_shape_protects(row_parity):
+    """select_fec_shape'in döndürebileceği her şekil protect()'te hata vermeden çalışmalı"""
+    handler = FecHandler(fec_scheme='ulpfec', enable_red=False, row_parity=row_parity)
+    shapes = list(candidate_shapes(0.5, handler.max_protected_span, handler.max_group_size, handler.shape_span))
+    assert shapes
+    state = {'seq': 65000}   # SN sarmasını da kapsar
+    for group_size, parity, depth in shapes:
+        handler.set_fec_shape(group_size, parity, depth)
+        sent = _send(handler, group_size * depth + 1, state)
+        media_seqs = [p.sequence_number for p in sent if p.payload_type != FEC_PAYLOAD_TYPE]
+        fec_seqs = [p.sequence_number for p in sent if p.payload_type == FEC_PAYLOAD_TYPE]
+        assert not set(media_seqs) & set(fec_seqs)
+
+
+@pytest.mark.parametrize('shape', [(8, 3, 6), (16, 3, 3), (16, 5, 3), (12, 5, 4), (24, 7, 2)])
+def test_ulpfec_shape_beyond_mask_rejected(shape):
+    handler = FecHandler(fec_scheme='ulpfec', enable_red=False)
+    with pytest.raises(ValueError):
+        handler.set_fec_shape(*shape)
+
+
+@pytest.mark.parametrize('interleave, row_parity', [((12, 5), False), ((10, 5), True)])
+def test_ulpfec_interleave_beyond_mask_rejected(interleave, row_parity):
+    with pytest.raises(ValueError):
+        FecHandler(fec_scheme='ulpfec', interleave=interleave, row_parity=row_parity)
+
+
+def test_ulpfec_interleave_closes_matrix_on_sequence_jump():
+    """Matris dışı SN'ler (korumasız paketler) sütunu maskeden taşırsa yarım matris kapatılır"""
+    handler = FecHandler(fec_scheme='ulpfec', enable_red=False, interleave=(8, 5))
+    state = {'seq': 100}
+    _send(handler, 20, state)
+    state['seq'] += 30
+    sent = _send(handler, 40, state)
+    assert any(p.payload_type == FEC_PAYLOAD_TYPE for p in sent)
+
+
+def test_unwrap_red_yields_media_packets_only():
+    """rtpulpfecdec modunda RED açılır: kayıp primary ve redundant bloklar medya PT'siyle teslim edilir"""
+    sender = FecHandler(fec_scheme='ulpfec', enable_red=True, red_depth=2)
+    receiver = FecHandler(fec_scheme='ulpfec', enable_red=True, red_depth=2)
+    sent = []
+    for seq in range(10, 13):
+        packet = RtpPacket(payload_type=96, sequence_number=seq, timestamp=seq * 3000, ssrc=0x1234,
+                           payload=bytes([seq]) * 50, marker=1)
+        sent.extend(sender.protect(packet))
+    red = [p for p in sent if p.payload_type == RED_PAYLOAD_TYPE][-1]
+    buffer = PacketBuffer()
+    buffer.push(next(p for p in sent if p.sequence_number == 11 and p.payload_type == 96))
+    unwrapped = receiver.unwrap_red(red, buffer)
+    assert {p.sequence_number: p.payload_type for p in unwrapped} == {10: 96, 12: 96}
+    assert next(p for p in unwrapped if p.sequence_number == 12).payload == bytes([12]) * 50
+    assert next(p for p in unwrapped if p.sequence_number == 10).payload == bytes([10]) * 50
+
+
+def test_rs_v1_group_size_limited_to_header_coefficients():
+    with pytest.raises(ValueError):
+        FecHandler(group_size=12, header_version=1)
+    handler = FecHandler(group_size=10, header_version=1)
+    assert handler.max_group_size == 10
+    with pytest.raises(ValueError):
+        handler.set_fec_shape(12, 3)
+
+
+def test_rs_v1_largest_group_recovers_loss():
+    sender = FecHandler(group_size=10, protection_level=0.3, enable_red=False, header_version=1)
+    receiver = FecHandler(group_size=10, protection_level=0.3, enable_red=False, header_version=1)
+    sent = _send(sender, 10, {'seq': 500})
+    delivered = []
+    for packet in sent:
+        if packet.sequence_number != 503 or packet.payload_type == FEC_PAYLOAD_TYPE:
+            delivered.extend(receiver.receive(packet, now=0.0))
+    assert 503 in {p.sequence_number for p in delivered}
@@ -4,12 +4,13 @@ import asyncio
 import json
 import logging
 from aiortc import RTCPeerConnection, RTCSessionDescription
-from aiortc.rtp import RtpPacket
 from aiohttp import web, ClientSession
 
 from media_pipeline import GStreamerPipeline
+from rtp import RtpPacket, RtpHeaderView
 from resilience import FecHandler
 from adaptive_controller import AdaptiveController
+from rate_controller import EncoderRateController
 from config import FEC_GROUP_SIZE, FEC_PAYLOAD_TYPE
 
 
@@ -22,6 +23,8 @@ class WebRTCHandler:
         self.adaptive_controller = AdaptiveController(self.fec_handler)
         self.gstreamer_output_queue = asyncio.Queue()
         self.media_pipeline = GStreamerPipeline(self.loop, self.gstreamer_output_queue)
+        self.rate_controller = EncoderRateController(self.media_pipeline,
+                                                     initial_overhead=self.fec_handler.protection_level)
 
         self.data_channel = None
         self.receiver_packet_buffer = []
@@ -121,9 +124,11 @@ class WebRTCHandler:
             rtp_packet = RtpPacket.parse(raw_packet)
             packets_to_send = self.fec_handler.protect(rtp_packet)
             if packets_to_send:
-                for pkt in packets_to_send:
+                serialized = [pkt.serialize() for pkt in packets_to_send]
+                self.rate_controller.on_packets_sent(len(serialized[0]), sum(len(data) for data in serialized[1:]))
+                for data in serialized:
                     if self.data_channel and self.data_channel.readyState == "open":
-                        self.data_channel.send(pkt.serialize())
+                        self.data_channel.send(data)
 
     async def process_receiver_buffer(self):
         """
@@ -142,15 +147,16 @@ class WebRTCHandler:
             # --- BASİTLEŞTİRİLMİŞ TEST ---
             # Gecikmenin tamamen gittiğinden emin olmak için FEC'siz deniyoruz.
             for raw_packet in packets_to_process_raw:
-                packet = RtpPacket.parse(raw_packet)
-                # Sadece medya paketlerini yolla, FEC'i atla
-                if packet.payload_type != FEC_PAYLOAD_TYPE:
-                    self.media_pipeline.push_packet(packet.serialize())
+                packet = RtpHeaderView.parse(raw_packet)
+                # Sadece medya paketlerini yolla, FEC'i atla (orijinal byte'lar aynen iletilir)
+                if packet is not None and packet.payload_type != FEC_PAYLOAD_TYPE:
+                    self.media_pipeline.push_packet(raw_packet)
 
     async def run_adaptation(self):
         while True:
             await asyncio.sleep(5)
             self.adaptive_controller.adapt()
+            self.rate_controller.update(self.adaptive_controller.current_bitrate)
 
     async def close(self):
         print("Her şey kapatılıyor.")